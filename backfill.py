@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+
+import argparse
+import asyncio
+
+from models.batch_selection import BatchSelection
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Reprocess many paperless-ngx documents with Ollama.")
+    parser.add_argument("--ids", type=int, nargs="+", default=[], help="document IDs to process")
+    parser.add_argument("--range", type=int, nargs=2, metavar=("START", "END"),
+                        help="inclusive range of document IDs to process")
+    parser.add_argument("--tag", action="append", default=[],
+                        help="process documents having this tag (repeat to require several tags)")
+    parser.add_argument("--query", action="append", default=[], metavar="KEY=VALUE",
+                        help="Paperless document filter, e.g. correspondent__isnull=true (repeatable)")
+    parser.add_argument("--refresh", action="store_true",
+                        help="regenerate the metadata even if a cached result exists")
+    return parser.parse_args()
+
+
+def print_progress(progress):
+    print(f"\r{progress.get_completed()}/{progress.total} documents "
+          f"({progress.processed} processed, {progress.skipped} skipped, {progress.failed} failed), "
+          f"{progress.get_throughput():.2f} documents/s", end="", flush=True)
+
+
+async def backfill(selection: BatchSelection, refresh=False):
+    # Reuse the application's configuration and services, the environment is validated on import
+    import main
+
+    try:
+        doc_ids = await main.batch_processor.get_document_ids(selection)
+        print(f"Processing {len(doc_ids)} documents.")
+        progress = await main.batch_processor.process(doc_ids, on_progress=print_progress,
+                                                        use_cache=not refresh)
+        print()
+        return progress
+    finally:
+        await main.paperless_client.aclose()
+        await main.ollama_client.aclose()
+        main.tracer.close()
+        main.logger.close()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    selection = BatchSelection(
+        ids=args.ids,
+        start=args.range[0] if args.range else None,
+        end=args.range[1] if args.range else None,
+        query=dict(query.split("=", 1) for query in args.query),
+        tags=args.tag,
+    )
+    if not (selection.ids or selection.start is not None or selection.query or selection.tags):
+        raise SystemExit("Select documents with --ids, --range, --tag or --query.")
+
+    result = asyncio.run(backfill(selection, args.refresh))
+    raise SystemExit(1 if result.failed else 0)
@@ -0,0 +1,203 @@
+import asyncio
+import time
+
+import metrics
+from logger import Logger
+from models.batch_progress import BatchProgress
+from models.batch_selection import BatchSelection
+from models.processing_options import ProcessingOptions, LOW_PRIORITY
+from services.document_service import DocumentService
+from services.duplicate_detector import DuplicateDetector
+from services.model_warmer import ModelWarmer
+from services.ollama_service import OllamaService
+from services.paperless_service import PaperlessService
+from services.prompt_creator import PromptCreator
+from services.tag_service import TagService
+from tracing import tracer
+
+# Marks the end of a stage's input
+_DONE = object()
+# Outcomes of the batch progress as counted by the documents processed metric
+_METRIC_RESULTS = {"processed": "success", "skipped": "skipped", "failed": "error"}
+
+
+class BatchProcessor:
+    def __init__(self,
+                 logger: Logger,
+                 document_service: DocumentService,
+                 tag_service: TagService,
+                 prompt_creator: PromptCreator,
+                 ollama: OllamaService,
+                 paperless: PaperlessService,
+                 queue_size=10,
+                 llm_workers=1,
+                 log_every=10,
+                 duplicate_detector: DuplicateDetector = None,
+                 fetch_chunk_size=25,
+                 model_warmer: ModelWarmer = None):
+        self.logger = logger
+        self.document_service = document_service
+        self.tag_service = tag_service
+        self.prompt_creator = prompt_creator
+        self.ollama = ollama
+        self.paperless = paperless
+        self.queue_size = queue_size
+        self.llm_workers = llm_workers
+        self.log_every = log_every
+        self.duplicate_detector = duplicate_detector
+        self.fetch_chunk_size = fetch_chunk_size
+        self.model_warmer = model_warmer
+
+    async def get_document_ids(self, selection: BatchSelection):
+        doc_ids = list(selection.ids)
+
+        if selection.start is not None and selection.end is not None:
+            doc_ids.extend(range(selection.start, selection.end + 1))
+
+        query = dict(selection.query)
+        if selection.tags:
+            tag_ids = await self.tag_service.get_tag_ids_by_names(selection.tags)
+            if len(tag_ids) != len(selection.tags):
+                raise ValueError(f"Unknown tags in batch selection: {selection.tags}")
+            query["tags__id__all"] = ",".join(str(tag_id) for tag_id in tag_ids)
+
+        if query:
+            doc_ids.extend(await self.document_service.get_document_ids(query))
+
+        # Keep the requested order but process every document only once
+        return list(dict.fromkeys(doc_ids))
+
+    async def process(self, doc_ids, progress: BatchProgress = None, on_progress=None, use_cache=True):
+        """
+        Process the documents as a pipeline of fetch -> prompt -> LLM -> resolve -> PATCH stages connected by
+        bounded queues, so the Paperless calls for the next documents overlap with the running generation.
+        """
+        progress = progress or BatchProgress(total=len(doc_ids))
+        options = ProcessingOptions(priority=LOW_PRIORITY, use_cache=use_cache)
+        # Root span of every document in the pipeline, the stages run as its children
+        traces = {}
+
+        def complete(doc_id, outcome, error=None):
+            span = traces.pop(doc_id, None)
+            if span:
+                span.attributes['outcome'] = outcome
+            tracer.end(span, error)
+            metrics.DOCUMENTS_IN_PROGRESS.dec()
+            metrics.DOCUMENTS_PROCESSED.labels(_METRIC_RESULTS[outcome]).inc()
+            setattr(progress, outcome, getattr(progress, outcome) + 1)
+            if on_progress:
+                on_progress(progress)
+            if progress.get_completed() % self.log_every == 0:
+                self._log_progress(progress)
+
+        async def fetch(doc_ids, _):
+            for doc_id in doc_ids:
+                traces[doc_id] = tracer.start_trace('process_document', {'doc_id': doc_id, 'batch': True})
+                metrics.DOCUMENTS_IN_PROGRESS.inc()
+            # Measured per chunk, all of its documents are fetched with one request
+            with metrics.measure(metrics.DOCUMENT_FETCH):
+                documents = {document.id: document for document in await self.document_service.get_documents(doc_ids)}
+
+            fetched = []
+            for doc_id in doc_ids:
+                document = documents.get(doc_id)
+                if document is None:
+                    self.logger.log(f"Document ID {doc_id} not found, skipping.")
+                    complete(doc_id, "skipped")
+                elif not document.text:
+                    self.logger.log(f"No OCR text found for document ID {doc_id}, skipping.")
+                    complete(doc_id, "skipped")
+                else:
+                    fetched.append((doc_id, document))
+            return fetched
+
+        async def create_prompt(_, document):
+            if self.duplicate_detector:
+                return document, await self.duplicate_detector.create_prompt(document.text)
+            return document, await self.prompt_creator.create_prompt(document.text)
+
+        async def generate(_, item):
+            document, prompt = item
+            if self.duplicate_detector:
+                return document, await self.duplicate_detector.extract_metadata_from_prompt(prompt, options)
+            return document, await self.ollama.extract_metadata_from_prompt(prompt, options)
+
+        async def resolve(_, item):
+            document, metadata = item
+            with metrics.measure(metrics.RESOLUTION):
+                return document, await self.paperless.post_process(document, metadata)
+
+        async def update(doc_id, item):
+            _, post_processed_document = item
+            with metrics.measure(metrics.PATCH):
+                await self.document_service.update_document(doc_id, post_processed_document)
+            complete(doc_id, "processed")
+            return None
+
+        def fail(doc_id, e):
+            self.logger.log_error(f"Error in batch processing document ID {doc_id}: {e}")
+            complete(doc_id, "failed", e)
+
+        # The resolve stage runs alone so that two documents never create the same new tag concurrently
+        stages = [(fetch, 2), (create_prompt, 1), (generate, self.llm_workers), (resolve, 1), (update, 2)]
+        queues = [asyncio.Queue(self.queue_size) for _ in stages] + [None]
+        tasks = []
+        for index, (handler, workers) in enumerate(stages):
+            next_workers = stages[index + 1][1] if index + 1 < len(stages) else 0
+            # The fetch stage receives chunks of document IDs and passes every document on by itself
+            tasks.append(asyncio.create_task(self._run_stage(handler, workers, queues[index], queues[index + 1],
+                                                             next_workers, fail, traces, fan_out=index == 0)))
+
+        # The model is loaded while the first documents are fetched and their prompts are built
+        if self.model_warmer:
+            tasks.append(asyncio.create_task(self.model_warmer.warm_up()))
+
+        try:
+            for start in range(0, len(doc_ids), self.fetch_chunk_size):
+                await queues[0].put((tuple(doc_ids[start:start + self.fetch_chunk_size]), None))
+            for _ in range(stages[0][1]):
+                await queues[0].put(_DONE)
+            await asyncio.gather(*tasks)
+        finally:
+            for task in tasks:
+                task.cancel()
+            # Documents of a cancelled batch are no longer in progress
+            metrics.DOCUMENTS_IN_PROGRESS.dec(len(traces))
+
+        progress.finished_at = time.time()
+        self._log_progress(progress)
+        return progress
+
+    async def _run_stage(self, handler, workers, inbox, outbox, next_workers, fail, traces, fan_out=False):
+        async def work():
+            while True:
+                item = await inbox.get()
+                if item is _DONE:
+                    return
+
+                doc_id, payload = item
+                try:
+                    # A chunk of the fetch stage belongs to several documents and is not traced
+                    with tracer.activate(None if fan_out else traces.get(doc_id)), \
+                            tracer.span(f'{handler.__name__}_stage'):
+                        result = await handler(doc_id, payload)
+                except Exception as e:
+                    for failed_id in (doc_id if fan_out else (doc_id,)):
+                        fail(failed_id, e)
+                    continue
+
+                if fan_out:
+                    for fanned_out_item in result:
+                        await outbox.put(fanned_out_item)
+                elif result is not None:
+                    await outbox.put((doc_id, result))
+
+        await asyncio.gather(*(work() for _ in range(workers)))
+        # Every worker of the next stage needs its own end marker
+        for _ in range(next_workers):
+            await outbox.put(_DONE)
+
+    def _log_progress(self, progress: BatchProgress):
+        self.logger.log(f"Batch progress: {progress.get_completed()}/{progress.total} documents "
+                        f"({progress.processed} processed, {progress.skipped} skipped, {progress.failed} failed), "
+                        f"{progress.get_throughput():.2f} documents/s.")
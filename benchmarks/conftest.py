@@ -0,0 +1,134 @@
+import json
+import random
+
+import pytest
+
+from services.taxonomy_ranker import TaxonomyRanker
+
+_WORDS = ('Rechnung', 'invoice', 'contract', 'Versicherung', 'electricity', 'Bank', 'statement', 'Steuer',
+          'receipt', 'salary', 'Miete', 'doctor', 'pharmacy', 'Telefon', 'internet', 'car', 'repair', 'school',
+          'pension', 'water', 'heating', 'customer', 'number', 'amount', 'total', 'due', 'Datum', 'payment',
+          'account', 'period', 'address', 'reference', 'order', 'delivery', 'service', 'monthly', 'annual',
+          '12.03.2024', 'EUR', '1.234,56', 'IBAN', 'DE89370400440532013000', 'Müller', 'GmbH', 'Straße', '42')
+
+PAGES = 100
+WORDS_PER_PAGE = 400
+TAGS = 5000
+CORRESPONDENTS = 2000
+DOCUMENT_TYPES = 100
+STREAM_CHUNKS = 2000
+# About one token
+CHUNK_CHARACTERS = 4
+
+PROMPT_TEMPLATE = (
+    "Extract the title, date, tags, correspondent and document type from the following document.\n"
+    "Return the result in this exact format:\n"
+    "{{ \"title\": \"[Title]\", \"date\": \"[YYYY-MM-DD]\", \"tags\": [\"Tag1\"], \"correspondent\": \"[Name]\", "
+    "\"document_type\": \"[Type]\" }}\n"
+    "Correspondents: {existing_correspondents}\n"
+    "Document types: {existing_types}\n"
+    "Tags: {existing_tags}\n"
+    "Document:\n{truncated_text}"
+)
+
+
+class NullLogger:
+    def log(self, message):
+        pass
+
+    def log_debug(self, message):
+        pass
+
+    def log_error(self, error_msg, arguments=None):
+        pass
+
+
+class StaticFileLoader:
+    def __init__(self, content):
+        self.content = content
+
+    def load(self, path):
+        return self.content
+
+    def get_mtime(self, path):
+        return 1
+
+
+class StaticTaxonomyService:
+    """
+    Taxonomy service without Paperless. Bumping `version` makes PromptCreator render the list again.
+    """
+    def __init__(self, items):
+        self.items = items
+        self.version = 1
+
+    async def get_all_names(self):
+        return [item['name'] for item in self.items]
+
+    async def get_all_items(self):
+        return self.items
+
+    async def get_version(self):
+        return self.version
+
+
+def _create_items(kind, count):
+    generator = random.Random(kind)
+    return [{'id': index + 1, 'name': f"{' '.join(generator.sample(_WORDS, 2))} {index}",
+             'document_count': generator.randrange(100)} for index in range(count)]
+
+
+@pytest.fixture(scope='session')
+def ocr_text():
+    """
+    100 pages of OCR text separated by form feeds, with the irregular whitespace of OCR output.
+    """
+    generator = random.Random(0)
+    pages = []
+    for _ in range(PAGES):
+        lines = [' '.join(generator.choice(_WORDS) for _ in range(10)) for _ in range(WORDS_PER_PAGE // 10)]
+        pages.append('\n'.join(lines) + '  \n')
+    return '\f'.join(pages)
+
+
+@pytest.fixture
+def taxonomy_services():
+    return (StaticTaxonomyService(_create_items('tags', TAGS)),
+            StaticTaxonomyService(_create_items('correspondents', CORRESPONDENTS)),
+            StaticTaxonomyService(_create_items('document_types', DOCUMENT_TYPES)))
+
+
+@pytest.fixture
+def taxonomy_ranker():
+    return TaxonomyRanker(token_budget=500)
+
+
+@pytest.fixture(scope='session')
+def ollama_stream():
+    """
+    Streamed Ollama answer of 2000 token-sized chunks, chatter before the JSON object which ends in the last chunk.
+    """
+    answer = json.dumps({
+        'title': 'Stromrechnung März 2024 für die Wohnung in der Hauptstraße',
+        'date': '2024-03-12',
+        'tags': [f'tag {index}' for index in range(100)],
+        'correspondent': 'Stadtwerke Müller GmbH',
+        'document_type': 'Invoice',
+    }, ensure_ascii=False)
+    chatter = 'Sure, here is the metadata extracted from the document you provided. '
+    preamble_length = STREAM_CHUNKS * CHUNK_CHARACTERS - len(answer)
+    text = (chatter * (preamble_length // len(chatter) + 1))[:preamble_length] + answer
+    lines = [json.dumps({'model': 'gemma2:2b', 'created_at': '2024-03-12T10:00:00Z',
+                         'response': text[start:start + CHUNK_CHARACTERS], 'done': False})
+             for start in range(0, len(text), CHUNK_CHARACTERS)]
+    return lines, answer
+
+
+@pytest.fixture
+def logger():
+    return NullLogger()
+
+
+@pytest.fixture
+def prompt_file_loader():
+    return StaticFileLoader(PROMPT_TEMPLATE)
@@ -0,0 +1,190 @@
+import asyncio
+import json
+import random
+import threading
+import time
+from collections import Counter
+from dataclasses import dataclass
+
+import uvicorn
+from fastapi import FastAPI, Request, Response
+from fastapi.responses import StreamingResponse
+
+# Paperless caps page_size at this value
+MAX_PAGE_SIZE = 100000
+TAXONOMY_KINDS = ('tags', 'correspondents', 'document_types')
+# Rough average, matches the estimate used for truncation
+CHARACTERS_PER_TOKEN = 4
+
+_WORDS = ('invoice', 'contract', 'insurance', 'electricity', 'bank', 'statement', 'tax', 'receipt', 'salary',
+          'rent', 'doctor', 'pharmacy', 'phone', 'internet', 'car', 'repair', 'school', 'pension', 'water',
+          'heating', 'customer', 'number', 'amount', 'total', 'due', 'date', 'payment', 'account', 'period',
+          'address', 'reference', 'order', 'delivery', 'service', 'monthly', 'annual', 'notice', 'reminder')
+
+
+@dataclass
+class PaperlessConfig:
+    tags: int = 200
+    correspondents: int = 200
+    document_types: int = 30
+    documents: int = 1000
+    # Words of OCR text per document
+    document_words: int = 800
+    # Added to every request, in seconds
+    latency: float = 0.005
+
+
+@dataclass
+class OllamaConfig:
+    tokens_per_second: float = 200.0
+    # Prompt evaluation and model loading, in seconds
+    time_to_first_token: float = 0.2
+    # Tokens per streamed chunk, Ollama streams one token per chunk
+    chunk_tokens: int = 1
+    # Tokens the model generates after the JSON answer, not read by the processor
+    trailing_tokens: int = 30
+
+
+def get_taxonomy_names(kind, count):
+    """
+    Deterministic names, shared by both servers so the generated answers reference existing entries.
+    """
+    generator = random.Random(kind)
+    names = []
+    for index in range(count):
+        words = generator.sample(_WORDS, 2)
+        names.append(f"{words[0].title()} {words[1]} {index}")
+    return names
+
+
+def create_paperless_app(config: PaperlessConfig, requests: Counter):
+    app = FastAPI()
+    taxonomy = {kind: [{'id': index + 1, 'name': name, 'document_count': index % 50}
+                       for index, name in enumerate(get_taxonomy_names(kind, getattr(config, kind)))]
+                for kind in TAXONOMY_KINDS}
+
+    def get_document(doc_id):
+        generator = random.Random(doc_id)
+        return {
+            'id': doc_id,
+            'title': f"Scan {doc_id}",
+            'content': ' '.join(generator.choice(_WORDS) for _ in range(config.document_words)),
+            'created_date': '2024-01-01',
+            'correspondent': None,
+            'document_type': None,
+            'tags': [1],
+        }
+
+    @app.middleware("http")
+    async def count_and_delay(request: Request, call_next):
+        # Counted by method and endpoint, e.g. "GET tags"
+        requests[f"{request.method} {request.url.path.split('/')[2]}"] += 1
+        await asyncio.sleep(config.latency)
+        return await call_next(request)
+
+    @app.get("/api/documents/")
+    async def list_documents(id__in: str = None, page_size: int = 25):
+        if id__in:
+            doc_ids = [int(doc_id) for doc_id in id__in.split(',')]
+            results = [get_document(doc_id) for doc_id in doc_ids if 1 <= doc_id <= config.documents]
+            return {'count': len(results), 'next': None, 'results': results[:page_size]}
+        return {'count': config.documents, 'all': list(range(1, config.documents + 1))}
+
+    @app.get("/api/documents/{doc_id}/")
+    async def read_document(doc_id: int):
+        if not 1 <= doc_id <= config.documents:
+            return Response(status_code=404)
+        return get_document(doc_id)
+
+    @app.patch("/api/documents/{doc_id}/")
+    async def update_document(doc_id: int, request: Request):
+        return {**get_document(doc_id), **await request.json()}
+
+    @app.get("/api/{kind}/")
+    async def list_taxonomy(kind: str, request: Request, page: int = 1, page_size: int = 25,
+                            name__iexact: str = None):
+        items = taxonomy[kind]
+        if name__iexact is not None:
+            items = [item for item in items if item['name'].lower() == name__iexact.lower()]
+        page_size = min(page_size, MAX_PAGE_SIZE)
+        start = (page - 1) * page_size
+        has_next = start + page_size < len(items)
+        next_url = str(request.url.include_query_params(page=page + 1)) if has_next else None
+        return {'count': len(items), 'next': next_url, 'results': items[start:start + page_size]}
+
+    @app.post("/api/{kind}/", status_code=201)
+    async def create_taxonomy(kind: str, request: Request):
+        data = await request.json()
+        if any(item['name'].lower() == data['name'].lower() for item in taxonomy[kind]):
+            return Response(status_code=400)
+        item = {'id': len(taxonomy[kind]) + 1, 'name': data['name'], 'document_count': 0}
+        taxonomy[kind].append(item)
+        return item
+
+    return app
+
+
+def create_ollama_app(config: OllamaConfig, paperless_config: PaperlessConfig, requests: Counter):
+    app = FastAPI()
+    names = {kind: get_taxonomy_names(kind, getattr(paperless_config, kind)) for kind in TAXONOMY_KINDS}
+
+    def get_answer(prompt):
+        generator = random.Random(len(prompt))
+        return json.dumps({
+            'title': f"Invoice {generator.randrange(10000)}",
+            'date': '2024-02-01',
+            'correspondent': generator.choice(names['correspondents']) if names['correspondents'] else None,
+            'document_type': generator.choice(names['document_types']) if names['document_types'] else None,
+            'tags': generator.sample(names['tags'], min(2, len(names['tags']))),
+        })
+
+    def split_into_chunks(text):
+        chunk_size = config.chunk_tokens * CHARACTERS_PER_TOKEN
+        return [text[start:start + chunk_size] for start in range(0, len(text), chunk_size)]
+
+    @app.post("/api/generate")
+    async def generate(request: Request):
+        requests[f"{request.method} generate"] += 1
+        data = await request.json()
+        # A request without a prompt only loads the model
+        if 'prompt' not in data:
+            return {'model': data['model'], 'response': '', 'done': True, 'done_reason': 'load'}
+        chunks = split_into_chunks(get_answer(data['prompt']))
+        chunks += split_into_chunks(' Done.' * config.trailing_tokens)
+
+        async def stream():
+            await asyncio.sleep(config.time_to_first_token)
+            for chunk in chunks:
+                yield json.dumps({'model': data['model'], 'response': chunk, 'done': False}) + '\n'
+                await asyncio.sleep(config.chunk_tokens / config.tokens_per_second)
+            yield json.dumps({'model': data['model'], 'response': '', 'done': True,
+                              'prompt_eval_count': len(data['prompt']) // CHARACTERS_PER_TOKEN,
+                              'eval_count': len(chunks) * config.chunk_tokens}) + '\n'
+
+        return StreamingResponse(stream(), media_type='application/x-ndjson')
+
+    return app
+
+
+class BackgroundServer:
+    def __init__(self, app):
+        """
+        Serves `app` on a free local port from its own thread and event loop, so the servers do not compete
+        with the processor under test for its event loop.
+        """
+        self.server = uvicorn.Server(uvicorn.Config(app, host='127.0.0.1', port=0, log_level='warning',
+                                                    lifespan='off'))
+        self.thread = threading.Thread(target=self.server.run, daemon=True)
+
+    def start(self):
+        self.thread.start()
+        while not self.server.started:
+            if not self.thread.is_alive():
+                raise RuntimeError("Mock server failed to start")
+            time.sleep(0.01)
+        port = self.server.servers[0].sockets[0].getsockname()[1]
+        return f'http://127.0.0.1:{port}'
+
+    def stop(self):
+        self.server.should_exit = True
+        self.thread.join()
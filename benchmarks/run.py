@@ -0,0 +1,226 @@
+#!/usr/bin/env python3
+
+import argparse
+import asyncio
+import json
+import os
+import resource
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from collections import Counter
+from dataclasses import asdict
+
+import httpx
+
+from benchmarks.mock_servers import BackgroundServer, OllamaConfig, PaperlessConfig, create_ollama_app, \
+    create_paperless_app
+
+PROCESSOR_MODE = 'processor'
+ENDPOINT_MODE = 'endpoint'
+REPOSITORY = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Measure the processing throughput against mock Paperless and "
+                                                 "Ollama servers.")
+    parser.add_argument("--documents", type=int, default=50, help="documents processed per scenario")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 16],
+                        help="documents processed at the same time, one scenario each")
+    parser.add_argument("--modes", nargs="+", choices=[PROCESSOR_MODE, ENDPOINT_MODE],
+                        default=[PROCESSOR_MODE, ENDPOINT_MODE],
+                        help="call PaperlessPostProcessor.process_document directly or GET /process/{doc_id}")
+    parser.add_argument("--tags", type=int, default=PaperlessConfig.tags)
+    parser.add_argument("--correspondents", type=int, default=PaperlessConfig.correspondents)
+    parser.add_argument("--document-types", type=int, default=PaperlessConfig.document_types)
+    parser.add_argument("--document-words", type=int, default=PaperlessConfig.document_words)
+    parser.add_argument("--paperless-latency", type=float, default=PaperlessConfig.latency,
+                        help="seconds added to every Paperless request")
+    parser.add_argument("--tokens-per-second", type=float, default=OllamaConfig.tokens_per_second)
+    parser.add_argument("--time-to-first-token", type=float, default=OllamaConfig.time_to_first_token,
+                        help="seconds until Ollama streams the first token")
+    parser.add_argument("--chunk-tokens", type=int, default=OllamaConfig.chunk_tokens,
+                        help="tokens per streamed chunk")
+    parser.add_argument("--trailing-tokens", type=int, default=OllamaConfig.trailing_tokens,
+                        help="tokens generated after the JSON answer")
+    parser.add_argument("--output", default=os.path.join(REPOSITORY, "benchmarks", "results",
+                                                         time.strftime("%Y%m%d-%H%M%S") + ".json"),
+                        help="JSON file the results are written to")
+    parser.add_argument("--compare", metavar="BASELINE", help="results file of an earlier run to compare with")
+    return parser.parse_args()
+
+
+def configure_environment(paperless_url, ollama_url, directory):
+    """
+    Points the application at the mock servers. Other settings are taken from the environment, so
+    e.g. OLLAMA_PROMPT_LAYOUT=stable can be benchmarked against the default.
+    """
+    os.environ['PAPERLESS_API_URL'] = f'{paperless_url}/api'
+    os.environ['OLLAMA_API_URL'] = f'{ollama_url}/api/generate'
+    os.environ.setdefault('PAPERLESS_API_TOKEN', 'benchmark')
+    os.environ.setdefault('LOG_FILE', os.path.join(directory, 'log'))
+    os.environ.setdefault('OLLAMA_PROMPT_FILE', os.path.join(REPOSITORY, 'data', 'prompt'))
+    os.environ.setdefault('OLLAMA_SHORT_PROMPT_FILE', os.path.join(REPOSITORY, 'data', 'prompt'))
+    # Otherwise the scheduler would serialize every generation and all concurrencies measure the same
+    os.environ.setdefault('OLLAMA_MAX_CONCURRENCY', '16')
+
+
+def get_percentile(sorted_values, percentile):
+    if len(sorted_values) == 1:
+        return sorted_values[0]
+    return statistics.quantiles(sorted_values, n=100, method='inclusive')[percentile - 1]
+
+
+def get_peak_rss_mb():
+    # Includes the mock servers running in the same process, kilobytes on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+async def run_scenario(main, mode, concurrency, doc_ids, paperless_requests, ollama_requests):
+    # Every scenario starts with empty caches, so the taxonomy fetches are part of each measurement
+    main.tag_service.cache.invalidate()
+    main.correspondent_service.cache.invalidate()
+    main.document_type_service.cache.invalidate()
+    paperless_requests.clear()
+    ollama_requests.clear()
+
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+    errors = 0
+
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=main.app), base_url='http://benchmark',
+                                 timeout=None) as client:
+        async def process(doc_id):
+            nonlocal errors
+            async with semaphore:
+                started_at = time.perf_counter()
+                try:
+                    if mode == PROCESSOR_MODE:
+                        await main.processor.process_document(doc_id)
+                    else:
+                        response = await client.get(f'/process/{doc_id}', params={'wait': 'true'})
+                        response.raise_for_status()
+                except Exception:
+                    errors += 1
+                latencies.append(time.perf_counter() - started_at)
+
+        started_at = time.perf_counter()
+        await asyncio.gather(*(process(doc_id) for doc_id in doc_ids))
+        duration = time.perf_counter() - started_at
+
+    latencies.sort()
+    return {
+        'mode': mode,
+        'concurrency': concurrency,
+        'documents': len(doc_ids),
+        'errors': errors,
+        'duration_seconds': duration,
+        'documents_per_second': len(doc_ids) / duration,
+        'latency_seconds': {
+            'p50': get_percentile(latencies, 50),
+            'p95': get_percentile(latencies, 95),
+            'p99': get_percentile(latencies, 99),
+        },
+        'paperless_requests_per_document': sum(paperless_requests.values()) / len(doc_ids),
+        'paperless_requests': dict(paperless_requests),
+        'ollama_requests_per_document': sum(ollama_requests.values()) / len(doc_ids),
+        'peak_rss_mb': get_peak_rss_mb(),
+    }
+
+
+async def run_scenarios(main, args, paperless_requests, ollama_requests):
+    try:
+        scenarios = []
+        for mode in args.modes:
+            for concurrency in args.concurrency:
+                result = await run_scenario(main, mode, concurrency, range(1, args.documents + 1),
+                                            paperless_requests, ollama_requests)
+                print_result(result)
+                scenarios.append(result)
+        return scenarios
+    finally:
+        await main.paperless_client.aclose()
+        await main.ollama_client.aclose()
+        main.tracer.close()
+        main.logger.close()
+
+
+def print_result(result):
+    latency = result['latency_seconds']
+    print(f"{result['mode']:>9} x{result['concurrency']:<3} {result['documents_per_second']:8.2f} docs/s  "
+          f"p50 {latency['p50']:.3f}s  p95 {latency['p95']:.3f}s  p99 {latency['p99']:.3f}s  "
+          f"{result['paperless_requests_per_document']:.2f} Paperless requests/doc  "
+          f"{result['errors']} errors  {result['peak_rss_mb']:.0f} MB peak RSS")
+
+
+def compare(baseline_file, scenarios):
+    with open(baseline_file, encoding='utf-8') as file:
+        baseline = {(scenario['mode'], scenario['concurrency']): scenario for scenario in json.load(file)['scenarios']}
+
+    print(f"Compared with {baseline_file}:")
+    for scenario in scenarios:
+        before = baseline.get((scenario['mode'], scenario['concurrency']))
+        if before is None:
+            continue
+        throughput_change = scenario['documents_per_second'] / before['documents_per_second'] - 1
+        p95_change = scenario['latency_seconds']['p95'] / before['latency_seconds']['p95'] - 1
+        requests_change = scenario['paperless_requests_per_document'] - before['paperless_requests_per_document']
+        print(f"{scenario['mode']:>9} x{scenario['concurrency']:<3} throughput {throughput_change:+.1%}  "
+              f"p95 {p95_change:+.1%}  Paperless requests/doc {requests_change:+.2f}")
+
+
+def get_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=REPOSITORY, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    args = parse_args()
+    paperless_config = PaperlessConfig(tags=args.tags, correspondents=args.correspondents,
+                                       document_types=args.document_types, documents=args.documents,
+                                       document_words=args.document_words, latency=args.paperless_latency)
+    ollama_config = OllamaConfig(tokens_per_second=args.tokens_per_second,
+                                 time_to_first_token=args.time_to_first_token, chunk_tokens=args.chunk_tokens,
+                                 trailing_tokens=args.trailing_tokens)
+
+    paperless_requests, ollama_requests = Counter(), Counter()
+    paperless_server = BackgroundServer(create_paperless_app(paperless_config, paperless_requests))
+    ollama_server = BackgroundServer(create_ollama_app(ollama_config, paperless_config, ollama_requests))
+
+    with tempfile.TemporaryDirectory() as directory:
+        try:
+            configure_environment(paperless_server.start(), ollama_server.start(), directory)
+            # The application reads its configuration on import
+            import main as application
+            scenarios = asyncio.run(run_scenarios(application, args, paperless_requests, ollama_requests))
+        finally:
+            paperless_server.stop()
+            ollama_server.stop()
+
+    results = {
+        'created_at': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+        'commit': get_commit(),
+        'python': sys.version.split()[0],
+        'environment': {var: os.environ[var] for var in sorted(os.environ)
+                        if var.startswith(('OLLAMA_', 'PAPERLESS_', 'TAXONOMY_', 'HTTP_', 'RESULT_', 'DUPLICATE_'))
+                        and var != 'PAPERLESS_API_TOKEN'},
+        'paperless': asdict(paperless_config),
+        'ollama': asdict(ollama_config),
+        'scenarios': scenarios,
+    }
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+    with open(args.output, 'w', encoding='utf-8') as file:
+        json.dump(results, file, indent=2)
+    print(f"Results written to {args.output}")
+
+    if args.compare:
+        compare(args.compare, scenarios)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+import asyncio
+
+import pytest
+
+from services.prompt_creator import PromptCreator, STABLE_LAYOUT
+from services.text_truncator import TextTruncator, HEAD_TAIL_STRATEGY, TOKEN_UNIT
+
+
+@pytest.fixture
+def event_loop():
+    loop = asyncio.new_event_loop()
+    yield loop
+    loop.close()
+
+
+def _create_prompt_creator(logger, prompt_file_loader, taxonomy_services, text_truncator=None, **kwargs):
+    tag_service, correspondent_service, document_type_service = taxonomy_services
+    return PromptCreator(logger, 'prompt', text_truncator or TextTruncator(500), prompt_file_loader, tag_service,
+                         correspondent_service, document_type_service, **kwargs)
+
+
+@pytest.mark.parametrize('truncator', [TextTruncator(500), TextTruncator(2000, TOKEN_UNIT, HEAD_TAIL_STRATEGY)],
+                         ids=['head_words', 'head_tail_tokens'])
+def test_truncate(benchmark, ocr_text, truncator):
+    truncated_text = benchmark(truncator.truncate, ocr_text)
+
+    assert truncated_text
+
+
+def test_create_prompt_cached_taxonomy(benchmark, event_loop, logger, prompt_file_loader, taxonomy_services,
+                                       ocr_text):
+    # Steady state: the rendered taxonomy is reused, only the document text changes
+    prompt_creator = _create_prompt_creator(logger, prompt_file_loader, taxonomy_services)
+    event_loop.run_until_complete(prompt_creator.create_prompt(ocr_text))
+
+    prompt = benchmark(lambda: event_loop.run_until_complete(prompt_creator.create_prompt(ocr_text)))
+
+    assert 'Tags: ' in prompt
+
+
+@pytest.mark.parametrize('layout', ['template', STABLE_LAYOUT])
+def test_create_prompt_rendering_taxonomy(benchmark, event_loop, logger, prompt_file_loader, taxonomy_services,
+                                          ocr_text, layout):
+    # Every call sees a changed tag list, as after creating a tag, and renders all 5000 tags again
+    prompt_creator = _create_prompt_creator(logger, prompt_file_loader, taxonomy_services, layout=layout)
+    tag_service = taxonomy_services[0]
+
+    def create_prompt():
+        tag_service.version += 1
+        return event_loop.run_until_complete(prompt_creator.create_prompt(ocr_text))
+
+    prompt = benchmark(create_prompt)
+
+    assert 'Tags: ' in prompt
+
+
+def test_create_prompt_ranked_taxonomy(benchmark, event_loop, logger, prompt_file_loader, taxonomy_services,
+                                       taxonomy_ranker, ocr_text):
+    # With a taxonomy budget the entries are ranked against every document
+    prompt_creator = _create_prompt_creator(logger, prompt_file_loader, taxonomy_services,
+                                            taxonomy_ranker=taxonomy_ranker)
+    event_loop.run_until_complete(prompt_creator.create_prompt(ocr_text))
+
+    prompt = benchmark(lambda: event_loop.run_until_complete(prompt_creator.create_prompt(ocr_text)))
+
+    assert 'Tags: ' in prompt
@@ -0,0 +1,70 @@
+import asyncio
+import json
+
+import pytest
+
+from services.response_processor import JsonObjectScanner, ResponseProcessor
+from services.taxonomy_matcher import TaxonomyMatcher
+
+
+class StreamedResponse:
+    def __init__(self, lines):
+        self.lines = lines
+
+    async def aiter_lines(self):
+        for line in self.lines:
+            yield line
+
+
+@pytest.fixture
+def event_loop():
+    loop = asyncio.new_event_loop()
+    yield loop
+    loop.close()
+
+
+def test_process_stream(benchmark, event_loop, logger, ollama_stream):
+    lines, answer = ollama_stream
+    response_processor = ResponseProcessor(logger)
+
+    result = benchmark(lambda: event_loop.run_until_complete(response_processor.process(StreamedResponse(lines))))
+
+    assert result == answer
+
+
+def test_scan_stream(benchmark, ollama_stream):
+    lines, _ = ollama_stream
+    parts = [json.loads(line)['response'] for line in lines]
+
+    def scan():
+        scanner = JsonObjectScanner()
+        return any(scanner.feed(part) for part in parts)
+
+    assert benchmark(scan)
+
+
+def test_get_json_bare_object(benchmark, logger, ollama_stream):
+    _, answer = ollama_stream
+
+    result = benchmark(ResponseProcessor(logger).get_json, answer)
+
+    assert result['document_type'] == 'Invoice'
+
+
+def test_get_json_markdown(benchmark, logger, ollama_stream):
+    # Answers wrapped in markdown fall back to the regex cleanup
+    _, answer = ollama_stream
+
+    result = benchmark(ResponseProcessor(logger).get_json, f"Here you go:\n```json\n{answer}\n```\nAnything else?")
+
+    assert result['document_type'] == 'Invoice'
+
+
+def test_match_tag_name(benchmark, taxonomy_services):
+    # Fuzzy lookup of an extracted tag among 5000 existing ones
+    matcher = TaxonomyMatcher(0.85)
+    for item in taxonomy_services[0].items:
+        matcher.add(item)
+    name = taxonomy_services[0].items[4242]['name'].upper().replace(' ', '  ') + 'x'
+
+    assert benchmark(matcher.find, name) == 4243
@@ -36,6 +36,23 @@ Here is the document text:
 EOF
 fi
 
+# Check if the short prompt file for near-duplicate documents exists, if not create it with initial content
+if [ ! -f "/data/short_prompt" ]; then
+  echo "Creating /data/short_prompt file with initial content..."
+  cat <<EOF > /data/short_prompt
+Extract the title and date from the following document. The document may be in German, English, or Romanian, and may contain some noise due to OCR. Only extract information if you are certain about it.
+
+Return only the values in the specified format without providing any explanations, comments, or additional information. If any information is not clearly identifiable, leave the corresponding fields empty.
+
+Return the result in this exact format:
+
+{{ "title": "[Title]", "date": "[YYYY-MM-DD]" }}
+
+Here is the document text:
+"{truncated_text}"
+EOF
+fi
+
 if [ ! -f "/data/post_consumption_hook.py" ]; then
   echo "Copying post-consumption hook script to /data directory..."
   cp /app/post_consumption_hook.py /data/post_consumption_hook.py
@@ -1,3 +1,6 @@
+import os
+
+
 class FileLoader:
     def load(self, file_path):
         try:
@@ -7,3 +10,9 @@ class FileLoader:
             raise FileNotFoundError(f"Prompt file not found at path: {file_path}")
         except Exception as e:
             raise IOError(f"Error reading prompt file: {e}")
+
+    def get_mtime(self, file_path):
+        try:
+            return os.stat(file_path).st_mtime_ns
+        except FileNotFoundError:
+            raise FileNotFoundError(f"Prompt file not found at path: {file_path}")
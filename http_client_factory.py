@@ -0,0 +1,35 @@
+import httpx
+
+from tracing import tracer
+
+
+class TracingTransport(httpx.AsyncBaseTransport):
+    """
+    Records every request as a span of the current trace.
+    """
+    def __init__(self, transport: httpx.AsyncBaseTransport):
+        self.transport = transport
+
+    async def handle_async_request(self, request):
+        with tracer.span(f"{request.method} {request.url.path}",
+                         {"http.method": request.method, "http.url": str(request.url)}) as span:
+            response = await self.transport.handle_async_request(request)
+            if span:
+                span.attributes["http.status_code"] = response.status_code
+            return response
+
+    async def aclose(self):
+        await self.transport.aclose()
+
+
+class HttpClientFactory:
+    def create(self, pool_size, timeout):
+        """
+        Create a keep-alive client whose connection pool is shared by every request made through it.
+        A timeout of 0 disables the read timeout, which is needed for long Ollama generations.
+        """
+        limits = httpx.Limits(max_connections=pool_size, max_keepalive_connections=pool_size)
+        read_timeout = timeout or None
+        # For streamed responses the request span ends once the headers have been received
+        transport = TracingTransport(httpx.AsyncHTTPTransport(limits=limits))
+        return httpx.AsyncClient(transport=transport, timeout=httpx.Timeout(read_timeout, connect=10.0))
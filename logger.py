@@ -1,22 +1,107 @@
-import traceback
-from venv import logger
+import logging
+import os
+import queue
+import sys
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler, TimedRotatingFileHandler
+
+
+class _BatchedFlushMixin:
+    """
+    Leaves the records in the stream's buffer, the listener flushes once its queue has been drained.
+    """
+    def flush(self):
+        pass
+
+    def flush_batch(self):
+        super().flush()
+
+
+class _BatchedRotatingFileHandler(_BatchedFlushMixin, RotatingFileHandler):
+    """
+    Counts the bytes written itself: RotatingFileHandler asks the stream for its position on every record,
+    which flushes the buffer and would defeat the batching.
+    """
+    def __init__(self, filename, **kwargs):
+        super().__init__(filename, **kwargs)
+        self.size = os.path.getsize(self.baseFilename) if os.path.exists(self.baseFilename) else 0
+        self.record_size = 0
+
+    def shouldRollover(self, record):
+        if self.maxBytes <= 0:
+            self.record_size = 0
+            return False
+        self.record_size = len((self.format(record) + self.terminator).encode(self.encoding or 'utf-8'))
+        # Like RotatingFileHandler, a record larger than maxBytes is still written to an empty file
+        return self.size > 0 and self.size + self.record_size >= self.maxBytes
+
+    def doRollover(self):
+        super().doRollover()
+        self.size = 0
+
+    def emit(self, record):
+        super().emit(record)
+        self.size += self.record_size
+
+
+class _BatchedTimedRotatingFileHandler(_BatchedFlushMixin, TimedRotatingFileHandler):
+    pass
+
+
+class _BatchingQueueListener(QueueListener):
+    def handle(self, record):
+        super().handle(record)
+        if self.queue.empty():
+            for handler in self.handlers:
+                handler.flush_batch()
 
 
 class Logger:
-    def __init__(self, file):
+    def __init__(self, file, level="INFO", max_bytes=10 * 1024 * 1024, backup_count=5, rotate_when=None):
+        """
+        Writes to `file` from a background thread, so logging never blocks on file I/O. The file is rotated
+        when it reaches `max_bytes`, or at the `rotate_when` interval of TimedRotatingFileHandler if it is set.
+        """
         self.file = file
 
+        if rotate_when:
+            file_handler = _BatchedTimedRotatingFileHandler(file, when=rotate_when, backupCount=backup_count,
+                                                            encoding="utf-8")
+        else:
+            file_handler = _BatchedRotatingFileHandler(file, maxBytes=max_bytes, backupCount=backup_count,
+                                                       encoding="utf-8")
+        file_handler.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(message)s"))
+
+        console_handler = logging.StreamHandler(sys.stderr)
+        console_handler.setLevel(logging.ERROR)
+        console_handler.flush_batch = console_handler.flush
+
+        self.queue = queue.SimpleQueue()
+        self.listener = _BatchingQueueListener(self.queue, file_handler, console_handler, respect_handler_level=True)
+        self.listener.start()
+
+        # Not registered with the logging module, so other libraries' configuration does not affect it
+        self.logger = logging.Logger(__name__, level)
+        self.logger.addHandler(QueueHandler(self.queue))
+
     def log(self, message):
-        logger.info(message)
+        self.logger.info(message)
 
-        with open(self.file, "a") as file:
-            file.write(message + "\n")
+    def log_debug(self, message):
+        self.logger.debug(message)
 
     def log_error(self, error_msg, arguments=None):
-        logger.error(error_msg)
+        if arguments:
+            error_msg = f"{error_msg}\nArguments: {arguments}"
+        # The traceback is added when called while handling an exception
+        self.logger.error(error_msg, exc_info=sys.exc_info()[0] is not None)
 
-        with open(self.file, "a") as file:
-            file.write(f"Error: {error_msg}\n")
-            if arguments:
-                file.write(f"Arguments: {arguments}\n")
-            file.write(traceback.format_exc() + "\n")
+    def close(self):
+        """
+        Write the queued records and stop the background thread.
+        """
+        if self.listener is None:
+            return
+        self.listener.stop()
+        for handler in self.listener.handlers:
+            handler.close()
+        self.listener = None
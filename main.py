@@ -1,20 +1,46 @@
+import asyncio
+import math
 import os
+import re
 import sys
+import uuid
+from contextlib import asynccontextmanager
+from dataclasses import asdict
 
-from fastapi import HTTPException, FastAPI
+from fastapi import HTTPException, FastAPI, Response
+from prometheus_client import CONTENT_TYPE_LATEST, generate_latest
 
+from batch_processor import BatchProcessor
 from file_loader import FileLoader
+from http_client_factory import HttpClientFactory
 from logger import Logger
+from models.batch_progress import BatchProgress
+from models.batch_selection import BatchSelection
+from models.processing_options import ProcessingOptions
 from paperless_post_processor import PaperlessPostProcessor
 from services.correspondent_service import CorrespondentService
 from services.document_service import DocumentService
 from services.document_type_service import DocumentTypeService
+from services.duplicate_detector import DuplicateDetector
+from services.job_queue import JobQueue
+from services.job_store import JobStore, SqliteJobStore
+from services.model_warmer import ModelWarmer
+from services.ollama_balancer import OllamaBalancer, parse_endpoints
+from services.ollama_scheduler import OllamaScheduler
 from services.ollama_service import OllamaService
+from services.paginator import Paginator
 from services.paperless_service import PaperlessService
 from services.prompt_creator import PromptCreator
 from services.response_processor import ResponseProcessor
+from services.result_cache import SqliteResultCache
+from services.similarity_index import SimilarityIndex
 from services.tag_service import TagService
+from services.taxonomy_ranker import TaxonomyRanker
+from services.text_truncator import TextTruncator
+from tracing import JsonLinesSpanExporter, OtlpHttpSpanExporter, tracer
 
+# Seconds, or a Go duration such as "30m" or "1h30m"
+KEEP_ALIVE_PATTERN = r'-?\d+|-?(\d+(\.\d+)?(ns|us|µs|ms|s|m|h))+'
 
 def validate_env_vars():
     # Required environment variables (no default, must be set)
@@ -26,11 +52,43 @@ def validate_env_vars():
     optional_env_vars_with_defaults = {
         'APP_PORT': '5000',
         'LOG_FILE': '/data/log',
+        'LOG_LEVEL': 'INFO',
+        'LOG_MAX_BYTES': '10485760',
+        'LOG_BACKUP_COUNT': '5',
         'OLLAMA_PROMPT_FILE': '/data/prompt',
+        'OLLAMA_SHORT_PROMPT_FILE': '/data/short_prompt',
         'OLLAMA_MODEL_NAME': 'gemma2:2b',
         'OLLAMA_API_URL': 'http://ollama:11434/api/generate',
         'OLLAMA_TRUNCATE_NUMBER': '500',
-        'PAPERLESS_API_URL': 'http://paperless-ngx:8000/api'
+        'OLLAMA_TRUNCATE_UNIT': 'words',
+        'OLLAMA_TRUNCATE_STRATEGY': 'head',
+        'OLLAMA_TRUNCATE_PAGES': '1',
+        'OLLAMA_TIMEOUT': '600',
+        'OLLAMA_MAX_CONCURRENCY': '1',
+        'OLLAMA_BALANCING': 'least_outstanding',
+        'OLLAMA_HEALTH_CHECK_INTERVAL': '30',
+        'OLLAMA_PROMPT_LAYOUT': 'template',
+        'OLLAMA_TAXONOMY_TOKEN_BUDGET': '0',
+        'OLLAMA_TAXONOMY_TOP_K': '0',
+        'OLLAMA_KEEP_ALIVE': '30m',
+        'OLLAMA_WARMUP': 'true',
+        'OLLAMA_WARMUP_INTERVAL': '0',
+        'OLLAMA_NUM_CTX': '0',
+        'OLLAMA_STRUCTURED_OUTPUT': 'false',
+        'OLLAMA_NUM_PREDICT': '0',
+        'PAPERLESS_API_URL': 'http://paperless-ngx:8000/api',
+        'PAPERLESS_TIMEOUT': '30',
+        'PAPERLESS_PAGE_SIZE': '1000',
+        'PAPERLESS_PAGE_CONCURRENCY': '4',
+        'HTTP_POOL_SIZE': '20',
+        'TAXONOMY_CACHE_TTL': '300',
+        'TAXONOMY_MATCH_THRESHOLD': '1',
+        'JOB_WORKERS': '2',
+        'JOB_RETENTION': '10000',
+        'BATCH_RETENTION': '100',
+        'RESULT_CACHE_MAX_ENTRIES': '10000',
+        'DUPLICATE_DETECTION': 'false',
+        'DUPLICATE_MAX_DISTANCE': '3'
     }
 
     # Check if required variables are set
@@ -49,10 +107,90 @@ def validate_env_vars():
     if not app_port.isdigit() or not (0 <= int(app_port) <= 65535):
         raise RuntimeError("APP_PORT must be a valid integer between 0 and 65535.")
 
+    if os.getenv('LOG_LEVEL') not in ('DEBUG', 'INFO', 'WARNING', 'ERROR'):
+        raise RuntimeError("LOG_LEVEL must be one of 'DEBUG', 'INFO', 'WARNING' or 'ERROR'.")
+
+    for var in ['LOG_MAX_BYTES', 'LOG_BACKUP_COUNT']:
+        if not os.getenv(var).isdigit():
+            raise RuntimeError(f"{var} must be a non-negative integer.")
+
     truncate_number = os.getenv('OLLAMA_TRUNCATE_NUMBER')
     if not truncate_number.isdigit() or int(truncate_number) <= 0:
         raise RuntimeError("OLLAMA_TRUNCATE_NUMBER must be a positive integer.")
 
+    if os.getenv('OLLAMA_TRUNCATE_UNIT') not in ('words', 'tokens'):
+        raise RuntimeError("OLLAMA_TRUNCATE_UNIT must be either 'words' or 'tokens'.")
+
+    if os.getenv('OLLAMA_TRUNCATE_STRATEGY') not in ('head', 'head_tail', 'pages'):
+        raise RuntimeError("OLLAMA_TRUNCATE_STRATEGY must be one of 'head', 'head_tail' or 'pages'.")
+
+    for var in ['OLLAMA_TIMEOUT', 'PAPERLESS_TIMEOUT']:
+        if not os.getenv(var).isdigit():
+            raise RuntimeError(f"{var} must be a non-negative integer (seconds, 0 disables the timeout).")
+
+    if os.getenv('OLLAMA_API_URLS'):
+        try:
+            parse_endpoints(os.getenv('OLLAMA_API_URLS'), 1)
+        except ValueError as e:
+            raise RuntimeError(f"OLLAMA_API_URLS is invalid: {e}.")
+
+    if os.getenv('OLLAMA_BALANCING') not in ('least_outstanding', 'weighted'):
+        raise RuntimeError("OLLAMA_BALANCING must be either 'least_outstanding' or 'weighted'.")
+
+    if not os.getenv('OLLAMA_HEALTH_CHECK_INTERVAL').isdigit():
+        raise RuntimeError("OLLAMA_HEALTH_CHECK_INTERVAL must be a non-negative integer (seconds, 0 disables the "
+                           "health checks).")
+
+    if os.getenv('OLLAMA_PROMPT_LAYOUT') not in ('template', 'stable'):
+        raise RuntimeError("OLLAMA_PROMPT_LAYOUT must be either 'template' or 'stable'.")
+
+    for var in ['OLLAMA_TAXONOMY_TOKEN_BUDGET', 'OLLAMA_TAXONOMY_TOP_K']:
+        if not os.getenv(var).isdigit():
+            raise RuntimeError(f"{var} must be a non-negative integer (0 disables the limit).")
+
+    if not re.fullmatch(KEEP_ALIVE_PATTERN, os.getenv('OLLAMA_KEEP_ALIVE')):
+        raise RuntimeError("OLLAMA_KEEP_ALIVE must be a number of seconds (negative keeps the model loaded forever) "
+                           "or a duration such as '30m' or '24h'.")
+
+    if os.getenv('OLLAMA_WARMUP') not in ('true', 'false'):
+        raise RuntimeError("OLLAMA_WARMUP must be either 'true' or 'false'.")
+
+    if not os.getenv('OLLAMA_WARMUP_INTERVAL').isdigit():
+        raise RuntimeError("OLLAMA_WARMUP_INTERVAL must be a non-negative integer (seconds, 0 only loads the model "
+                           "at startup).")
+
+    if not os.getenv('OLLAMA_NUM_CTX').isdigit():
+        raise RuntimeError("OLLAMA_NUM_CTX must be a non-negative integer (0 uses the model default).")
+
+    if os.getenv('OLLAMA_STRUCTURED_OUTPUT') not in ('true', 'false'):
+        raise RuntimeError("OLLAMA_STRUCTURED_OUTPUT must be either 'true' or 'false'.")
+
+    if not os.getenv('OLLAMA_NUM_PREDICT').isdigit():
+        raise RuntimeError("OLLAMA_NUM_PREDICT must be a non-negative integer (0 does not limit the answer).")
+
+    if not os.getenv('TAXONOMY_CACHE_TTL').isdigit():
+        raise RuntimeError("TAXONOMY_CACHE_TTL must be a non-negative integer (seconds, 0 disables the cache).")
+
+    try:
+        match_threshold = float(os.getenv('TAXONOMY_MATCH_THRESHOLD'))
+    except ValueError:
+        match_threshold = -1
+    if not 0 < match_threshold <= 1:
+        raise RuntimeError("TAXONOMY_MATCH_THRESHOLD must be a number greater than 0 and at most 1.")
+
+    if os.getenv('DUPLICATE_DETECTION') not in ('true', 'false'):
+        raise RuntimeError("DUPLICATE_DETECTION must be either 'true' or 'false'.")
+
+    max_distance = os.getenv('DUPLICATE_MAX_DISTANCE')
+    if not max_distance.isdigit() or int(max_distance) > 15:
+        raise RuntimeError("DUPLICATE_MAX_DISTANCE must be an integer between 0 and 15.")
+
+    for var in ['HTTP_POOL_SIZE', 'PAPERLESS_PAGE_SIZE', 'PAPERLESS_PAGE_CONCURRENCY', 'JOB_WORKERS', 'JOB_RETENTION',
+                'BATCH_RETENTION', 'OLLAMA_MAX_CONCURRENCY', 'RESULT_CACHE_MAX_ENTRIES', 'OLLAMA_TRUNCATE_PAGES']:
+        value = os.getenv(var)
+        if not value.isdigit() or int(value) <= 0:
+            raise RuntimeError(f"{var} must be a positive integer.")
+
 
 # Run validation on startup
 validate_env_vars()
@@ -60,14 +198,174 @@ validate_env_vars()
 # Retrieve environment variables after validation
 APP_PORT = int(os.getenv('APP_PORT'))
 LOG_FILE = os.getenv('LOG_FILE')
+LOG_LEVEL = os.getenv('LOG_LEVEL')
+LOG_MAX_BYTES = int(os.getenv('LOG_MAX_BYTES'))
+LOG_BACKUP_COUNT = int(os.getenv('LOG_BACKUP_COUNT'))
+# Optional, e.g. 'midnight' rotates the log daily instead of by size
+LOG_ROTATE_WHEN = os.getenv('LOG_ROTATE_WHEN')
+# Optional, documents are only traced when a trace file or collector is configured
+TRACE_FILE = os.getenv('TRACE_FILE')
+TRACE_OTLP_URL = os.getenv('TRACE_OTLP_URL')
 OLLAMA_PROMPT_FILE = os.getenv('OLLAMA_PROMPT_FILE')
+OLLAMA_SHORT_PROMPT_FILE = os.getenv('OLLAMA_SHORT_PROMPT_FILE')
 OLLAMA_MODEL_NAME = os.getenv('OLLAMA_MODEL_NAME')
 OLLAMA_API_URL = os.getenv('OLLAMA_API_URL')
+# Optional, spreads the generations across several Ollama hosts instead of OLLAMA_API_URL
+OLLAMA_API_URLS = os.getenv('OLLAMA_API_URLS')
+OLLAMA_BALANCING = os.getenv('OLLAMA_BALANCING')
+OLLAMA_HEALTH_CHECK_INTERVAL = int(os.getenv('OLLAMA_HEALTH_CHECK_INTERVAL'))
 OLLAMA_TRUNCATE_NUMBER = int(os.getenv('OLLAMA_TRUNCATE_NUMBER'))
+OLLAMA_TRUNCATE_UNIT = os.getenv('OLLAMA_TRUNCATE_UNIT')
+OLLAMA_TRUNCATE_STRATEGY = os.getenv('OLLAMA_TRUNCATE_STRATEGY')
+OLLAMA_TRUNCATE_PAGES = int(os.getenv('OLLAMA_TRUNCATE_PAGES'))
+OLLAMA_TIMEOUT = int(os.getenv('OLLAMA_TIMEOUT'))
+OLLAMA_MAX_CONCURRENCY = int(os.getenv('OLLAMA_MAX_CONCURRENCY'))
+OLLAMA_PROMPT_LAYOUT = os.getenv('OLLAMA_PROMPT_LAYOUT')
+OLLAMA_TAXONOMY_TOKEN_BUDGET = int(os.getenv('OLLAMA_TAXONOMY_TOKEN_BUDGET'))
+OLLAMA_TAXONOMY_TOP_K = int(os.getenv('OLLAMA_TAXONOMY_TOP_K'))
+# Ollama parses a string with Go's time.ParseDuration, which rejects bare numbers, so those are sent as seconds
+OLLAMA_KEEP_ALIVE = os.getenv('OLLAMA_KEEP_ALIVE')
+if re.fullmatch(r'-?\d+', OLLAMA_KEEP_ALIVE):
+    OLLAMA_KEEP_ALIVE = int(OLLAMA_KEEP_ALIVE)
+OLLAMA_WARMUP = os.getenv('OLLAMA_WARMUP') == 'true'
+OLLAMA_WARMUP_INTERVAL = int(os.getenv('OLLAMA_WARMUP_INTERVAL'))
+OLLAMA_NUM_CTX = int(os.getenv('OLLAMA_NUM_CTX'))
+OLLAMA_STRUCTURED_OUTPUT = os.getenv('OLLAMA_STRUCTURED_OUTPUT') == 'true'
+OLLAMA_NUM_PREDICT = int(os.getenv('OLLAMA_NUM_PREDICT'))
 PAPERLESS_API_URL = os.getenv('PAPERLESS_API_URL')
 PAPERLESS_API_TOKEN = os.getenv('PAPERLESS_API_TOKEN')
+PAPERLESS_TIMEOUT = int(os.getenv('PAPERLESS_TIMEOUT'))
+PAPERLESS_PAGE_SIZE = int(os.getenv('PAPERLESS_PAGE_SIZE'))
+PAPERLESS_PAGE_CONCURRENCY = int(os.getenv('PAPERLESS_PAGE_CONCURRENCY'))
+HTTP_POOL_SIZE = int(os.getenv('HTTP_POOL_SIZE'))
+TAXONOMY_CACHE_TTL = int(os.getenv('TAXONOMY_CACHE_TTL'))
+TAXONOMY_MATCH_THRESHOLD = float(os.getenv('TAXONOMY_MATCH_THRESHOLD'))
+JOB_WORKERS = int(os.getenv('JOB_WORKERS'))
+JOB_RETENTION = int(os.getenv('JOB_RETENTION'))
+BATCH_RETENTION = int(os.getenv('BATCH_RETENTION'))
+# Optional, jobs are only kept in memory when no database file is configured
+JOB_DB_FILE = os.getenv('JOB_DB_FILE')
+# Optional, generated metadata is only cached when a database file is configured
+RESULT_CACHE_FILE = os.getenv('RESULT_CACHE_FILE')
+RESULT_CACHE_MAX_ENTRIES = int(os.getenv('RESULT_CACHE_MAX_ENTRIES'))
+DUPLICATE_DETECTION = os.getenv('DUPLICATE_DETECTION') == 'true'
+DUPLICATE_MAX_DISTANCE = int(os.getenv('DUPLICATE_MAX_DISTANCE'))
+# Optional, the fingerprints of processed documents are only kept in memory when no database file is configured
+DUPLICATE_INDEX_FILE = os.getenv('DUPLICATE_INDEX_FILE')
+
+# Services are created once and share one pooled HTTP client per upstream for the application lifetime
+logger = Logger(LOG_FILE, LOG_LEVEL, LOG_MAX_BYTES, LOG_BACKUP_COUNT, LOG_ROTATE_WHEN)
+file_loader = FileLoader()
+
+span_exporters = []
+if TRACE_FILE:
+    span_exporters.append(JsonLinesSpanExporter(logger, TRACE_FILE))
+if TRACE_OTLP_URL:
+    span_exporters.append(OtlpHttpSpanExporter(logger, TRACE_OTLP_URL))
+tracer.configure(span_exporters)
+
+http_client_factory = HttpClientFactory()
+paperless_client = http_client_factory.create(HTTP_POOL_SIZE, PAPERLESS_TIMEOUT)
+ollama_client = http_client_factory.create(HTTP_POOL_SIZE, OLLAMA_TIMEOUT)
+
+paginator = Paginator(paperless_client, PAPERLESS_PAGE_SIZE, PAPERLESS_PAGE_CONCURRENCY)
+
+tag_service = TagService(logger, paperless_client, paginator, PAPERLESS_API_URL, PAPERLESS_API_TOKEN,
+                         TAXONOMY_CACHE_TTL, TAXONOMY_MATCH_THRESHOLD)
+correspondent_service = CorrespondentService(logger, paperless_client, paginator, PAPERLESS_API_URL,
+                                             PAPERLESS_API_TOKEN, TAXONOMY_CACHE_TTL, TAXONOMY_MATCH_THRESHOLD)
+document_type_service = DocumentTypeService(logger, paperless_client, paginator, PAPERLESS_API_URL,
+                                            PAPERLESS_API_TOKEN, TAXONOMY_CACHE_TTL, TAXONOMY_MATCH_THRESHOLD)
+
+# Only the relevant taxonomy entries are put into the prompt when a budget or limit is set
+taxonomy_ranker = None
+if OLLAMA_TAXONOMY_TOKEN_BUDGET or OLLAMA_TAXONOMY_TOP_K:
+    taxonomy_ranker = TaxonomyRanker(OLLAMA_TAXONOMY_TOKEN_BUDGET or math.inf, OLLAMA_TAXONOMY_TOP_K)
+
+text_truncator = TextTruncator(OLLAMA_TRUNCATE_NUMBER, OLLAMA_TRUNCATE_UNIT, OLLAMA_TRUNCATE_STRATEGY,
+                               OLLAMA_TRUNCATE_PAGES)
+prompt_creator = PromptCreator(logger,
+                               OLLAMA_PROMPT_FILE,
+                               text_truncator,
+                               file_loader,
+                               tag_service,
+                               correspondent_service,
+                               document_type_service,
+                               OLLAMA_PROMPT_LAYOUT,
+                               taxonomy_ranker)
+response_processor = ResponseProcessor(logger)
+
+document_service = DocumentService(logger, paperless_client, PAPERLESS_API_URL, PAPERLESS_API_TOKEN)
+paperless = PaperlessService(logger, tag_service, correspondent_service, document_type_service)
+ollama_balancer = None
+if OLLAMA_API_URLS:
+    ollama_balancer = OllamaBalancer(logger, ollama_client, parse_endpoints(OLLAMA_API_URLS, OLLAMA_MAX_CONCURRENCY),
+                                     OLLAMA_MODEL_NAME, OLLAMA_BALANCING, OLLAMA_HEALTH_CHECK_INTERVAL)
+# With several hosts OLLAMA_MAX_CONCURRENCY applies to each of them
+ollama_scheduler = OllamaScheduler(ollama_balancer.get_max_concurrency() if ollama_balancer
+                                   else OLLAMA_MAX_CONCURRENCY)
+result_cache = SqliteResultCache(RESULT_CACHE_FILE, RESULT_CACHE_MAX_ENTRIES) if RESULT_CACHE_FILE else None
+ollama = OllamaService(logger, ollama_client, OLLAMA_API_URL, OLLAMA_MODEL_NAME, prompt_creator, response_processor,
+                       ollama_scheduler, OLLAMA_KEEP_ALIVE, OLLAMA_NUM_CTX, OLLAMA_STRUCTURED_OUTPUT,
+                       OLLAMA_NUM_PREDICT, result_cache, ollama_balancer)
 
-app = FastAPI()
+model_warmer = ModelWarmer(logger, ollama, OLLAMA_WARMUP_INTERVAL) if OLLAMA_WARMUP else None
+
+duplicate_detector = None
+if DUPLICATE_DETECTION:
+    short_prompt_creator = PromptCreator(logger,
+                                         OLLAMA_SHORT_PROMPT_FILE,
+                                         text_truncator,
+                                         file_loader,
+                                         tag_service,
+                                         correspondent_service,
+                                         document_type_service,
+                                         OLLAMA_PROMPT_LAYOUT,
+                                         taxonomy_ranker)
+    duplicate_detector = DuplicateDetector(logger, SimilarityIndex(DUPLICATE_MAX_DISTANCE, DUPLICATE_INDEX_FILE),
+                                           prompt_creator, short_prompt_creator, ollama)
+
+processor = PaperlessPostProcessor(logger, document_service, paperless, ollama, duplicate_detector)
+
+job_store = SqliteJobStore(JOB_DB_FILE, JOB_RETENTION) if JOB_DB_FILE else JobStore(JOB_RETENTION)
+job_queue = JobQueue(logger, processor, job_store, JOB_WORKERS)
+
+batch_processor = BatchProcessor(logger, document_service, tag_service, prompt_creator, ollama, paperless,
+                                 llm_workers=ollama_scheduler.max_concurrency, duplicate_detector=duplicate_detector,
+                                 model_warmer=model_warmer)
+# Progress and running task of the batches started via the API, keyed by batch id, oldest first
+batches = {}
+
+
+def prune_batches():
+    # Only the BATCH_RETENTION most recent finished batches are kept, running ones are never removed
+    finished_ids = [batch_id for batch_id, (_, task) in batches.items() if task.done()]
+    for batch_id in finished_ids[:max(0, len(finished_ids) - BATCH_RETENTION)]:
+        del batches[batch_id]
+
+
+@asynccontextmanager
+async def lifespan(_: FastAPI):
+    await job_queue.start()
+    if ollama_balancer:
+        await ollama_balancer.start()
+    if model_warmer:
+        await model_warmer.start()
+    yield
+    if model_warmer:
+        await model_warmer.stop()
+    if ollama_balancer:
+        await ollama_balancer.stop()
+    for _, task in batches.values():
+        task.cancel()
+    await job_queue.stop()
+    await paperless_client.aclose()
+    await ollama_client.aclose()
+    tracer.close()
+    logger.close()
+
+
+app = FastAPI(lifespan=lifespan)
 
 
 @app.get("/")
@@ -76,43 +374,136 @@ def read_root():
         "message": "Environment variables validated successfully",
         "app_port": APP_PORT,
         "log_file": LOG_FILE,
+        "log_level": LOG_LEVEL,
+        "log_max_bytes": LOG_MAX_BYTES,
+        "log_backup_count": LOG_BACKUP_COUNT,
+        "log_rotate_when": LOG_ROTATE_WHEN,
         "ollama_prompt_file": OLLAMA_PROMPT_FILE,
+        "ollama_short_prompt_file": OLLAMA_SHORT_PROMPT_FILE,
         "ollama_model_name": OLLAMA_MODEL_NAME,
         "ollama_api_url": OLLAMA_API_URL,
+        "ollama_api_urls": OLLAMA_API_URLS,
+        "ollama_balancing": OLLAMA_BALANCING,
+        "ollama_health_check_interval": OLLAMA_HEALTH_CHECK_INTERVAL,
         "ollama_truncate_number": OLLAMA_TRUNCATE_NUMBER,
+        "ollama_truncate_unit": OLLAMA_TRUNCATE_UNIT,
+        "ollama_truncate_strategy": OLLAMA_TRUNCATE_STRATEGY,
+        "ollama_truncate_pages": OLLAMA_TRUNCATE_PAGES,
+        "ollama_timeout": OLLAMA_TIMEOUT,
+        "ollama_max_concurrency": OLLAMA_MAX_CONCURRENCY,
+        "ollama_prompt_layout": OLLAMA_PROMPT_LAYOUT,
+        "ollama_taxonomy_token_budget": OLLAMA_TAXONOMY_TOKEN_BUDGET,
+        "ollama_taxonomy_top_k": OLLAMA_TAXONOMY_TOP_K,
+        "ollama_keep_alive": OLLAMA_KEEP_ALIVE,
+        "ollama_warmup": OLLAMA_WARMUP,
+        "ollama_warmup_interval": OLLAMA_WARMUP_INTERVAL,
+        "ollama_num_ctx": OLLAMA_NUM_CTX,
+        "ollama_structured_output": OLLAMA_STRUCTURED_OUTPUT,
+        "ollama_num_predict": OLLAMA_NUM_PREDICT,
         "paperless_api_url": PAPERLESS_API_URL,
         "paperless_api_token": PAPERLESS_API_TOKEN,
+        "paperless_timeout": PAPERLESS_TIMEOUT,
+        "paperless_page_size": PAPERLESS_PAGE_SIZE,
+        "paperless_page_concurrency": PAPERLESS_PAGE_CONCURRENCY,
+        "http_pool_size": HTTP_POOL_SIZE,
+        "taxonomy_cache_ttl": TAXONOMY_CACHE_TTL,
+        "taxonomy_match_threshold": TAXONOMY_MATCH_THRESHOLD,
+        "job_workers": JOB_WORKERS,
+        "job_retention": JOB_RETENTION,
+        "batch_retention": BATCH_RETENTION,
+        "job_db_file": JOB_DB_FILE,
+        "result_cache_file": RESULT_CACHE_FILE,
+        "result_cache_max_entries": RESULT_CACHE_MAX_ENTRIES,
+        "duplicate_detection": DUPLICATE_DETECTION,
+        "duplicate_max_distance": DUPLICATE_MAX_DISTANCE,
+        "duplicate_index_file": DUPLICATE_INDEX_FILE,
+        "trace_file": TRACE_FILE,
+        "trace_otlp_url": TRACE_OTLP_URL,
     }
 
 
-@app.get("/process/{doc_id}")
-async def process(doc_id: int):
-    logger = Logger(LOG_FILE)
-    file_loader = FileLoader()
+@app.get("/ready")
+def get_ready(response: Response):
+    # Not ready until the model has been loaded, so a health check can hold back traffic during the cold start
+    if model_warmer and not model_warmer.ready:
+        response.status_code = 503
+        return {"ready": False}
+    return {"ready": True}
 
+
+@app.get("/process/{doc_id}", status_code=202)
+async def process(doc_id: int, response: Response, wait: bool = False, refresh: bool = False):
     if doc_id is None:
         logger.log("No document ID provided. Exiting.")
         sys.exit(1)
 
-    tag_service = TagService(logger, PAPERLESS_API_URL, PAPERLESS_API_TOKEN)
-    correspondent_service = CorrespondentService(logger, PAPERLESS_API_URL, PAPERLESS_API_TOKEN)
-    document_type_service = DocumentTypeService(logger, PAPERLESS_API_URL, PAPERLESS_API_TOKEN)
-
-    prompt_creator = PromptCreator(logger,
-                                   OLLAMA_PROMPT_FILE,
-                                   OLLAMA_TRUNCATE_NUMBER,
-                                   file_loader,
-                                   tag_service,
-                                   correspondent_service,
-                                   document_type_service)
-    response_processor = ResponseProcessor(logger)
-
-    document_service = DocumentService(logger, PAPERLESS_API_URL, PAPERLESS_API_TOKEN)
-    paperless = PaperlessService(logger, tag_service, correspondent_service, document_type_service)
-    ollama = OllamaService(logger, OLLAMA_API_URL, OLLAMA_MODEL_NAME, prompt_creator, response_processor)
+    options = ProcessingOptions(use_cache=not refresh)
+    if not wait:
+        job = await job_queue.enqueue(doc_id, options)
+        return {"job_id": job.id, "status": job.status}
 
     try:
-        processor = PaperlessPostProcessor(logger, document_service, paperless, ollama)
-        processor.process_document(doc_id)
+        await processor.process_document(doc_id, options)
+        response.status_code = 200
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error processing document: {str(e)}")
+
+
+@app.post("/process/batch", status_code=202)
+async def process_batch(selection: BatchSelection, refresh: bool = False):
+    try:
+        doc_ids = await batch_processor.get_document_ids(selection)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    prune_batches()
+    batch_id = uuid.uuid4().hex
+    progress = BatchProgress(total=len(doc_ids))
+    task = asyncio.create_task(batch_processor.process(doc_ids, progress, use_cache=not refresh))
+    batches[batch_id] = (progress, task)
+    return {"batch_id": batch_id, "total": progress.total}
+
+
+@app.get("/batches/{batch_id}")
+def get_batch(batch_id: str):
+    if batch_id not in batches:
+        raise HTTPException(status_code=404, detail=f"Batch {batch_id} not found")
+
+    progress, _ = batches[batch_id]
+    return {**asdict(progress), "completed": progress.get_completed(), "documents_per_second": progress.get_throughput()}
+
+
+@app.get("/jobs/{job_id}")
+async def get_job(job_id: str):
+    job = await job_queue.get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail=f"Job {job_id} not found")
+    return asdict(job)
+
+
+@app.get("/ollama/queue")
+def get_ollama_queue():
+    if ollama_balancer:
+        return {**ollama_scheduler.get_stats(), "endpoints": ollama_balancer.get_stats()}
+    return ollama_scheduler.get_stats()
+
+
+@app.get("/metrics")
+def get_metrics():
+    return Response(generate_latest(), media_type=CONTENT_TYPE_LATEST)
+
+
+@app.post("/prompt/reload")
+def reload_prompt():
+    prompt_creator.reload()
+    if duplicate_detector:
+        duplicate_detector.short_prompt_creator.reload()
+    return {"message": "Prompt template reloaded"}
+
+
+@app.post("/taxonomy/invalidate")
+def invalidate_taxonomy():
+    tag_service.cache.invalidate()
+    correspondent_service.cache.invalidate()
+    document_type_service.cache.invalidate()
+    return {"message": "Taxonomy cache invalidated"}
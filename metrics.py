@@ -0,0 +1,60 @@
+import time
+from contextlib import contextmanager
+
+from prometheus_client import Counter, Gauge, Histogram
+
+# Paperless calls take milliseconds, generations on a CPU several minutes
+DURATION_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600)
+TOKEN_BUCKETS = (16, 32, 64, 128, 256, 512, 1024, 2048, 4096, 8192, 16384, 32768)
+
+# Stages of processing a document
+DOCUMENT_FETCH = 'document_fetch'
+TAXONOMY_FETCH = 'taxonomy_fetch'
+PROMPT_BUILD = 'prompt_build'
+OLLAMA_WAIT = 'ollama_wait'
+OLLAMA_GENERATE = 'ollama_generate'
+RESPONSE_PARSE = 'response_parse'
+RESOLUTION = 'resolution'
+PATCH = 'patch'
+
+STAGE_DURATION = Histogram('paperless_ollama_stage_duration_seconds', 'Duration of a processing stage',
+                           ['stage'], buckets=DURATION_BUCKETS)
+STAGE_ERRORS = Counter('paperless_ollama_stage_errors_total', 'Processing stages that raised an error', ['stage'])
+STAGE_IN_PROGRESS = Gauge('paperless_ollama_stage_in_progress', 'Processing stages currently running', ['stage'])
+
+DOCUMENTS_IN_PROGRESS = Gauge('paperless_ollama_documents_in_progress', 'Documents currently being processed')
+DOCUMENTS_PROCESSED = Counter('paperless_ollama_documents_processed_total', 'Processed documents by result',
+                              ['result'])
+
+OLLAMA_TIME_TO_FIRST_TOKEN = Histogram('paperless_ollama_time_to_first_token_seconds',
+                                       'Time from sending the request to Ollama until the first streamed token',
+                                       buckets=DURATION_BUCKETS)
+OLLAMA_PROMPT_TOKENS = Histogram('paperless_ollama_prompt_tokens', 'Prompt tokens evaluated by Ollama per request',
+                                 buckets=TOKEN_BUCKETS)
+OLLAMA_OUTPUT_TOKENS = Histogram('paperless_ollama_output_tokens', 'Tokens generated by Ollama per request',
+                                 buckets=TOKEN_BUCKETS)
+
+CACHE_REQUESTS = Counter('paperless_ollama_cache_requests_total', 'Cache lookups by cache and result',
+                         ['cache', 'result'])
+
+
+@contextmanager
+def measure(stage):
+    """
+    Records the duration of the enclosed stage, counts it as in progress while it runs and as an error if it raises.
+    """
+    in_progress = STAGE_IN_PROGRESS.labels(stage)
+    in_progress.inc()
+    started_at = time.perf_counter()
+    try:
+        yield
+    except Exception:
+        STAGE_ERRORS.labels(stage).inc()
+        raise
+    finally:
+        STAGE_DURATION.labels(stage).observe(time.perf_counter() - started_at)
+        in_progress.dec()
+
+
+def record_cache_lookup(cache, hit):
+    CACHE_REQUESTS.labels(cache, 'hit' if hit else 'miss').inc()
@@ -0,0 +1,20 @@
+import time
+from dataclasses import dataclass, field
+from typing import Optional
+
+
+@dataclass
+class BatchProgress:
+    total: int
+    processed: int = 0
+    skipped: int = 0
+    failed: int = 0
+    started_at: float = field(default_factory=time.time)
+    finished_at: Optional[float] = None
+
+    def get_completed(self):
+        return self.processed + self.skipped + self.failed
+
+    def get_throughput(self):
+        elapsed = (self.finished_at or time.time()) - self.started_at
+        return self.processed / elapsed if elapsed > 0 else 0.0
@@ -0,0 +1,13 @@
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+
+@dataclass
+class BatchSelection:
+    ids: List[int] = field(default_factory=list)
+    # Inclusive range of document IDs
+    start: Optional[int] = None
+    end: Optional[int] = None
+    # Paperless document filter parameters, e.g. {"tags__id__all": "5"}
+    query: Dict[str, str] = field(default_factory=dict)
+    tags: List[str] = field(default_factory=list)
@@ -0,0 +1,13 @@
+from dataclasses import dataclass
+from typing import Optional
+
+from models.extracted_metadata import ExtractedMetadata
+
+
+@dataclass
+class DocumentPrompt:
+    prompt: str
+    # SimHash of the document text, None for texts too short to compare
+    fingerprint: Optional[int]
+    # Metadata of a near-duplicate document, the prompt then only asks for title and date
+    duplicate_of: Optional[ExtractedMetadata] = None
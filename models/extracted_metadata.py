@@ -1,11 +1,44 @@
-from dataclasses import dataclass
-from typing import List, Optional
+from dataclasses import dataclass, field, fields
+from typing import List, Optional, Union, get_args, get_origin, get_type_hints
+
+_JSON_TYPES = {str: "string", int: "integer", float: "number", bool: "boolean"}
 
 
 @dataclass
 class ExtractedMetadata:
-    title: Optional[str]
-    created_date: Optional[str]
-    correspondent: Optional[str]
-    document_type: Optional[str]
-    tags: List[str]
+    # json_key is the name of the field in the LLM's answer
+    title: Optional[str] = field(metadata={'json_key': 'title'})
+    created_date: Optional[str] = field(metadata={'json_key': 'date'})
+    correspondent: Optional[str] = field(metadata={'json_key': 'correspondent'})
+    document_type: Optional[str] = field(metadata={'json_key': 'document_type'})
+    tags: List[str] = field(metadata={'json_key': 'tags'})
+
+    @classmethod
+    def from_json(cls, json_response):
+        values = {f.name: json_response.get(f.metadata['json_key']) for f in fields(cls)}
+        values['tags'] = json_response.get('tags', [])
+        return cls(**values)
+
+    @classmethod
+    def get_json_schema(cls, json_keys=None):
+        """
+        JSON schema of the answer expected from the LLM, used for Ollama's structured output.
+        `json_keys` limits the schema to these fields.
+        """
+        type_hints = get_type_hints(cls)
+        properties = {f.metadata['json_key']: _get_json_type(type_hints[f.name]) for f in fields(cls)
+                      if json_keys is None or f.metadata['json_key'] in json_keys}
+        return {
+            "type": "object",
+            "properties": properties,
+            "required": list(properties),
+        }
+
+
+def _get_json_type(annotation):
+    if get_origin(annotation) is list:
+        return {"type": "array", "items": _get_json_type(get_args(annotation)[0])}
+    if get_origin(annotation) is Union:
+        types = [_JSON_TYPES[arg] if arg is not type(None) else "null" for arg in get_args(annotation)]
+        return {"type": types}
+    return {"type": _JSON_TYPES[annotation]}
@@ -0,0 +1,18 @@
+from dataclasses import dataclass
+from typing import Optional
+
+
+@dataclass(eq=False)
+class OllamaEndpoint:
+    # Generate URL, e.g. http://ollama:11434/api/generate
+    url: str
+    weight: int = 1
+    max_concurrency: int = 1
+    in_flight: int = 0
+    healthy: bool = True
+    # The model is loaded on this host, so the next request does not wait for it to be loaded
+    warm: bool = False
+    # time.monotonic() of the last failure
+    failed_at: Optional[float] = None
+    # State of the smooth weighted round-robin
+    current_weight: int = 0
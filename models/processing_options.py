@@ -0,0 +1,12 @@
+from dataclasses import dataclass
+
+# Lower values are scheduled first
+HIGH_PRIORITY = 0
+LOW_PRIORITY = 10
+
+
+@dataclass
+class ProcessingOptions:
+    priority: int = HIGH_PRIORITY
+    # False regenerates the metadata even if a cached result exists, the new result is still cached
+    use_cache: bool = True
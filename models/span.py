@@ -0,0 +1,16 @@
+from dataclasses import dataclass, field
+from typing import Optional
+
+
+@dataclass
+class Span:
+    trace_id: str
+    span_id: str
+    # None for the root span of a trace
+    parent_id: Optional[str]
+    name: str
+    # Nanoseconds since the epoch
+    start_time: int
+    end_time: Optional[int] = None
+    attributes: dict = field(default_factory=dict)
+    error: Optional[str] = None
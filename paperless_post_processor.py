@@ -1,7 +1,11 @@
+import metrics
 from logger import Logger
+from models.processing_options import ProcessingOptions
 from services.document_service import DocumentService
+from services.duplicate_detector import DuplicateDetector
 from services.ollama_service import OllamaService
 from services.paperless_service import PaperlessService
+from tracing import tracer
 
 
 class PaperlessPostProcessor:
@@ -9,23 +13,42 @@ class PaperlessPostProcessor:
                  logger: Logger,
                  document_service: DocumentService,
                  paperless: PaperlessService,
-                 ollama: OllamaService):
+                 ollama: OllamaService,
+                 duplicate_detector: DuplicateDetector = None):
         self.logger = logger
         self.document_service = document_service
         self.paperless = paperless
         self.ollama = ollama
+        self.duplicate_detector = duplicate_detector
 
-    def process_document(self, doc_id):
+    async def process_document(self, doc_id, options: ProcessingOptions = None):
+        metrics.DOCUMENTS_IN_PROGRESS.inc()
         try:
-            document = self.document_service.get_document(doc_id)
-            if not document.text:
-                self.logger.log(f"No OCR text found for document ID {doc_id}.")
-                return
-
-            metadata = self.ollama.extract_metadata(document.text)
-            post_processed_document = self.paperless.post_process(document, metadata)
-
-            self.document_service.update_document(doc_id, post_processed_document)
+            with tracer.trace('process_document', {'doc_id': doc_id}) as span:
+                outcome = await self._process_document(doc_id, options)
+                if span:
+                    span.attributes['outcome'] = outcome
+            metrics.DOCUMENTS_PROCESSED.labels(outcome).inc()
         except Exception as e:
             self.logger.log_error(f"Error in post-processing document ID {doc_id}: {e}")
+            metrics.DOCUMENTS_PROCESSED.labels('error').inc()
             raise
+        finally:
+            metrics.DOCUMENTS_IN_PROGRESS.dec()
+
+    async def _process_document(self, doc_id, options):
+        with metrics.measure(metrics.DOCUMENT_FETCH):
+            document = await self.document_service.get_document(doc_id)
+        if not document.text:
+            self.logger.log(f"No OCR text found for document ID {doc_id}.")
+            return 'skipped'
+
+        # Without near-duplicate detection every document gets the full prompt
+        extractor = self.duplicate_detector or self.ollama
+        metadata = await extractor.extract_metadata(document.text, options)
+        with metrics.measure(metrics.RESOLUTION), tracer.span('resolution'):
+            post_processed_document = await self.paperless.post_process(document, metadata)
+
+        with metrics.measure(metrics.PATCH):
+            await self.document_service.update_document(doc_id, post_processed_document)
+        return 'success'
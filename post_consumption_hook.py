@@ -10,12 +10,13 @@ def post_consumption_hook():
 
     document_id = sys.argv[1]
     # change port here if needed
-    api_url = "http://postprocessor:5000/process/{document_id}"
+    api_url = f"http://postprocessor:5000/process/{document_id}"
 
     try:
+        # Processing runs in the background, so the consumer is not held up while the model generates
         response = requests.get(api_url)
         response.raise_for_status()
-        print(f"Document {document_id} processed successfully.")
+        print(f"Document {document_id} queued for processing as job {response.json()['job_id']}.")
         sys.exit(0)
     except requests.exceptions.RequestException as e:
         print(f"Error processing document {document_id}: {e}")
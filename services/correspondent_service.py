@@ -1,41 +1,52 @@
-import requests
+import httpx
+
+from services.paginator import Paginator
+from services.taxonomy_cache import TaxonomyCache
 
 
 class CorrespondentService:
-    def __init__(self, logger, api_url, api_token):
+    def __init__(self, logger, client: httpx.AsyncClient, paginator: Paginator, api_url, api_token, cache_ttl=300,
+                 match_threshold=1):
+        self.client = client
+        self.paginator = paginator
         self.api_url = api_url
         self.api_token = api_token
         self.logger = logger
+        # "Telekom" and "Telekom GmbH" are the same company
+        self.cache = TaxonomyCache(self.iter_all, cache_ttl, match_threshold, strip_legal_forms=True)
+
+    async def get_all(self):
+        return [correspondent async for correspondent in self.iter_all()]
 
-    def get_all(self):
+    async def iter_all(self):
         url = f"{self.api_url}/correspondents/"
         headers = {
             "Authorization": f"Token {self.api_token}"
         }
 
         try:
-            response = requests.get(url, headers=headers)
-            response.raise_for_status()
-            return response.json()["results"]
-        except requests.exceptions.RequestException as e:
+            async for correspondent in self.paginator.iterate(url, headers):
+                yield correspondent
+        except httpx.HTTPError as e:
             self.logger.log_error(f"Error fetching correspondents: {e}")
             raise
 
-    def get_all_names(self):
-        return [correspondent['name'] for correspondent in self.get_all()]
+    async def get_all_names(self):
+        return await self.cache.get_names()
+
+    async def get_all_items(self):
+        return await self.cache.get_items()
 
-    def get_correspondent_name_by_id(self, correspondent_id):
-        all_correspondents = self.get_all()
-        correspondent_map = {correspondent['id']: correspondent['name'] for correspondent in all_correspondents}
-        return correspondent_map.get(correspondent_id)
+    async def get_version(self):
+        return await self.cache.get_version()
 
-    def get_correspondent_id_by_name(self, name):
-        all_correspondents = self.get_all()
-        correspondent_map = {correspondent['name'].lower(): correspondent['id'] for correspondent in all_correspondents}
+    async def get_correspondent_name_by_id(self, correspondent_id):
+        return await self.cache.get_name_by_id(correspondent_id)
 
-        return correspondent_map.get(name.lower())
+    async def get_correspondent_id_by_name(self, name):
+        return await self.cache.match_id(name)
 
-    def create_correspondent(self, name):
+    async def create_correspondent(self, name):
         url = f"{self.api_url}/correspondents/"
         headers = {
             "Authorization": f"Token {self.api_token}",
@@ -48,9 +59,11 @@ class CorrespondentService:
         }
 
         try:
-            response = requests.post(url, json=data, headers=headers)
+            response = await self.client.post(url, json=data, headers=headers)
             response.raise_for_status()
-            return response.json()['id']
-        except requests.exceptions.RequestException as e:
+            correspondent_id = response.json()['id']
+            self.cache.add({'id': correspondent_id, 'name': name})
+            return correspondent_id
+        except httpx.HTTPError as e:
             self.logger.log_error(f"Error creating correspondent '{name}': {e}")
             raise
@@ -1,46 +1,83 @@
 import sys
 from dataclasses import asdict
 
-import requests
+import httpx
 from logger import Logger
 from models.document import Document
 from models.postprocessed_document import PostProcessedDocument
 
+# Only these fields are transferred, Paperless leaves out notes, custom fields, permissions etc.
+DOCUMENT_FIELDS = ','.join(['id', 'title', 'content', 'created_date', 'correspondent', 'document_type', 'tags'])
+
 
 class DocumentService:
-    def __init__(self, logger: Logger, api_url, token):
+    def __init__(self, logger: Logger, client: httpx.AsyncClient, api_url, token):
         self.logger = logger
+        self.client = client
         self.paperless_documents_url = f'{api_url}/documents/'
         self.headers = {'Authorization': f'Token {token}'}
 
-    def get_document(self, doc_id):
+    async def get_document(self, doc_id):
         try:
-            response = requests.get(f"{self.paperless_documents_url}{doc_id}/", headers=self.headers)
+            response = await self.client.get(f"{self.paperless_documents_url}{doc_id}/",
+                                             params={"fields": DOCUMENT_FIELDS},
+                                             headers=self.headers)
             response.raise_for_status()
-            document_data = response.json()
-
-            document = Document(
-                id=document_data['id'],
-                title=document_data['title'],
-                created_date=document_data['created_date'],
-                text=document_data['content'],
-                correspondent_id=document_data.get('correspondent'),
-                document_type_id=document_data.get('document_type'),
-                tag_ids=document_data.get('tags', [])
-            )
-
-            return document
-        except requests.exceptions.HTTPError as e:
+            return self._to_document(response.json())
+        except httpx.HTTPError as e:
             self.logger.log_error(f"HTTP error: {e}", sys.argv)
             raise
 
-    def update_document(self, doc_id, post_processed_document: PostProcessedDocument):
+    async def get_documents(self, doc_ids):
+        """
+        Retrieve several documents with a single request. Documents that do not exist are left out.
+        """
         try:
-            data = asdict(post_processed_document)
-            self.logger.log(f"Updating Paperless document with metadata: {data}")
-            update_response = requests.patch(f"{self.paperless_documents_url}{doc_id}/",
-                                             json=data,
+            response = await self.client.get(self.paperless_documents_url,
+                                             params={"id__in": ','.join(str(doc_id) for doc_id in doc_ids),
+                                                     "fields": DOCUMENT_FIELDS,
+                                                     "page_size": len(doc_ids)},
+                                             headers=self.headers)
+            response.raise_for_status()
+            return [self._to_document(document_data) for document_data in response.json()["results"]]
+        except httpx.HTTPError as e:
+            self.logger.log_error(f"Error fetching Paperless documents {doc_ids}: {e}")
+            raise
+
+    async def get_document_ids(self, query):
+        """
+        Retrieve the IDs of all documents matching a Paperless filter query, e.g. {"tags__id__all": "5"}.
+        """
+        try:
+            # Paperless lists every matching ID under "all", so a single one-entry page is enough
+            response = await self.client.get(self.paperless_documents_url,
+                                             params={**query, "page_size": 1},
                                              headers=self.headers)
+            response.raise_for_status()
+            return response.json()["all"]
+        except httpx.HTTPError as e:
+            self.logger.log_error(f"Error querying Paperless documents with {query}: {e}")
+            raise
+
+    @staticmethod
+    def _to_document(document_data):
+        return Document(
+            id=document_data['id'],
+            title=document_data['title'],
+            created_date=document_data['created_date'],
+            text=document_data['content'],
+            correspondent_id=document_data.get('correspondent'),
+            document_type_id=document_data.get('document_type'),
+            tag_ids=document_data.get('tags', [])
+        )
+
+    async def update_document(self, doc_id, post_processed_document: PostProcessedDocument):
+        try:
+            data = asdict(post_processed_document)
+            self.logger.log_debug(f"Updating Paperless document with metadata: {data}")
+            update_response = await self.client.patch(f"{self.paperless_documents_url}{doc_id}/",
+                                                      json=data,
+                                                      headers=self.headers)
 
             return update_response.status_code
         except Exception as e:
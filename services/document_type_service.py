@@ -1,41 +1,51 @@
-import requests
+import httpx
+
+from services.paginator import Paginator
+from services.taxonomy_cache import TaxonomyCache
 
 
 class DocumentTypeService:
-    def __init__(self, logger, api_url, api_token):
+    def __init__(self, logger, client: httpx.AsyncClient, paginator: Paginator, api_url, api_token, cache_ttl=300,
+                 match_threshold=1):
+        self.client = client
+        self.paginator = paginator
         self.api_url = api_url
         self.api_token = api_token
         self.logger = logger
+        self.cache = TaxonomyCache(self.iter_all, cache_ttl, match_threshold)
+
+    async def get_all(self):
+        return [doc_type async for doc_type in self.iter_all()]
 
-    def get_all(self):
+    async def iter_all(self):
         url = f"{self.api_url}/document_types/"
         headers = {
             "Authorization": f"Token {self.api_token}"
         }
 
         try:
-            response = requests.get(url, headers=headers)
-            response.raise_for_status()
-            return response.json()["results"]
-        except requests.exceptions.RequestException as e:
+            async for doc_type in self.paginator.iterate(url, headers):
+                yield doc_type
+        except httpx.HTTPError as e:
             self.logger.log_error(f"Error fetching document types: {e}")
             raise
 
-    def get_all_names(self):
-        return [doc_type['name'] for doc_type in self.get_all()]
+    async def get_all_names(self):
+        return await self.cache.get_names()
+
+    async def get_all_items(self):
+        return await self.cache.get_items()
 
-    def get_document_type_name_by_id(self, document_type_id):
-        all_document_types = self.get_all()
-        document_type_map = {doc_type['id']: doc_type['name'] for doc_type in all_document_types}
-        return document_type_map.get(document_type_id)
+    async def get_version(self):
+        return await self.cache.get_version()
 
-    def get_document_type_id_by_name(self, name):
-        all_document_types = self.get_all()
-        document_type_map = {doc_type['name'].lower(): doc_type['id'] for doc_type in all_document_types}
+    async def get_document_type_name_by_id(self, document_type_id):
+        return await self.cache.get_name_by_id(document_type_id)
 
-        return document_type_map.get(name.lower())
+    async def get_document_type_id_by_name(self, name):
+        return await self.cache.match_id(name)
 
-    def create_document_type(self, name):
+    async def create_document_type(self, name):
         url = f"{self.api_url}/document_types/"
         headers = {
             "Authorization": f"Token {self.api_token}",
@@ -48,9 +58,11 @@ class DocumentTypeService:
         }
 
         try:
-            response = requests.post(url, json=data, headers=headers)
+            response = await self.client.post(url, json=data, headers=headers)
             response.raise_for_status()
-            return response.json()['id']
-        except requests.exceptions.RequestException as e:
+            document_type_id = response.json()['id']
+            self.cache.add({'id': document_type_id, 'name': name})
+            return document_type_id
+        except httpx.HTTPError as e:
             self.logger.log_error(f"Error creating document type '{name}': {e}")
             raise
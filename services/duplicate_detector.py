@@ -0,0 +1,52 @@
+import asyncio
+from dataclasses import replace
+
+from logger import Logger
+from models.document_prompt import DocumentPrompt
+from models.processing_options import ProcessingOptions
+from services.ollama_service import OllamaService
+from services.prompt_creator import PromptCreator
+from services.similarity_index import SimilarityIndex, get_fingerprint
+
+# Fields still generated for a near-duplicate, the others are taken over from the matching document
+SHORT_PROMPT_KEYS = ('title', 'date')
+
+
+class DuplicateDetector:
+    def __init__(self,
+                 logger: Logger,
+                 index: SimilarityIndex,
+                 prompt_creator: PromptCreator,
+                 short_prompt_creator: PromptCreator,
+                 ollama: OllamaService):
+        self.logger = logger
+        self.index = index
+        self.prompt_creator = prompt_creator
+        self.short_prompt_creator = short_prompt_creator
+        self.ollama = ollama
+
+    async def extract_metadata(self, ocr_text, options: ProcessingOptions = None):
+        document_prompt = await self.create_prompt(ocr_text)
+        return await self.extract_metadata_from_prompt(document_prompt, options)
+
+    async def create_prompt(self, ocr_text):
+        # Hashing every shingle of a long document would block the event loop
+        fingerprint = await asyncio.to_thread(get_fingerprint, ocr_text)
+        duplicate_of = self.index.find(fingerprint) if fingerprint is not None else None
+        if duplicate_of:
+            return DocumentPrompt(await self.short_prompt_creator.create_prompt(ocr_text), fingerprint, duplicate_of)
+        return DocumentPrompt(await self.prompt_creator.create_prompt(ocr_text), fingerprint)
+
+    async def extract_metadata_from_prompt(self, document_prompt: DocumentPrompt, options: ProcessingOptions = None):
+        duplicate_of = document_prompt.duplicate_of
+        if duplicate_of:
+            self.logger.log("Found a near-duplicate document, only extracting title and date.")
+            metadata = await self.ollama.extract_metadata_from_prompt(document_prompt.prompt, options,
+                                                                       SHORT_PROMPT_KEYS)
+            return replace(duplicate_of, title=metadata.title, created_date=metadata.created_date,
+                           tags=list(duplicate_of.tags))
+
+        metadata = await self.ollama.extract_metadata_from_prompt(document_prompt.prompt, options)
+        if document_prompt.fingerprint is not None:
+            await asyncio.to_thread(self.index.add, document_prompt.fingerprint, metadata)
+        return metadata
@@ -0,0 +1,71 @@
+import asyncio
+import time
+import uuid
+
+from logger import Logger
+from models.job import Job, QUEUED, RUNNING, DONE, FAILED
+from models.processing_options import ProcessingOptions
+from paperless_post_processor import PaperlessPostProcessor
+
+
+class JobQueue:
+    def __init__(self, logger: Logger, processor: PaperlessPostProcessor, store, workers):
+        self.logger = logger
+        self.processor = processor
+        self.store = store
+        self.workers = workers
+        self.queue = asyncio.Queue()
+        self.worker_tasks = []
+
+    async def start(self):
+        # Jobs that were queued or running when the application stopped are picked up again
+        for job in await asyncio.to_thread(self.store.get_unfinished):
+            job.status = QUEUED
+            job.started_at = None
+            await asyncio.to_thread(self.store.save, job)
+            self.queue.put_nowait((job, None))
+
+        if self.queue.qsize():
+            self.logger.log(f"Resuming {self.queue.qsize()} unfinished jobs.")
+
+        self.worker_tasks = [asyncio.create_task(self._work()) for _ in range(self.workers)]
+
+    async def stop(self):
+        for task in self.worker_tasks:
+            task.cancel()
+        await asyncio.gather(*self.worker_tasks, return_exceptions=True)
+        self.worker_tasks = []
+
+    async def enqueue(self, doc_id, options: ProcessingOptions = None):
+        job = Job(id=uuid.uuid4().hex, doc_id=doc_id, status=QUEUED, created_at=time.time())
+        await asyncio.to_thread(self.store.save, job)
+        # The options are not persisted, resumed jobs run with the defaults
+        self.queue.put_nowait((job, options))
+        return job
+
+    async def get(self, job_id):
+        return await asyncio.to_thread(self.store.get, job_id)
+
+    async def _work(self):
+        while True:
+            job, options = await self.queue.get()
+            try:
+                await self._run(job, options)
+            finally:
+                self.queue.task_done()
+
+    async def _run(self, job: Job, options: ProcessingOptions = None):
+        job.status = RUNNING
+        job.started_at = time.time()
+        await asyncio.to_thread(self.store.save, job)
+
+        try:
+            await self.processor.process_document(job.doc_id, options)
+            job.status = DONE
+        except Exception as e:
+            # The processor has already logged the error, the job only records it for GET /jobs/{id}
+            job.status = FAILED
+            job.error = str(e)
+
+        job.finished_at = time.time()
+        await asyncio.to_thread(self.store.save, job)
@@ -0,0 +1,75 @@
+import threading
+from collections import OrderedDict
+from dataclasses import astuple
+
+from models.job import Job, QUEUED, RUNNING, DONE, FAILED
+from services.sqlite_database import SqliteDatabase
+
+
+class JobStore:
+    """
+    Keeps jobs in memory; they are lost on restart. Only the `max_finished` most recently finished jobs are kept.
+    """
+
+    def __init__(self, max_finished=10000):
+        self.jobs = {}
+        self.max_finished = max_finished
+        # Ids of finished jobs, oldest first
+        self.finished_ids = OrderedDict()
+        # Called through asyncio.to_thread like SqliteJobStore, so several worker threads may save at once
+        self.lock = threading.Lock()
+
+    def save(self, job: Job):
+        with self.lock:
+            self.jobs[job.id] = job
+            if job.status in (DONE, FAILED):
+                self.finished_ids[job.id] = None
+                self.finished_ids.move_to_end(job.id)
+                while len(self.finished_ids) > self.max_finished:
+                    finished_id, _ = self.finished_ids.popitem(last=False)
+                    del self.jobs[finished_id]
+
+    def get(self, job_id):
+        with self.lock:
+            return self.jobs.get(job_id)
+
+    def get_unfinished(self):
+        with self.lock:
+            return [job for job in self.jobs.values() if job.status in (QUEUED, RUNNING)]
+
+
+class SqliteJobStore:
+    """
+    Persists jobs in a SQLite database, so queued documents survive restarts. Only the `max_finished` most
+    recently finished jobs are kept.
+    """
+
+    def __init__(self, db_file, max_finished=10000):
+        self.database = SqliteDatabase(db_file)
+        self.max_finished = max_finished
+
+        with self.database.transaction() as connection:
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS jobs ("
+                "id TEXT PRIMARY KEY, doc_id INTEGER NOT NULL, status TEXT NOT NULL, created_at REAL NOT NULL, "
+                "started_at REAL, finished_at REAL, error TEXT)"
+            )
+
+    def save(self, job: Job):
+        with self.database.transaction() as connection:
+            connection.execute("INSERT OR REPLACE INTO jobs VALUES (?, ?, ?, ?, ?, ?, ?)", astuple(job))
+            if job.status in (DONE, FAILED):
+                connection.execute(
+                    "DELETE FROM jobs WHERE id IN (SELECT id FROM jobs WHERE status IN (?, ?) "
+                    "ORDER BY finished_at DESC LIMIT -1 OFFSET ?)", (DONE, FAILED, self.max_finished))
+
+    def get(self, job_id):
+        with self.database.transaction() as connection:
+            row = connection.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return Job(*row) if row else None
+
+    def get_unfinished(self):
+        with self.database.transaction() as connection:
+            rows = connection.execute("SELECT * FROM jobs WHERE status IN (?, ?) ORDER BY created_at",
+                                      (QUEUED, RUNNING)).fetchall()
+        return [Job(*row) for row in rows]
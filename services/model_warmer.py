@@ -0,0 +1,49 @@
+import asyncio
+import time
+
+from logger import Logger
+from services.ollama_service import OllamaService
+
+# Seconds between attempts while the model cannot be loaded, e.g. because Ollama is still starting
+RETRY_DELAY = 10
+
+
+class ModelWarmer:
+    def __init__(self, logger: Logger, ollama: OllamaService, interval=0):
+        """
+        Loads the model at startup, so the first document does not wait for it, and again every `interval`
+        seconds (0 only at startup), so Ollama does not unload it between documents.
+        """
+        self.logger = logger
+        self.ollama = ollama
+        self.interval = interval
+        # The model was loaded by the last warm-up
+        self.ready = False
+        self.task = None
+
+    async def start(self):
+        # Loading takes up to minutes, the application accepts requests meanwhile and reports not ready
+        self.task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self.task is not None:
+            self.task.cancel()
+            await asyncio.gather(self.task, return_exceptions=True)
+            self.task = None
+
+    async def warm_up(self):
+        started_at = time.monotonic()
+        was_ready = self.ready
+        self.ready = await self.ollama.warm_up()
+        if self.ready and not was_ready:
+            self.logger.log(f"Model {self.ollama.model_name} loaded in {time.monotonic() - started_at:.1f}s.")
+        return self.ready
+
+    async def _run(self):
+        while True:
+            if await self.warm_up():
+                if not self.interval:
+                    return
+                await asyncio.sleep(self.interval)
+            else:
+                await asyncio.sleep(RETRY_DELAY)
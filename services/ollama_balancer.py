@@ -0,0 +1,190 @@
+import asyncio
+import time
+from contextlib import asynccontextmanager
+from urllib.parse import urljoin
+
+import httpx
+
+from logger import Logger
+from models.ollama_endpoint import OllamaEndpoint
+
+# Sends every request to the endpoint with the fewest requests in flight relative to its weight
+LEAST_OUTSTANDING = 'least_outstanding'
+# Distributes the requests in proportion to the weights
+WEIGHTED = 'weighted'
+
+# Seconds a health check may take before the endpoint counts as down
+HEALTH_CHECK_TIMEOUT = 5
+
+
+def parse_endpoints(value, max_concurrency):
+    """
+    Parses a comma separated list of generate URLs, each optionally followed by ";weight=N" and
+    ";max_concurrency=N", e.g. "http://gpu:11434/api/generate;weight=3,http://cpu:11434/api/generate".
+    """
+    endpoints = []
+    for entry in value.split(','):
+        url, *settings = [part.strip() for part in entry.split(';')]
+        if not url:
+            continue
+        endpoint = OllamaEndpoint(url=url, max_concurrency=max_concurrency)
+        for setting in settings:
+            key, _, number = setting.partition('=')
+            if key not in ('weight', 'max_concurrency') or not number.isdigit() or int(number) <= 0:
+                raise ValueError(f"Invalid endpoint setting '{setting}', expected weight=N or max_concurrency=N "
+                                 f"with a positive integer N")
+            setattr(endpoint, key, int(number))
+        endpoints.append(endpoint)
+
+    if not endpoints:
+        raise ValueError("No Ollama endpoint given")
+    return endpoints
+
+
+def _get_model_key(model_name):
+    # Ollama reports models with their tag, "gemma2" is loaded as "gemma2:latest"
+    return model_name if ':' in model_name else f'{model_name}:latest'
+
+
+class OllamaBalancer:
+    def __init__(self, logger: Logger, client: httpx.AsyncClient, endpoints, model_name, strategy=LEAST_OUTSTANDING,
+                 health_check_interval=30):
+        """
+        Spreads the generations across several Ollama hosts, at most `max_concurrency` at a time on each.
+        Hosts that already have the model loaded are preferred. A host that fails is skipped until a health
+        check via /api/ps, or `health_check_interval` seconds, have passed; the request is retried on another host.
+        """
+        self.logger = logger
+        self.client = client
+        self.endpoints = endpoints
+        self.model_key = _get_model_key(model_name)
+        self.strategy = strategy
+        self.health_check_interval = health_check_interval
+        # Notified whenever an endpoint becomes available
+        self.available = asyncio.Condition()
+        self.health_check_task = None
+
+        if self.strategy not in (LEAST_OUTSTANDING, WEIGHTED):
+            raise ValueError(f"Unknown balancing strategy '{self.strategy}', expected '{LEAST_OUTSTANDING}' "
+                             f"or '{WEIGHTED}'")
+
+    def get_max_concurrency(self):
+        return sum(endpoint.max_concurrency for endpoint in self.endpoints)
+
+    async def run(self, request):
+        """
+        Calls `request(url)` with the URL of the chosen endpoint, on a connection error or server error with the
+        next one until every endpoint has been tried.
+        """
+        tried = []
+        while True:
+            async with self._endpoint(tried) as endpoint:
+                try:
+                    result = await request(endpoint.url)
+                except (httpx.TransportError, httpx.HTTPStatusError) as e:
+                    if isinstance(e, httpx.HTTPStatusError) and e.response.status_code < 500:
+                        raise
+                    tried.append(endpoint)
+                    retry = len(tried) < len(self.endpoints)
+                    self._mark_failed(endpoint, f"Ollama endpoint {endpoint.url} failed"
+                                                f"{', trying the next one' if retry else ''}: {e}")
+                    if not retry:
+                        raise
+                    continue
+                endpoint.warm = True
+                return result
+
+    async def start(self):
+        if self.health_check_interval and self.health_check_task is None:
+            self.health_check_task = asyncio.create_task(self._check_health_periodically())
+
+    async def stop(self):
+        if self.health_check_task is not None:
+            self.health_check_task.cancel()
+            self.health_check_task = None
+
+    async def check_health(self):
+        await asyncio.gather(*(self._check_endpoint(endpoint) for endpoint in self.endpoints))
+        async with self.available:
+            self.available.notify_all()
+
+    def get_stats(self):
+        return [{
+            "url": endpoint.url,
+            "weight": endpoint.weight,
+            "max_concurrency": endpoint.max_concurrency,
+            "in_flight": endpoint.in_flight,
+            "healthy": endpoint.healthy,
+            "warm": endpoint.warm,
+        } for endpoint in self.endpoints]
+
+    @asynccontextmanager
+    async def _endpoint(self, tried):
+        async with self.available:
+            endpoint = None
+            while endpoint is None:
+                endpoint = self._select(tried)
+                if endpoint is None:
+                    await self.available.wait()
+            endpoint.in_flight += 1
+        try:
+            yield endpoint
+        finally:
+            endpoint.in_flight -= 1
+            async with self.available:
+                self.available.notify()
+
+    def _select(self, tried):
+        untried = [endpoint for endpoint in self.endpoints if endpoint not in tried]
+        usable = [endpoint for endpoint in untried if self._is_usable(endpoint)]
+        # With every host down the request still goes out, so it fails with the actual error instead of waiting
+        candidates = [endpoint for endpoint in (usable or untried) if endpoint.in_flight < endpoint.max_concurrency]
+        if not candidates:
+            return None
+
+        # Loading a model takes longer than waiting for a warm host, but a busy warm host does not block a cold one
+        candidates = [endpoint for endpoint in candidates if endpoint.warm] or candidates
+        if self.strategy == WEIGHTED:
+            return self._select_weighted(candidates)
+        return min(candidates, key=lambda endpoint: endpoint.in_flight / endpoint.weight)
+
+    @staticmethod
+    def _select_weighted(candidates):
+        # Smooth weighted round-robin, spreads the turns of heavy endpoints instead of sending them in a row
+        for endpoint in candidates:
+            endpoint.current_weight += endpoint.weight
+        selected = max(candidates, key=lambda endpoint: endpoint.current_weight)
+        selected.current_weight -= sum(endpoint.weight for endpoint in candidates)
+        return selected
+
+    def _is_usable(self, endpoint):
+        if endpoint.healthy:
+            return True
+        # Without health checks a failed endpoint is retried after the same interval
+        return time.monotonic() - endpoint.failed_at >= (self.health_check_interval or 30)
+
+    def _mark_failed(self, endpoint, message):
+        self.logger.log_error(message)
+        endpoint.healthy = False
+        endpoint.warm = False
+        endpoint.failed_at = time.monotonic()
+
+    async def _check_health_periodically(self):
+        while True:
+            await self.check_health()
+            await asyncio.sleep(self.health_check_interval)
+
+    async def _check_endpoint(self, endpoint):
+        try:
+            response = await self.client.get(urljoin(endpoint.url, 'ps'), timeout=HEALTH_CHECK_TIMEOUT)
+            response.raise_for_status()
+            models = response.json().get('models') or []
+        except (httpx.HTTPError, ValueError) as e:
+            if endpoint.healthy:
+                self._mark_failed(endpoint, f"Health check of Ollama endpoint {endpoint.url} failed: {e}")
+            return
+
+        if not endpoint.healthy:
+            self.logger.log(f"Ollama endpoint {endpoint.url} is available again.")
+        endpoint.healthy = True
+        endpoint.warm = any(_get_model_key(model.get('name', '')) == self.model_key for model in models)
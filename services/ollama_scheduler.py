@@ -0,0 +1,77 @@
+import asyncio
+import heapq
+import itertools
+import time
+from contextlib import asynccontextmanager
+
+import metrics
+from tracing import tracer
+
+
+class OllamaScheduler:
+    def __init__(self, max_concurrency):
+        """
+        Caps the number of in-flight Ollama requests, waiting requests are granted a slot by priority
+        (lower first) and in arrival order within the same priority.
+        """
+        self.max_concurrency = max_concurrency
+        self.in_flight = 0
+        self.waiting = []
+        self.sequence = itertools.count()
+        self.granted = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+    @asynccontextmanager
+    async def slot(self, priority):
+        started_at = time.monotonic()
+        with metrics.measure(metrics.OLLAMA_WAIT), tracer.span('ollama_wait', {"priority": priority}):
+            await self._acquire(priority)
+        self._record_wait(time.monotonic() - started_at)
+        try:
+            yield
+        finally:
+            self._release()
+
+    def get_stats(self):
+        return {
+            "max_concurrency": self.max_concurrency,
+            "in_flight": self.in_flight,
+            "queue_depth": self.get_queue_depth(),
+            "granted": self.granted,
+            "average_wait_seconds": self.total_wait / self.granted if self.granted else 0.0,
+            "max_wait_seconds": self.max_wait,
+        }
+
+    def get_queue_depth(self):
+        return sum(1 for _, _, future in self.waiting if not future.done())
+
+    async def _acquire(self, priority):
+        if self.in_flight < self.max_concurrency and not self.get_queue_depth():
+            self.in_flight += 1
+            return
+
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self.waiting, (priority, next(self.sequence), future))
+        try:
+            await future
+        except asyncio.CancelledError:
+            # The slot may have been granted right before the cancellation arrived
+            if future.done() and not future.cancelled():
+                self._release()
+            raise
+
+    def _release(self):
+        self.in_flight -= 1
+        while self.waiting:
+            _, _, future = heapq.heappop(self.waiting)
+            # Cancelled waiters are skipped lazily instead of being removed from the heap
+            if not future.done():
+                self.in_flight += 1
+                future.set_result(None)
+                return
+
+    def _record_wait(self, wait):
+        self.granted += 1
+        self.total_wait += wait
+        self.max_wait = max(self.max_wait, wait)
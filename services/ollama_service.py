@@ -1,55 +1,132 @@
+import asyncio
 import json
-import requests
+import time
 
+import httpx
+
+import metrics
 from logger import Logger
 from models.extracted_metadata import ExtractedMetadata
+from models.processing_options import ProcessingOptions
+from services.ollama_balancer import OllamaBalancer
+from services.ollama_scheduler import OllamaScheduler
 from services.prompt_creator import PromptCreator
 from services.response_processor import ResponseProcessor
+from services.result_cache import SqliteResultCache
+from tracing import tracer
 
 
 class OllamaService:
     def __init__(self,
                  logger: Logger,
+                 client: httpx.AsyncClient,
                  api_url,
                  model_name,
                  prompt_creator: PromptCreator,
-                 response_processor: ResponseProcessor):
+                 response_processor: ResponseProcessor,
+                 scheduler: OllamaScheduler,
+                 keep_alive=None,
+                 num_ctx=None,
+                 structured_output=False,
+                 num_predict=None,
+                 result_cache: SqliteResultCache = None,
+                 balancer: OllamaBalancer = None):
         self.logger = logger
+        self.client = client
         self.api_url = api_url
         self.model_name = model_name
         self.prompt_creator = prompt_creator
         self.response_processor = response_processor
+        self.scheduler = scheduler
+        self.keep_alive = keep_alive
+        self.num_ctx = num_ctx
+        self.structured_output = structured_output
+        self.num_predict = num_predict
+        self.result_cache = result_cache
+        # Without a balancer every request goes to `api_url`
+        self.balancer = balancer
 
         if not self.model_name:
             raise ValueError("Environment variable 'OLLAMA_MODEL_NAME' is not set or empty")
 
-    def extract_metadata(self, ocr_text):
+    async def warm_up(self):
+        """
+        Asks Ollama to load the model without generating anything, on every host when balancing. Returns whether
+        the model is loaded on at least one of them.
+        """
+        # Sent with the same keep_alive and context size as the generations, a different num_ctx reloads the model
+        data = {"model": self.model_name}
+        if self.keep_alive is not None:
+            data["keep_alive"] = self.keep_alive
+        if self.num_ctx:
+            data["options"] = {"num_ctx": self.num_ctx}
+
+        if not self.balancer:
+            return await self._load_model(self.api_url, data)
+
+        loaded = await asyncio.gather(*(self._load_model(endpoint.url, data) for endpoint in self.balancer.endpoints))
+        for endpoint, endpoint_loaded in zip(self.balancer.endpoints, loaded):
+            if endpoint_loaded:
+                endpoint.warm = True
+        return any(loaded)
+
+    async def extract_metadata(self, ocr_text, options: ProcessingOptions = None):
+        prompt = await self.prompt_creator.create_prompt(ocr_text)
+        return await self.extract_metadata_from_prompt(prompt, options)
+
+    async def extract_metadata_from_prompt(self, prompt, options: ProcessingOptions = None, json_keys=None):
+        options = options or ProcessingOptions()
         data = {
             "model": self.model_name,
-            "prompt": self.prompt_creator.create_prompt(ocr_text)
+            "prompt": prompt
         }
+        # Keeping the model loaded with a fixed context size lets Ollama reuse the cached prompt prefix
+        if self.keep_alive is not None:
+            data["keep_alive"] = self.keep_alive
+        if self.num_ctx:
+            data.setdefault("options", {})["num_ctx"] = self.num_ctx
+        # Constrains the answer to compact JSON, so it no longer needs the markdown and brace cleanup
+        if self.structured_output:
+            data["format"] = ExtractedMetadata.get_json_schema(json_keys)
+        if self.num_predict:
+            data.setdefault("options", {})["num_predict"] = self.num_predict
+
+        cache_key = None
+        if self.result_cache:
+            cache_key = self.result_cache.get_key(data)
+            if options.use_cache:
+                metadata = await asyncio.to_thread(self.result_cache.get, cache_key)
+                metrics.record_cache_lookup('result', metadata is not None)
+                if metadata:
+                    self.logger.log_debug(f"Using cached metadata for prompt {cache_key}.")
+                    return metadata
 
+        # A malformed stream line raises before the response is complete
+        complete_response = None
         try:
-            responses = requests.post(self.api_url, json=data, stream=True)
-            complete_response = self.response_processor.process(responses)
-            json_response = self.response_processor.get_json(complete_response)
-
-            if not json_response:
-                self.logger.log_error("Received empty or invalid JSON from Ollama API.")
-                self.logger.log_error(f"Failed data: {data}, Response: {complete_response}")
-                raise ValueError(f"Invalid JSON response from Ollama API: {complete_response}")
-
-            metadata = ExtractedMetadata(
-                title=json_response.get('title'),
-                created_date=json_response.get('date'),
-                correspondent=json_response.get('correspondent'),
-                document_type=json_response.get('document_type'),
-                tags=json_response.get('tags', [])
-            )
+            # Only the generation is throttled, the Paperless calls for the prompt have already been made
+            async with self.scheduler.slot(options.priority):
+                with metrics.measure(metrics.OLLAMA_GENERATE), \
+                        tracer.span('ollama_stream', {"model": self.model_name, "prompt_characters": len(prompt)}):
+                    if self.balancer:
+                        complete_response = await self.balancer.run(lambda url: self._generate(url, data))
+                    else:
+                        complete_response = await self._generate(self.api_url, data)
 
+            with metrics.measure(metrics.RESPONSE_PARSE):
+                json_response = self.response_processor.get_json(complete_response)
+
+                if not json_response:
+                    self.logger.log_error("Received empty or invalid JSON from Ollama API.")
+                    self.logger.log_error(f"Failed data: {data}, Response: {complete_response}")
+                    raise ValueError(f"Invalid JSON response from Ollama API: {complete_response}")
+
+                metadata = ExtractedMetadata.from_json(json_response)
+            if cache_key:
+                await asyncio.to_thread(self.result_cache.put, cache_key, metadata)
             return metadata
 
-        except requests.exceptions.RequestException as e:
+        except httpx.HTTPError as e:
             self.logger.log_error(f"HTTP error calling Ollama API: {e}")
             raise
         except json.JSONDecodeError as e:
@@ -59,3 +136,20 @@ class OllamaService:
         except Exception as e:
             self.logger.log_error(f"Unexpected error calling Ollama API: {e}")
             raise
+
+    async def _generate(self, url, data):
+        started_at = time.perf_counter()
+        async with self.client.stream("POST", url, json=data) as responses:
+            responses.raise_for_status()
+            # Structured output ends with the object, the final chunk with the token counts follows right after
+            return await self.response_processor.process(responses, started_at, data.get("prompt"),
+                                                         read_until_done="format" in data)
+
+    async def _load_model(self, url, data):
+        try:
+            response = await self.client.post(url, json=data)
+            response.raise_for_status()
+            return True
+        except httpx.HTTPError as e:
+            self.logger.log_error(f"Error loading model {self.model_name} on {url}: {e}")
+            return False
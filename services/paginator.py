@@ -0,0 +1,61 @@
+import asyncio
+import math
+
+import httpx
+
+
+class Paginator:
+    def __init__(self, client: httpx.AsyncClient, page_size=1000, concurrency=4):
+        self.client = client
+        self.page_size = page_size
+        self.concurrency = concurrency
+
+    async def iterate(self, url, headers, params=None):
+        """
+        Yield every result of a paginated Paperless list endpoint.
+        Once the first page reveals the total count, the remaining pages are fetched in parallel and
+        yielded as they arrive; without a count the `next` links are followed one by one.
+        """
+        params = {**(params or {}), "page_size": self.page_size}
+        first_page = await self._get_page(url, headers, params)
+
+        for item in first_page["results"]:
+            yield item
+
+        if not first_page.get("next"):
+            return
+
+        count = first_page.get("count")
+        # The server may cap page_size, so the real page length comes from the first page
+        page_length = len(first_page["results"])
+        if count is None or page_length == 0:
+            async for item in self._follow_next_links(first_page["next"], headers):
+                yield item
+            return
+
+        semaphore = asyncio.Semaphore(self.concurrency)
+        tasks = [asyncio.create_task(self._get_page_bounded(url, headers, {**params, "page": page}, semaphore))
+                 for page in range(2, math.ceil(count / page_length) + 1)]
+        try:
+            for next_page in asyncio.as_completed(tasks):
+                for item in (await next_page)["results"]:
+                    yield item
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    async def _follow_next_links(self, next_url, headers):
+        while next_url:
+            page = await self._get_page(next_url, headers)
+            for item in page["results"]:
+                yield item
+            next_url = page.get("next")
+
+    async def _get_page_bounded(self, url, headers, params, semaphore):
+        async with semaphore:
+            return await self._get_page(url, headers, params)
+
+    async def _get_page(self, url, headers, params=None):
+        response = await self.client.get(url, headers=headers, params=params)
+        response.raise_for_status()
+        return response.json()
@@ -18,12 +18,12 @@ class PaperlessService:
         self.correspondent_service = correspondent_service
         self.document_type_service = document_type_service
 
-    def post_process(self, document: Document, metadata: ExtractedMetadata):
+    async def post_process(self, document: Document, metadata: ExtractedMetadata):
         title = metadata.title or document.title
         date = metadata.created_date or document.created_date
-        tag_ids = self.get_tag_ids(document.tag_ids, metadata.tags)
-        correspondent_id = document.correspondent_id or self.get_correspondent_id(metadata.correspondent)
-        document_type_id = document.document_type_id or self.get_document_type_id(metadata.document_type)
+        tag_ids = await self.get_tag_ids(document.tag_ids, metadata.tags)
+        correspondent_id = document.correspondent_id or await self.get_correspondent_id(metadata.correspondent)
+        document_type_id = document.document_type_id or await self.get_document_type_id(metadata.document_type)
 
         post_processed_document = PostProcessedDocument(
             title=title,
@@ -35,39 +35,46 @@ class PaperlessService:
 
         return post_processed_document
 
-    def get_tag_ids(self, document_tag_ids, processed_tags):
-        existing_tags = set(self.tag_service.get_tag_names_by_ids(document_tag_ids))
-        combined_tags = set(existing_tags.union([tag.lower() for tag in processed_tags]))
-
-        existing_tag_ids = self.tag_service.get_tag_ids_by_names(combined_tags)
-        new_tags = combined_tags - set(self.tag_service.get_tag_names_by_ids(existing_tag_ids))
+    async def get_tag_ids(self, document_tag_ids, processed_tags):
+        """
+        Keep the document's tags and add the extracted ones, creating the tags that do not exist yet.
+        """
+        tag_ids = list(dict.fromkeys(document_tag_ids))
+        new_tags = []
+        for tag in processed_tags:
+            tag_id = await self.tag_service.get_tag_id_by_name(tag)
+            if tag_id is None:
+                if tag.lower() not in new_tags:
+                    new_tags.append(tag.lower())
+            elif tag_id not in tag_ids:
+                tag_ids.append(tag_id)
 
         if not new_tags:
-            return existing_tag_ids
+            return tag_ids
 
-        new_tag_ids = self.tag_service.create_tags(new_tags)
-        return existing_tag_ids + new_tag_ids
+        new_tag_ids = await self.tag_service.create_tags(new_tags)
+        return tag_ids + [tag_id for tag_id in new_tag_ids if tag_id not in tag_ids]
 
-    def get_correspondent_id(self, correspondent):
+    async def get_correspondent_id(self, correspondent):
         if correspondent:
-            correspondent_id = self.correspondent_service.get_correspondent_id_by_name(correspondent)
+            correspondent_id = await self.correspondent_service.get_correspondent_id_by_name(correspondent)
 
             if correspondent_id:
                 return correspondent_id
 
-            correspondent_id = self.correspondent_service.create_correspondent(correspondent)
+            correspondent_id = await self.correspondent_service.create_correspondent(correspondent)
             return correspondent_id
 
         return None
 
-    def get_document_type_id(self, document_type):
+    async def get_document_type_id(self, document_type):
         if document_type:
-            document_type_id = self.document_type_service.get_document_type_id_by_name(document_type)
+            document_type_id = await self.document_type_service.get_document_type_id_by_name(document_type)
 
             if document_type_id:
                 return document_type_id
 
-            document_type_id = self.document_type_service.create_document_type(document_type)
+            document_type_id = await self.document_type_service.create_document_type(document_type)
             return document_type_id
 
         return None
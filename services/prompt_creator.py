@@ -1,41 +1,154 @@
+from string import Formatter
+
+import metrics
 from file_loader import FileLoader
 from logger import Logger
 from services.correspondent_service import CorrespondentService
 from services.document_type_service import DocumentTypeService
 from services.tag_service import TagService
+from services.taxonomy_ranker import TaxonomyRanker, get_terms
+from services.text_truncator import TextTruncator
+from tracing import tracer
+
+# Renders the taxonomy in the order Paperless returns it
+TEMPLATE_LAYOUT = 'template'
+# Renders the taxonomy sorted, so the prompt prefix is byte-identical between documents and Ollama can reuse its cache
+STABLE_LAYOUT = 'stable'
+
+TAXONOMY_FIELDS = ('existing_tags', 'existing_types', 'existing_correspondents')
 
 
 class PromptCreator:
-    def __init__(self, logger: Logger, prompt_file_path, truncate_number, file_loader: FileLoader,
+    def __init__(self, logger: Logger, prompt_file_path, text_truncator: TextTruncator, file_loader: FileLoader,
                  tag_service: TagService, correspondent_service: CorrespondentService,
-                 document_type_service: DocumentTypeService):
+                 document_type_service: DocumentTypeService, layout=TEMPLATE_LAYOUT,
+                 taxonomy_ranker: TaxonomyRanker = None):
         self.logger = logger
         self.file_loader = file_loader
         self.prompt_file_path = prompt_file_path
-        self.truncate_number = truncate_number
+        self.text_truncator = text_truncator
         self.tag_service = tag_service
         self.correspondent_service = correspondent_service
         self.document_type_service = document_type_service
+        self.layout = layout
+        # Without a ranker every prompt contains the complete taxonomy
+        self.taxonomy_ranker = taxonomy_ranker
+        self.formatter = Formatter()
+
+        # Parsed template, reloaded when the prompt file changes
+        self.template = None
+        self.template_mtime = None
+        self.template_version = 0
+
+        # Template rendered with the taxonomy, split where the document text goes
+        self.prompt_parts = None
+        self.prompt_parts_key = None
 
         if not self.prompt_file_path:
             raise ValueError("Environment variable 'OLLAMA_PROMPT_FILE' is not set or empty")
 
-    def create_prompt(self, ocr_text):
-        existing_tags = self.tag_service.get_all_names()
-        correspondent_name = self.correspondent_service.get_all_names()
-        document_type_name = self.document_type_service.get_all_names()
+        if self.layout not in (TEMPLATE_LAYOUT, STABLE_LAYOUT):
+            raise ValueError(f"Unknown prompt layout '{self.layout}', expected '{TEMPLATE_LAYOUT}' or '{STABLE_LAYOUT}'")
+
+    async def create_prompt(self, ocr_text):
+        with metrics.measure(metrics.PROMPT_BUILD), tracer.span('create_prompt'):
+            truncated_text = self.text_truncator.truncate(ocr_text)
+
+            if self.taxonomy_ranker:
+                prompt_parts = await self._get_ranked_prompt_parts(truncated_text)
+            else:
+                prompt_parts = await self._get_prompt_parts()
+            return truncated_text.join(prompt_parts)
+
+    def reload(self):
+        self.template = None
+
+    async def _get_prompt_parts(self):
+        template = self._get_template()
+        key = (self.template_version,
+               await self.tag_service.get_version(),
+               await self.correspondent_service.get_version(),
+               await self.document_type_service.get_version())
+
+        reuse = self.prompt_parts is not None and key == self.prompt_parts_key
+        metrics.record_cache_lookup('prompt', reuse)
+        if not reuse:
+            self.prompt_parts = self._render(template, {
+                'existing_tags': self._join_to_string(self._order(await self.tag_service.get_all_names())),
+                'existing_types': self._join_to_string(self._order(await self.document_type_service.get_all_names())),
+                'existing_correspondents': self._join_to_string(
+                    self._order(await self.correspondent_service.get_all_names())),
+            })
+            self.prompt_parts_key = key
+
+        return self.prompt_parts
+
+    async def _get_ranked_prompt_parts(self, truncated_text):
+        """
+        Renders the template with the taxonomy entries relevant to this document only. The prompt prefix then
+        differs between documents, so Ollama cannot reuse it.
+        """
+        template = self._get_template()
+        document_terms = get_terms(truncated_text)
+
+        values = {}
+        for field_name, service in (('existing_tags', self.tag_service),
+                                    ('existing_types', self.document_type_service),
+                                    ('existing_correspondents', self.correspondent_service)):
+            names = self.taxonomy_ranker.select(field_name, await service.get_version(),
+                                                await service.get_all_items(), document_terms)
+            values[field_name] = self._join_to_string(self._order(names))
+
+        return self._render(template, values)
+
+    def _get_template(self):
+        mtime = self.file_loader.get_mtime(self.prompt_file_path)
+        if self.template is None or mtime != self.template_mtime:
+            self.template = list(self.formatter.parse(self._load_prompt()))
+            self.template_mtime = mtime
+            self.template_version += 1
+            if self.layout == STABLE_LAYOUT:
+                self._check_stable_prefix(self.template)
+        return self.template
+
+    def _check_stable_prefix(self, template):
+        field_names = [field_name for _, field_name, _, _ in template if field_name is not None]
+        if 'truncated_text' not in field_names:
+            return
+
+        text_position = field_names.index('truncated_text')
+        if any(field_name in TAXONOMY_FIELDS for field_name in field_names[text_position:]):
+            self.logger.log("Prompt template places taxonomy lists after {truncated_text}, "
+                            "only the part before the document text can be reused by Ollama's prompt cache.")
+
+    def _order(self, names):
+        if self.layout == STABLE_LAYOUT:
+            return sorted(names, key=lambda name: (name.casefold(), name))
+        return names
 
-        words = ocr_text.split()
-        truncated_text = ' '.join(words[:self.truncate_number])
+    def _render(self, template, values):
+        """
+        Render every placeholder of the parsed template except {truncated_text}, with the same semantics as
+        str.format. Returns the rendered text split at {truncated_text}, so the prompt is the document text
+        joined with these parts.
+        """
+        parts = []
+        current = []
+        for literal_text, field_name, format_spec, conversion in template:
+            current.append(literal_text)
+            if field_name is None:
+                continue
+            if field_name == 'truncated_text':
+                parts.append(''.join(current))
+                current = []
+                continue
 
-        prompt_template = self._load_prompt()
+            value, _ = self.formatter.get_field(field_name, (), values)
+            value = self.formatter.convert_field(value, conversion)
+            current.append(self.formatter.format_field(value, format_spec))
 
-        return prompt_template.format(
-            truncated_text=truncated_text,
-            existing_tags=self._join_to_string(existing_tags),
-            existing_types=self._join_to_string(document_type_name),
-            existing_correspondents=self._join_to_string(correspondent_name),
-        )
+        parts.append(''.join(current))
+        return parts
 
     def _load_prompt(self):
         prompt_content = self.file_loader.load(self.prompt_file_path)
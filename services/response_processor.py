@@ -1,7 +1,73 @@
 import json
+import math
 import re
+import time
 
+import metrics
 from logger import Logger
+from services.text_truncator import CHARACTERS_PER_TOKEN
+
+
+class JsonObjectScanner:
+    """
+    Follows streamed text to find where the first top-level JSON object ends, without re-scanning earlier chunks.
+    """
+    SPECIAL_CHARACTERS = re.compile(r'[{}"\\]')
+
+    def __init__(self):
+        self.offset = 0
+        self.depth = 0
+        self.in_string = False
+        self.skip_until = 0
+        self.start = None
+        self.end = None
+        # Text of the last chunk after a closed object, scanned by the next call
+        self.remainder = ''
+
+    def feed(self, chunk):
+        """
+        Returns True once the object opened by the first top-level '{' has been closed. After reset(), feed('')
+        scans the rest of the chunk the object was closed in.
+        """
+        chunk = self.remainder + chunk
+        self.remainder = ''
+        for match in self.SPECIAL_CHARACTERS.finditer(chunk):
+            position = self.offset + match.start()
+            # The character after a backslash is escaped, it may be the first one of the next chunk
+            if position < self.skip_until:
+                continue
+
+            character = match.group()
+            if self.in_string:
+                if character == '\\':
+                    self.skip_until = position + 2
+                elif character == '"':
+                    self.in_string = False
+            elif character == '"':
+                # Quotes in text around the object do not start strings
+                self.in_string = self.depth > 0
+            elif character == '{':
+                if self.depth == 0:
+                    self.start = position
+                self.depth += 1
+            elif character == '}' and self.depth > 0:
+                self.depth -= 1
+                if self.depth == 0:
+                    self.end = position + 1
+                    self.remainder = chunk[match.end():]
+                    self.offset += match.end()
+                    return True
+
+        self.offset += len(chunk)
+        return False
+
+    def reset(self):
+        """
+        Forget the object found so far and keep looking for the next one.
+        """
+        self.start = None
+        self.end = None
+
 
 class ResponseProcessor:
     def __init__(self, logger: Logger):
@@ -9,28 +75,84 @@ class ResponseProcessor:
 
     def get_json(self, response):
         try:
+            # The streamed response normally is the bare object already, so it is parsed only once
+            json_response = json.loads(response)
+        except json.JSONDecodeError:
+            json_response = None
+
+        if not isinstance(json_response, dict):
             extracted_json = self._extract_json(response)
-            return json.loads(extracted_json)
-        except json.JSONDecodeError as e:
-            self.logger.log_error(f"Extracted content is not valid JSON. Error: {e}. Raw response: {response}")
-            raise ValueError("Extracted content is not valid JSON.")
+            try:
+                json_response = json.loads(extracted_json)
+            except json.JSONDecodeError as e:
+                self.logger.log_error(f"Extracted content is not valid JSON. Error: {e}. Raw response: {response}")
+                raise ValueError("Extracted content is not valid JSON.")
+
+        self.logger.log_debug(f"Extracted valid JSON content: {json_response}")
+        return json_response
+
+    async def process(self, responses, started_at=None, prompt=None, read_until_done=False):
+        """
+        Collect the streamed response until the first complete JSON object has been generated. Returning early
+        closes the stream, which makes Ollama stop generating whatever the model adds after the object.
+        `started_at` is the perf_counter() time the request was sent, for the time to first token. With
+        `read_until_done`, e.g. for structured output where nothing follows the object, the stream is read up to
+        Ollama's final chunk for its token counts, otherwise the prompt size is estimated from `prompt`.
+        """
+        parts = []
+        scanner = JsonObjectScanner()
+        json_object = None
 
-    def process(self, responses):
-        full_response = ""
+        async for line in responses.aiter_lines():
+            if not line:
+                continue
 
-        for line in responses.iter_lines():
-            if line:
-                full_response += self.get_response_part(line)
+            chunk = self._parse_chunk(line)
+            if not parts and started_at is not None:
+                metrics.OLLAMA_TIME_TO_FIRST_TOKEN.observe(time.perf_counter() - started_at)
+            part = chunk.get('response', "")
+            parts.append(part)
+            if chunk.get('done'):
+                self._record_token_counts(chunk, len(parts), prompt)
+            found = json_object is None and scanner.feed(part)
+            while found:
+                response_text = ''.join(parts)
+                candidate = response_text[scanner.start:scanner.end]
+                # Braces in prose such as "{title}" are not an object, JSON objects start with a key or are empty
+                if candidate[1:].lstrip()[:1] in ('"', '}'):
+                    json_object = candidate
+                    break
+                # An object may follow in the same chunk
+                scanner.reset()
+                found = scanner.feed('')
+            if json_object is not None and (chunk.get('done') or not read_until_done):
+                if not chunk.get('done'):
+                    self._record_token_counts({}, len(parts), prompt)
+                return json_object
 
-        return full_response
+        return json_object if json_object is not None else ''.join(parts)
 
     def get_response_part(self, line):
+        return self._parse_chunk(line).get('response', "")
+
+    def _parse_chunk(self, line):
         try:
-            return json.loads(line).get('response', "")
+            return json.loads(line)
         except json.JSONDecodeError as e:
             self.logger.log_error(f"Error parsing response from Ollama API: {e}. Chunk: {line}")
             raise
 
+    def _record_token_counts(self, final_chunk, chunk_count, prompt=None):
+        """
+        Only the final chunk carries Ollama's token counts. When the stream is closed early the prompt size is
+        estimated from its characters and every streamed chunk is counted as one generated token.
+        """
+        if 'prompt_eval_count' in final_chunk:
+            metrics.OLLAMA_PROMPT_TOKENS.observe(final_chunk['prompt_eval_count'])
+        elif prompt is not None:
+            metrics.OLLAMA_PROMPT_TOKENS.observe(math.ceil(len(prompt) / CHARACTERS_PER_TOKEN))
+        metrics.OLLAMA_OUTPUT_TOKENS.observe(final_chunk.get('eval_count', chunk_count))
+
     def _extract_json(self, response_text):
         cleaned_response = re.sub(r'```json|```|``|\'\'|[^\x00-\x7F]+', '', response_text, flags=re.DOTALL).strip()
 
@@ -39,14 +161,7 @@ class ResponseProcessor:
         end_index = cleaned_response.rfind('}')
 
         if start_index != -1 and end_index != -1:
-            json_content = cleaned_response[start_index:end_index + 1].strip()
-            try:
-                json.loads(json_content)
-                self.logger.log(f"Extracted valid JSON content: {json_content}")
-                return json_content
-            except json.JSONDecodeError as e:
-                self.logger.log_error(f"Extracted content is not valid JSON: {json_content}. Error: {e}")
-                raise ValueError("Extracted content is not valid JSON.")
+            return cleaned_response[start_index:end_index + 1].strip()
         else:
             self.logger.log_error(f"Could not find valid JSON structure in the response: {response_text}")
             raise ValueError("No valid JSON found in the response.")
@@ -0,0 +1,50 @@
+import hashlib
+import json
+import time
+from dataclasses import asdict
+
+from models.extracted_metadata import ExtractedMetadata
+from services.sqlite_database import SqliteDatabase
+
+
+class SqliteResultCache:
+    """
+    Persists the metadata extracted for a generate request, so an identical request is answered without Ollama.
+    Holds at most `max_entries` results and evicts the least recently used ones.
+    """
+
+    def __init__(self, db_file, max_entries):
+        self.database = SqliteDatabase(db_file)
+        self.max_entries = max_entries
+
+        with self.database.transaction() as connection:
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS results ("
+                "key TEXT PRIMARY KEY, metadata TEXT NOT NULL, used_at REAL NOT NULL)"
+            )
+            connection.execute("CREATE INDEX IF NOT EXISTS results_used_at ON results (used_at)")
+
+    @staticmethod
+    def get_key(data):
+        """
+        Hash of everything in the generate request that influences the answer: the model, the rendered prompt
+        (template, taxonomy and document text) and the generation options.
+        """
+        relevant = {key: value for key, value in data.items() if key != "keep_alive"}
+        return hashlib.sha256(json.dumps(relevant, sort_keys=True).encode("utf-8")).hexdigest()
+
+    def get(self, key):
+        with self.database.transaction() as connection:
+            row = connection.execute("SELECT metadata FROM results WHERE key = ?", (key,)).fetchone()
+            if not row:
+                return None
+            connection.execute("UPDATE results SET used_at = ? WHERE key = ?", (time.time(), key))
+        return ExtractedMetadata(**json.loads(row[0]))
+
+    def put(self, key, metadata: ExtractedMetadata):
+        with self.database.transaction() as connection:
+            connection.execute("INSERT OR REPLACE INTO results VALUES (?, ?, ?)",
+                               (key, json.dumps(asdict(metadata)), time.time()))
+            connection.execute(
+                "DELETE FROM results WHERE key IN "
+                "(SELECT key FROM results ORDER BY used_at DESC LIMIT -1 OFFSET ?)", (self.max_entries,))
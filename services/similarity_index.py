@@ -0,0 +1,87 @@
+import hashlib
+import json
+import re
+from dataclasses import asdict
+
+from models.extracted_metadata import ExtractedMetadata
+from services.sqlite_database import SqliteDatabase
+
+FINGERPRINT_BITS = 64
+# Consecutive words hashed together, so the fingerprint reflects the layout and not only the vocabulary
+SHINGLE_SIZE = 3
+# Shorter texts do not have enough shingles for a meaningful fingerprint
+MIN_SHINGLES = 20
+# Maps every byte value to whether the bit is set, per bit of a byte
+_BIT_TABLES = [bytes(value >> bit & 1 for value in range(256)) for bit in range(8)]
+
+
+def get_fingerprint(text):
+    """
+    SimHash of the word shingles of `text`. Numbers are ignored, so documents only differing in amounts and
+    dates get the same or a close fingerprint. Returns None for texts too short to compare.
+    """
+    words = [re.sub(r'\d+', '0', word) for word in re.findall(r'\w+', text.lower())]
+    shingles = {' '.join(words[i:i + SHINGLE_SIZE]) for i in range(len(words) - SHINGLE_SIZE + 1)}
+    if len(shingles) < MIN_SHINGLES:
+        return None
+
+    # Counts how many shingle hashes have each bit set, one C-level pass over the digests per bit
+    digests = b''.join(hashlib.blake2b(shingle.encode('utf-8'), digest_size=8).digest() for shingle in shingles)
+    fingerprint = 0
+    for byte_index in range(FINGERPRINT_BITS // 8):
+        column = digests[byte_index::8]
+        for bit, table in enumerate(_BIT_TABLES):
+            # A bit is set when more hashes have it set than not
+            if 2 * column.translate(table).count(1) > len(shingles):
+                fingerprint |= 1 << (FINGERPRINT_BITS - 8 * (byte_index + 1) + bit)
+    return fingerprint
+
+
+class SimilarityIndex:
+    def __init__(self, max_distance, db_file=None):
+        """
+        Finds the metadata of a document whose fingerprint differs in at most `max_distance` bits.
+        The fingerprint is split into max_distance + 1 bands: two fingerprints that close share at least one
+        band exactly, so only the entries sharing a band are compared. Entries are persisted in the optional
+        SQLite `db_file`.
+        """
+        self.max_distance = max_distance
+        band_count = max_distance + 1
+        band_width = FINGERPRINT_BITS // band_count
+        self.band_offsets = [index * band_width for index in range(band_count)]
+        # The last band takes the remaining bits
+        self.band_widths = [band_width] * (band_count - 1) + [FINGERPRINT_BITS - self.band_offsets[-1]]
+        self.bands = [{} for _ in range(band_count)]
+
+        self.database = None
+        if db_file:
+            self.database = SqliteDatabase(db_file)
+            with self.database.transaction() as connection:
+                connection.execute(
+                    "CREATE TABLE IF NOT EXISTS fingerprints (fingerprint TEXT PRIMARY KEY, metadata TEXT NOT NULL)")
+                rows = connection.execute("SELECT fingerprint, metadata FROM fingerprints").fetchall()
+            for fingerprint, metadata in rows:
+                self._index(int(fingerprint, 16), ExtractedMetadata(**json.loads(metadata)))
+
+    def find(self, fingerprint):
+        best_distance, best_metadata = None, None
+        for band, entries in zip(self._get_bands(fingerprint), self.bands):
+            for candidate, metadata in entries.get(band, ()):
+                distance = (candidate ^ fingerprint).bit_count()
+                if distance <= self.max_distance and (best_distance is None or distance < best_distance):
+                    best_distance, best_metadata = distance, metadata
+        return best_metadata
+
+    def add(self, fingerprint, metadata: ExtractedMetadata):
+        self._index(fingerprint, metadata)
+        if self.database:
+            with self.database.transaction() as connection:
+                connection.execute("INSERT OR REPLACE INTO fingerprints VALUES (?, ?)",
+                                   (format(fingerprint, 'x'), json.dumps(asdict(metadata))))
+
+    def _index(self, fingerprint, metadata):
+        for band, entries in zip(self._get_bands(fingerprint), self.bands):
+            entries.setdefault(band, []).append((fingerprint, metadata))
+
+    def _get_bands(self, fingerprint):
+        return [fingerprint >> offset & ((1 << width) - 1) for offset, width in zip(self.band_offsets, self.band_widths)]
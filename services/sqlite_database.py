@@ -0,0 +1,26 @@
+import sqlite3
+import threading
+from contextlib import contextmanager
+
+
+class SqliteDatabase:
+    """
+    SQLite connection shared by the stores. Calls arrive from the worker threads of asyncio.to_thread, so one
+    connection is opened for all threads and every statement runs under a lock.
+    """
+
+    def __init__(self, db_file):
+        self.connection = sqlite3.connect(db_file, check_same_thread=False)
+        self.lock = threading.Lock()
+
+    @contextmanager
+    def transaction(self):
+        """
+        Yields the connection for exclusive use and commits on exit, or rolls back if the block raises.
+        """
+        with self.lock, self.connection:
+            yield self.connection
+
+    def close(self):
+        with self.lock:
+            self.connection.close()
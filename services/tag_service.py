@@ -1,65 +1,112 @@
-import requests
+import asyncio
+
+import httpx
+
+from services.paginator import Paginator
+from services.taxonomy_cache import TaxonomyCache
 
 
 class TagService:
-    def __init__(self, logger, api_url, api_token):
+    def __init__(self, logger, client: httpx.AsyncClient, paginator: Paginator, api_url, api_token, cache_ttl=300,
+                 match_threshold=1, create_concurrency=4):
+        self.client = client
+        self.paginator = paginator
         self.api_url = api_url
         self.api_token = api_token
         self.logger = logger
+        self.cache = TaxonomyCache(self.iter_all, cache_ttl, match_threshold)
+        self.create_concurrency = create_concurrency
+        # Tags being created, keyed by lowercased name, so concurrent documents asking for the same tag share one POST
+        self.creating = {}
 
-    def get_all(self):
+    async def get_all(self):
+        return [tag async for tag in self.iter_all()]
+
+    async def iter_all(self):
         url = f"{self.api_url}/tags/"
         headers = {
             "Authorization": f"Token {self.api_token}"
         }
 
         try:
-            response = requests.get(url, headers=headers)
-            response.raise_for_status()
-            return response.json()["results"]
-        except requests.exceptions.RequestException as e:
+            async for tag in self.paginator.iterate(url, headers):
+                yield tag
+        except httpx.HTTPError as e:
             self.logger.log_error(f"Error fetching tags: {e}")
             raise
 
-    def get_all_names(self):
-        return [tag['name'] for tag in self.get_all()]
+    async def get_all_names(self):
+        return await self.cache.get_names()
 
-    def get_tag_names_by_ids(self, tag_ids):
-        all_tags = self.get_all()
-        tag_map = {tag['id']: tag['name'] for tag in all_tags}
+    async def get_all_items(self):
+        return await self.cache.get_items()
 
-        tag_names = [tag_map.get(tag_id) for tag_id in tag_ids if tag_map.get(tag_id) is not None]
-        return tag_names
+    async def get_version(self):
+        return await self.cache.get_version()
 
-    def get_tag_ids_by_names(self, tag_names):
+    async def get_tag_names_by_ids(self, tag_ids):
+        tag_names = [await self.cache.get_name_by_id(tag_id) for tag_id in tag_ids]
+        return [tag_name for tag_name in tag_names if tag_name is not None]
+
+    async def get_tag_id_by_name(self, tag_name):
+        return await self.cache.match_id(tag_name)
+
+    async def get_tag_ids_by_names(self, tag_names):
         """
         Retrieve tag IDs based on tag names.
         """
-        all_tags = self.get_all()
-        tag_map = {tag['name'].lower(): tag['id'] for tag in all_tags}
+        tag_ids = [await self.cache.get_id_by_name(tag_name) for tag_name in tag_names]
+        return [tag_id for tag_id in tag_ids if tag_id is not None]
+
+    async def create_tags(self, new_tags):
+        semaphore = asyncio.Semaphore(self.create_concurrency)
 
-        tag_ids = [tag_map.get(tag_name.lower()) for tag_name in tag_names if tag_map.get(tag_name.lower()) is not None]
-        return tag_ids
+        async def create(tag):
+            async with semaphore:
+                return await self.create_tag(tag)
 
-    def create_tags(self, new_tags):
+        return list(await asyncio.gather(*(create(tag) for tag in new_tags)))
+
+    async def create_tag(self, tag):
+        key = tag.lower()
+        task = self.creating.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self._create_tag(tag))
+            self.creating[key] = task
+            task.add_done_callback(lambda _: self.creating.pop(key, None))
+        # A caller being cancelled must not cancel the creation for the others waiting on it
+        return await asyncio.shield(task)
+
+    async def _create_tag(self, tag):
         url = f"{self.api_url}/tags/"
         headers = {
             "Authorization": f"Token {self.api_token}",
             "Content-Type": "application/json"
         }
-        created_tag_ids = []
-
-        for tag in new_tags:
-            data = {
-                "name": tag,
-                "matching_algorithm": 6  # set by default to automatic matching
-            }
-            try:
-                response = requests.post(url, json=data, headers=headers)
-                response.raise_for_status()
-                created_tag_ids.append(response.json()['id'])
-            except requests.exceptions.RequestException as e:
-                self.logger.log_error(f"Error creating tag '{tag}': {e}")
-                raise
-
-        return created_tag_ids
+        data = {
+            "name": tag,
+            "matching_algorithm": 6  # set by default to automatic matching
+        }
+        try:
+            response = await self.client.post(url, json=data, headers=headers)
+            if response.status_code == 400:
+                # Another worker or process may have created the tag since the cache was loaded
+                existing_tag = await self._find_tag(tag)
+                if existing_tag is not None:
+                    self.cache.add({'id': existing_tag['id'], 'name': existing_tag['name']})
+                    return existing_tag['id']
+            response.raise_for_status()
+            tag_id = response.json()['id']
+            self.cache.add({'id': tag_id, 'name': tag})
+            return tag_id
+        except httpx.HTTPError as e:
+            self.logger.log_error(f"Error creating tag '{tag}': {e}")
+            raise
+
+    async def _find_tag(self, tag):
+        response = await self.client.get(f"{self.api_url}/tags/",
+                                         params={"name__iexact": tag},
+                                         headers={"Authorization": f"Token {self.api_token}"})
+        response.raise_for_status()
+        results = response.json()["results"]
+        return results[0] if results else None
@@ -0,0 +1,97 @@
+import asyncio
+import time
+
+import metrics
+from services.taxonomy_matcher import TaxonomyMatcher
+from tracing import tracer
+
+
+class TaxonomyCache:
+    def __init__(self, fetch, ttl, match_threshold=1, strip_legal_forms=False):
+        """
+        In-process cache for a Paperless taxonomy list (tags, correspondents or document types).
+        `fetch` returns an async iterator over the full list, `ttl` is the lifetime in seconds (0 disables caching).
+        `match_threshold` is the similarity required by `match_id` and `strip_legal_forms` whether it ignores
+        legal forms, see TaxonomyMatcher.
+        """
+        self.fetch = fetch
+        self.ttl = ttl
+        self.match_threshold = match_threshold
+        self.strip_legal_forms = strip_legal_forms
+        self.items = []
+        self.names_by_id = {}
+        self.ids_by_name = {}
+        self.matcher = TaxonomyMatcher(match_threshold, strip_legal_forms)
+        self.fetched_at = None
+        # Incremented whenever the entries change, lets consumers reuse what they derived from them
+        self.version = 0
+        self._lock = asyncio.Lock()
+
+    async def get_items(self):
+        await self._ensure_fresh()
+        return self.items
+
+    async def get_names(self):
+        await self._ensure_fresh()
+        return [item['name'] for item in self.items]
+
+    async def get_name_by_id(self, item_id):
+        await self._ensure_fresh()
+        return self.names_by_id.get(item_id)
+
+    async def get_id_by_name(self, name):
+        await self._ensure_fresh()
+        return self.ids_by_name.get(name.lower())
+
+    async def match_id(self, name):
+        """
+        Like get_id_by_name, but also finds entries with a similar name, e.g. "Telekom" for "Telekom GmbH".
+        """
+        await self._ensure_fresh()
+        exact_id = self.ids_by_name.get(name.lower())
+        return exact_id if exact_id is not None else self.matcher.find(name)
+
+    async def get_version(self):
+        await self._ensure_fresh()
+        return self.version
+
+    def add(self, item):
+        self.items.append(item)
+        self._index(item)
+        self.matcher.add(item)
+        self.version += 1
+
+    def invalidate(self):
+        self.fetched_at = None
+
+    async def _ensure_fresh(self):
+        if self._is_fresh():
+            return
+
+        async with self._lock:
+            # Another coroutine may have refreshed the cache while this one was waiting for the lock
+            if self._is_fresh():
+                return
+
+            # Index the entries page by page as they arrive, then swap them in once the list is complete
+            items, names_by_id, ids_by_name = [], {}, {}
+            matcher = TaxonomyMatcher(self.match_threshold, self.strip_legal_forms)
+            with metrics.measure(metrics.TAXONOMY_FETCH), tracer.span('taxonomy_fetch') as span:
+                async for item in self.fetch():
+                    items.append(item)
+                    names_by_id[item['id']] = item['name']
+                    ids_by_name[item['name'].lower()] = item['id']
+                    matcher.add(item)
+                if span:
+                    span.attributes['items'] = len(items)
+
+            self.items, self.names_by_id, self.ids_by_name, self.matcher = items, names_by_id, ids_by_name, matcher
+            self.fetched_at = time.monotonic()
+            self.version += 1
+
+    def _is_fresh(self):
+        return self.fetched_at is not None and time.monotonic() - self.fetched_at < self.ttl
+
+    def _index(self, item):
+        self.names_by_id[item['id']] = item['name']
+        self.ids_by_name[item['name'].lower()] = item['id']
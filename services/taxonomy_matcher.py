@@ -0,0 +1,82 @@
+import re
+import unicodedata
+from collections import Counter
+from difflib import SequenceMatcher
+
+# Company legal forms, "Telekom GmbH" and "Telekom" name the same correspondent
+LEGAL_FORMS = {'ag', 'co', 'eg', 'ev', 'gbr', 'gmbh', 'inc', 'kg', 'kgaa', 'llc', 'ltd', 'mbh', 'ohg', 'plc', 'sa',
+               'se', 'srl', 'ug'}
+# Shorter names are only matched exactly, one differing letter changes them too much
+MIN_FUZZY_LENGTH = 4
+# Entries sharing the most trigrams with the name that are scored
+MAX_CANDIDATES = 20
+
+
+def normalize(name, strip_legal_forms=False):
+    """
+    Folds case, accents and punctuation: "Müller & Co. KG" -> "muller co kg". With `strip_legal_forms`, for
+    company names, legal forms are dropped as well: "Müller & Co. KG" -> "muller".
+    """
+    decomposed = unicodedata.normalize('NFKD', name.casefold())
+    without_accents = ''.join(character for character in decomposed if not unicodedata.combining(character))
+    words = re.findall(r'\w+', without_accents.replace('.', ''))
+    if not strip_legal_forms:
+        return ' '.join(words)
+    significant = [word for word in words if word not in LEGAL_FORMS]
+    # A name consisting only of legal forms is kept as it is
+    return ' '.join(significant or words)
+
+
+def _get_numbers(normalized_name):
+    return re.findall(r'\d+', normalized_name)
+
+
+def _get_trigrams(normalized_name):
+    padded = f'  {normalized_name} '
+    return {padded[index:index + 3] for index in range(len(padded) - 2)}
+
+
+class TaxonomyMatcher:
+    def __init__(self, threshold, strip_legal_forms=False):
+        """
+        Finds the entry of a taxonomy list whose name matches a name returned by the LLM. Names are compared
+        normalized, and entries sharing trigrams with the name are scored by their similarity ratio, the best
+        one at or above `threshold` (0 to 1, 1 only matches equal normalized names) is returned. Names containing
+        different numbers are never matched fuzzily, "Steuer 2024" is not a misspelling of "Steuer 2023".
+        `strip_legal_forms` ignores legal forms such as GmbH, only meant for correspondents: in a tag "SE" or
+        "EV" is a significant word.
+        """
+        self.threshold = threshold
+        self.strip_legal_forms = strip_legal_forms
+        self.ids_by_normalized_name = {}
+        self.ids_by_trigram = {}
+
+    def add(self, item):
+        normalized_name = normalize(item['name'], self.strip_legal_forms)
+        self.ids_by_normalized_name.setdefault(normalized_name, item['id'])
+        for trigram in _get_trigrams(normalized_name):
+            self.ids_by_trigram.setdefault(trigram, {})[normalized_name] = item['id']
+
+    def find(self, name):
+        normalized_name = normalize(name, self.strip_legal_forms)
+        if normalized_name in self.ids_by_normalized_name:
+            return self.ids_by_normalized_name[normalized_name]
+        if self.threshold >= 1 or len(normalized_name) < MIN_FUZZY_LENGTH:
+            return None
+
+        numbers = _get_numbers(normalized_name)
+        shared_trigrams = Counter()
+        candidate_ids = {}
+        for trigram in _get_trigrams(normalized_name):
+            entries = self.ids_by_trigram.get(trigram, {})
+            shared_trigrams.update(entries.keys())
+            candidate_ids.update(entries)
+
+        best_id, best_score = None, 0
+        for candidate_name, _ in shared_trigrams.most_common(MAX_CANDIDATES):
+            if len(candidate_name) < MIN_FUZZY_LENGTH or _get_numbers(candidate_name) != numbers:
+                continue
+            score = SequenceMatcher(None, normalized_name, candidate_name).ratio()
+            if score >= self.threshold and score > best_score:
+                best_id, best_score = candidate_ids[candidate_name], score
+        return best_id
@@ -0,0 +1,78 @@
+import math
+from collections import Counter
+
+from services.taxonomy_matcher import normalize
+from services.text_truncator import CHARACTERS_PER_TOKEN
+
+# BM25 term frequency saturation
+K1 = 1.2
+# Weight of log(1 + document_count), prefers frequently used entries among equally relevant ones
+USAGE_WEIGHT = 0.1
+
+
+def get_terms(text):
+    return Counter(normalize(text, strip_legal_forms=True).split())
+
+
+class TaxonomyIndex:
+    def __init__(self, items):
+        """
+        Inverted index over the names of a taxonomy list. Every name is treated as a small BM25 document,
+        the document text being processed is the query.
+        """
+        self.names = [item['name'] for item in items]
+        self.usage = [USAGE_WEIGHT * math.log1p(item.get('document_count') or 0) for item in items]
+        # Separator ", " included
+        self.costs = [math.ceil((len(name) + 2) / CHARACTERS_PER_TOKEN) for name in self.names]
+
+        self.positions_by_term = {}
+        for position, name in enumerate(self.names):
+            for term in set(normalize(name, strip_legal_forms=True).split()):
+                self.positions_by_term.setdefault(term, []).append(position)
+
+        count = len(self.names)
+        self.idf = {term: math.log(1 + (count - len(positions) + 0.5) / (len(positions) + 0.5))
+                    for term, positions in self.positions_by_term.items()}
+
+    def select(self, document_terms, token_budget, top_k=0):
+        """
+        Returns the names most relevant to the document, as many as fit into `token_budget` estimated tokens
+        and at most `top_k` (0 for no limit).
+        """
+        scores = list(self.usage)
+        for term, frequency in document_terms.items():
+            positions = self.positions_by_term.get(term)
+            if positions:
+                weight = self.idf[term] * frequency * (K1 + 1) / (frequency + K1)
+                for position in positions:
+                    scores[position] += weight
+
+        selected = []
+        remaining = token_budget
+        for position in sorted(range(len(scores)), key=lambda position: -scores[position]):
+            if top_k and len(selected) == top_k:
+                break
+            if self.costs[position] > remaining:
+                continue
+            selected.append(self.names[position])
+            remaining -= self.costs[position]
+        return selected
+
+
+class TaxonomyRanker:
+    def __init__(self, token_budget, top_k=0):
+        """
+        Selects the taxonomy entries relevant to a document, so the prompt size stays the same as the
+        taxonomy grows. `token_budget` applies to each list.
+        """
+        self.token_budget = token_budget
+        self.top_k = top_k
+        # Index per taxonomy list with the version of the list it was built from
+        self.indexes = {}
+
+    def select(self, key, version, items, document_terms):
+        cached = self.indexes.get(key)
+        if cached is None or cached[0] != version:
+            cached = (version, TaxonomyIndex(items))
+            self.indexes[key] = cached
+        return cached[1].select(document_terms, self.token_budget, self.top_k)
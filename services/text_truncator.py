@@ -0,0 +1,120 @@
+import math
+import re
+
+# The budget counts words
+WORD_UNIT = 'words'
+# The budget counts estimated LLM tokens
+TOKEN_UNIT = 'tokens'
+
+# Keeps the beginning of the document
+HEAD_STRATEGY = 'head'
+# Keeps the beginning and the end, e.g. for totals and signatures on the last page
+HEAD_TAIL_STRATEGY = 'head_tail'
+# Keeps the beginning of the first pages only
+PAGES_STRATEGY = 'pages'
+
+# Rough average for the languages of our documents, tokenizers differ per model
+CHARACTERS_PER_TOKEN = 4
+# Pages of the OCR text are separated by form feeds
+PAGE_SEPARATOR = '\f'
+# Marks the text left out between head and tail
+OMISSION = '...'
+
+_WORD = re.compile(r'\S+')
+# Size of the pieces the tail is scanned in from the end of the text
+_TAIL_CHUNK_SIZE = 4096
+
+
+class TextTruncator:
+    def __init__(self, budget, unit=WORD_UNIT, strategy=HEAD_STRATEGY, pages=1):
+        """
+        Shortens the OCR text to `budget` words or estimated tokens. The text is scanned only as far as needed,
+        so large documents are never split as a whole. Whitespace is normalized to single spaces.
+        """
+        self.budget = budget
+        self.unit = unit
+        self.strategy = strategy
+        self.pages = pages
+
+        if self.unit not in (WORD_UNIT, TOKEN_UNIT):
+            raise ValueError(f"Unknown truncation unit '{self.unit}', expected '{WORD_UNIT}' or '{TOKEN_UNIT}'")
+        if self.strategy not in (HEAD_STRATEGY, HEAD_TAIL_STRATEGY, PAGES_STRATEGY):
+            raise ValueError(f"Unknown truncation strategy '{self.strategy}', expected '{HEAD_STRATEGY}', "
+                             f"'{HEAD_TAIL_STRATEGY}' or '{PAGES_STRATEGY}'")
+
+    def truncate(self, text):
+        if self.strategy == PAGES_STRATEGY:
+            words, _ = self._get_head(text, self.budget, self._get_pages_end(text))
+            return ' '.join(words)
+
+        if self.strategy == HEAD_TAIL_STRATEGY:
+            head_budget = self.budget - self.budget // 2
+            words, head_end = self._get_head(text, head_budget)
+            tail, complete = self._get_tail(text, self.budget - head_budget, head_end)
+            if complete:
+                return ' '.join(words + tail)
+            return ' '.join(words + [OMISSION] + tail)
+
+        words, _ = self._get_head(text, self.budget)
+        return ' '.join(words)
+
+    def get_cost(self, word):
+        if self.unit == TOKEN_UNIT:
+            return math.ceil(len(word) / CHARACTERS_PER_TOKEN)
+        return 1
+
+    def _get_head(self, text, budget, end=None):
+        """
+        Returns the first words within the budget and the offset where the scan stopped. A first word exceeding
+        the budget, e.g. a URL or base64, is cut instead of leaving the text empty.
+        """
+        end = len(text) if end is None else end
+        words = []
+        cost = 0
+        for match in _WORD.finditer(text, 0, end):
+            word = match.group()
+            word_cost = self.get_cost(word)
+            if cost + word_cost > budget:
+                if not words and self.unit == TOKEN_UNIT and budget > 0:
+                    return [word[:budget * CHARACTERS_PER_TOKEN]], match.end()
+                return words, match.start()
+            cost += word_cost
+            words.append(word)
+        return words, end
+
+    def _get_tail(self, text, budget, start):
+        """
+        Returns the last words after `start` within the budget, scanning the text backwards in chunks, and
+        whether these are all words after `start`.
+        """
+        words = []
+        cost = 0
+        end = len(text)
+        while end > start:
+            chunk_start = max(start, end - _TAIL_CHUNK_SIZE)
+            # Move back to whitespace, so no word is cut in half at the chunk boundary
+            while chunk_start > start and not text[chunk_start - 1].isspace():
+                chunk_start -= 1
+
+            for word in reversed(_WORD.findall(text, chunk_start, end)):
+                word_cost = self.get_cost(word)
+                if cost + word_cost > budget:
+                    # Like in the head, a last word exceeding the budget is cut, keeping its end
+                    if not words and self.unit == TOKEN_UNIT and budget > 0:
+                        words.append(word[-budget * CHARACTERS_PER_TOKEN:])
+                    words.reverse()
+                    return words, False
+                cost += word_cost
+                words.append(word)
+            end = chunk_start
+
+        words.reverse()
+        return words, True
+
+    def _get_pages_end(self, text):
+        end = -1
+        for _ in range(self.pages):
+            end = text.find(PAGE_SEPARATOR, end + 1)
+            if end == -1:
+                return len(text)
+        return end
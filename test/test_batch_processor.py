@@ -0,0 +1,188 @@
+import unittest
+from unittest.mock import MagicMock, AsyncMock, Mock
+
+import httpx
+from prometheus_client import REGISTRY
+
+import metrics
+from batch_processor import BatchProcessor
+from models.batch_selection import BatchSelection
+from models.document import Document
+from models.extracted_metadata import ExtractedMetadata
+from models.processing_options import LOW_PRIORITY
+from models.postprocessed_document import PostProcessedDocument
+
+
+class TestBatchProcessor(unittest.IsolatedAsyncioTestCase):
+
+    def setUp(self):
+        self.mock_logger = MagicMock()
+        self.mock_document_service = AsyncMock()
+        self.mock_tag_service = AsyncMock()
+        self.mock_prompt_creator = AsyncMock()
+        self.mock_ollama_service = AsyncMock()
+        self.mock_paperless_service = AsyncMock()
+
+        self.batch_processor = BatchProcessor(
+            logger=self.mock_logger,
+            document_service=self.mock_document_service,
+            tag_service=self.mock_tag_service,
+            prompt_creator=self.mock_prompt_creator,
+            ollama=self.mock_ollama_service,
+            paperless=self.mock_paperless_service,
+            queue_size=1,
+            llm_workers=2,
+            fetch_chunk_size=2
+        )
+
+        self.mock_document_service.get_documents.side_effect = lambda doc_ids: [Document(
+            id=doc_id, title=f"Document {doc_id}", created_date=None, text=f"Text {doc_id}",
+            correspondent_id=None, document_type_id=None, tag_ids=[]
+        ) for doc_id in doc_ids]
+        self.mock_prompt_creator.create_prompt.side_effect = lambda text: f"Prompt for {text}"
+        self.mock_ollama_service.extract_metadata_from_prompt.return_value = ExtractedMetadata(
+            title="Title", created_date=None, correspondent=None, document_type=None, tags=[]
+        )
+        self.mock_paperless_service.post_process.side_effect = lambda document, metadata: PostProcessedDocument(
+            title=f"Processed {document.id}", created=None, correspondent=None, document_type=None, tags=[]
+        )
+
+    async def test_process_warms_up_model(self):
+        # Given: a batch processor with a model warmer
+        self.batch_processor.model_warmer = AsyncMock()
+
+        # When: a batch is processed
+        progress = await self.batch_processor.process([1, 2])
+
+        # Then: the model is loaded alongside the pipeline
+        self.batch_processor.model_warmer.warm_up.assert_awaited_once()
+        self.assertEqual(progress.processed, 2)
+
+    async def test_process_runs_every_document_through_all_stages(self):
+        # Given: a list of documents and a progress callback
+        on_progress = MagicMock()
+
+        # When: the batch is processed
+        progress = await self.batch_processor.process([1, 2, 3, 4, 5], on_progress=on_progress)
+
+        # Then: the documents are fetched in chunks and every one is updated with its own metadata at low priority
+        self.assertEqual([call.args[0] for call in self.mock_document_service.get_documents.await_args_list],
+                         [(1, 2), (3, 4), (5,)])
+        self.assertEqual(progress.processed, 5)
+        self.assertEqual(progress.get_completed(), 5)
+        self.assertIsNotNone(progress.finished_at)
+        self.assertEqual(on_progress.call_count, 5)
+        updates = {call.args[0]: call.args[1].title
+                   for call in self.mock_document_service.update_document.await_args_list}
+        self.assertEqual(updates, {doc_id: f"Processed {doc_id}" for doc_id in range(1, 6)})
+        self.mock_ollama_service.extract_metadata_from_prompt.assert_any_await("Prompt for Text 3", unittest.mock.ANY)
+        options = self.mock_ollama_service.extract_metadata_from_prompt.await_args.args[1]
+        self.assertEqual(options.priority, LOW_PRIORITY)
+
+    async def test_process_uses_duplicate_detector(self):
+        # Given: a batch processor with near-duplicate detection
+        mock_detector = AsyncMock()
+        mock_detector.create_prompt.side_effect = lambda text: f"Document prompt for {text}"
+        mock_detector.extract_metadata_from_prompt.return_value = ExtractedMetadata(
+            title="Title", created_date=None, correspondent=None, document_type=None, tags=[]
+        )
+        self.batch_processor.duplicate_detector = mock_detector
+
+        # When: the batch is processed
+        progress = await self.batch_processor.process([1, 2])
+
+        # Then: prompts and metadata come from the detector
+        self.assertEqual(progress.processed, 2)
+        mock_detector.extract_metadata_from_prompt.assert_any_await("Document prompt for Text 2", unittest.mock.ANY)
+        self.mock_ollama_service.extract_metadata_from_prompt.assert_not_awaited()
+
+    async def test_process_continues_after_failures_and_skips(self):
+        # Given: one document without text, one missing and one failing extraction
+        self.mock_document_service.get_documents.side_effect = lambda doc_ids: [
+            Document(id=doc_id, title="Document", created_date=None, text="" if doc_id == 1 else "Text",
+                     correspondent_id=None, document_type_id=None, tag_ids=[])
+            for doc_id in doc_ids if doc_id != 2
+        ]
+        self.mock_ollama_service.extract_metadata_from_prompt.side_effect = [
+            Exception("Extraction failed"),
+            ExtractedMetadata(title="Title", created_date=None, correspondent=None, document_type=None, tags=[])
+        ]
+
+        # When: the batch is processed
+        progress = await self.batch_processor.process([1, 2, 3, 4])
+
+        # Then: the other documents are still processed
+        self.assertEqual((progress.processed, progress.skipped, progress.failed), (1, 2, 1))
+        self.mock_document_service.update_document.assert_awaited_once()
+
+    async def test_process_records_metrics(self):
+        # Given: one document without text and the metrics recorded so far
+        self.mock_document_service.get_documents.side_effect = lambda doc_ids: [
+            Document(id=doc_id, title="Document", created_date=None, text="" if doc_id == 1 else "Text",
+                     correspondent_id=None, document_type_id=None, tag_ids=[]) for doc_id in doc_ids]
+
+        def get_value(name, labels=None):
+            return REGISTRY.get_sample_value(name, labels or {}) or 0
+
+        before = {stage: get_value('paperless_ollama_stage_duration_seconds_count', {'stage': stage})
+                  for stage in (metrics.DOCUMENT_FETCH, metrics.RESOLUTION, metrics.PATCH)}
+        successes = get_value('paperless_ollama_documents_processed_total', {'result': 'success'})
+        skips = get_value('paperless_ollama_documents_processed_total', {'result': 'skipped'})
+        in_progress = get_value('paperless_ollama_documents_in_progress')
+
+        # When: the batch is processed
+        await self.batch_processor.process([1, 2, 3])
+
+        # Then: the stages and documents are counted like for single documents
+        self.assertEqual(get_value('paperless_ollama_stage_duration_seconds_count', {'stage': metrics.DOCUMENT_FETCH}),
+                         before[metrics.DOCUMENT_FETCH] + 2)
+        self.assertEqual(get_value('paperless_ollama_stage_duration_seconds_count', {'stage': metrics.RESOLUTION}),
+                         before[metrics.RESOLUTION] + 2)
+        self.assertEqual(get_value('paperless_ollama_stage_duration_seconds_count', {'stage': metrics.PATCH}),
+                         before[metrics.PATCH] + 2)
+        self.assertEqual(get_value('paperless_ollama_documents_processed_total', {'result': 'success'}), successes + 2)
+        self.assertEqual(get_value('paperless_ollama_documents_processed_total', {'result': 'skipped'}), skips + 1)
+        self.assertEqual(get_value('paperless_ollama_documents_in_progress'), in_progress)
+
+    async def test_process_fails_every_document_of_a_failed_fetch(self):
+        # Given: the fetch of the first chunk fails
+        def get_documents(doc_ids):
+            if 1 in doc_ids:
+                raise httpx.HTTPStatusError("Server Error", request=Mock(), response=Mock(status_code=500))
+            return [Document(id=doc_id, title="Document", created_date=None, text="Text", correspondent_id=None,
+                             document_type_id=None, tag_ids=[]) for doc_id in doc_ids]
+
+        self.mock_document_service.get_documents.side_effect = get_documents
+
+        # When: the batch is processed
+        progress = await self.batch_processor.process([1, 2, 3])
+
+        # Then: both documents of the chunk count as failed, the other one is processed
+        self.assertEqual((progress.processed, progress.failed), (1, 2))
+
+    async def test_get_document_ids_combines_selections(self):
+        # Given: ids, a range, a tag and a query
+        self.mock_tag_service.get_tag_ids_by_names.return_value = [7]
+        self.mock_document_service.get_document_ids.return_value = [3, 10]
+        selection = BatchSelection(ids=[5, 1], start=1, end=3, query={"correspondent__isnull": "true"},
+                                   tags=["Invoice"])
+
+        # When: the document ids are resolved
+        doc_ids = await self.batch_processor.get_document_ids(selection)
+
+        # Then: all sources are merged without duplicates
+        self.assertEqual(doc_ids, [5, 1, 2, 3, 10])
+        self.mock_document_service.get_document_ids.assert_awaited_once_with(
+            {"correspondent__isnull": "true", "tags__id__all": "7"})
+
+    async def test_get_document_ids_unknown_tag(self):
+        # Given: a tag that does not exist
+        self.mock_tag_service.get_tag_ids_by_names.return_value = []
+
+        # When / Then: a ValueError is raised
+        with self.assertRaises(ValueError):
+            await self.batch_processor.get_document_ids(BatchSelection(tags=["Missing"]))
+
+
+if __name__ == '__main__':
+    unittest.main()
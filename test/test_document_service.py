@@ -1,21 +1,21 @@
 import unittest
-from unittest.mock import patch, Mock, MagicMock
+from unittest.mock import Mock, MagicMock, AsyncMock
 
-import requests
+import httpx
 
 from models.document import Document
 from models.postprocessed_document import PostProcessedDocument
 from services.document_service import DocumentService
 
 
-class TestDocumentService(unittest.TestCase):
+class TestDocumentService(unittest.IsolatedAsyncioTestCase):
 
     def setUp(self):
         self.mock_logger = MagicMock()
-        self.doc_service = DocumentService(self.mock_logger, 'http://api_url', 'test_token')
+        self.mock_client = AsyncMock()
+        self.doc_service = DocumentService(self.mock_logger, self.mock_client, 'http://api_url', 'test_token')
 
-    @patch('services.document_service.requests.get')
-    def test_get_document_success(self, mock_get):
+    async def test_get_document_success(self):
         # given
         mock_response = Mock()
         mock_response.json.return_value = {
@@ -28,10 +28,10 @@ class TestDocumentService(unittest.TestCase):
             'tags': [1, 2, 3]
         }
         mock_response.status_code = 200
-        mock_get.return_value = mock_response
+        self.mock_client.get.return_value = mock_response
 
         # when
-        document = self.doc_service.get_document(1)
+        document = await self.doc_service.get_document(1)
 
         # then
         self.assertIsInstance(document, Document)
@@ -42,23 +42,67 @@ class TestDocumentService(unittest.TestCase):
         self.assertEqual(document.correspondent_id, 2)
         self.assertEqual(document.document_type_id, 3)
         self.assertEqual(document.tag_ids, [1, 2, 3])
+        self.mock_client.get.assert_called_once_with(
+            'http://api_url/documents/1/',
+            params={'fields': 'id,title,content,created_date,correspondent,document_type,tags'},
+            headers={'Authorization': 'Token test_token'}
+        )
 
-    @patch('services.document_service.requests.get')
-    def test_get_document_http_error(self, mock_get):
+    async def test_get_documents_success(self):
         # given
-        mock_get.side_effect = requests.exceptions.HTTPError("404 Not Found")
+        mock_response = Mock()
+        mock_response.json.return_value = {'count': 2, 'results': [
+            {'id': 4, 'title': 'First', 'created_date': None, 'content': 'One', 'correspondent': None,
+             'document_type': None, 'tags': []},
+            {'id': 6, 'title': 'Second', 'created_date': '2024-01-02', 'content': 'Two', 'correspondent': 1,
+             'document_type': 2, 'tags': [3]},
+        ]}
+        self.mock_client.get.return_value = mock_response
+
+        # when
+        documents = await self.doc_service.get_documents((4, 5, 6))
+
+        # then
+        self.assertEqual([document.id for document in documents], [4, 6])
+        self.assertEqual(documents[1].text, 'Two')
+        self.mock_client.get.assert_called_once_with(
+            'http://api_url/documents/',
+            params={'id__in': '4,5,6', 'fields': 'id,title,content,created_date,correspondent,document_type,tags',
+                    'page_size': 3},
+            headers={'Authorization': 'Token test_token'}
+        )
+
+    async def test_get_document_http_error(self):
+        # given
+        self.mock_client.get.side_effect = httpx.HTTPError("404 Not Found")
 
         # when / then
-        with self.assertRaises(requests.exceptions.HTTPError):
-            self.doc_service.get_document(999)
+        with self.assertRaises(httpx.HTTPError):
+            await self.doc_service.get_document(999)
         self.mock_logger.log_error.assert_called_with("HTTP error: 404 Not Found", unittest.mock.ANY)
 
-    @patch('services.document_service.requests.patch')
-    def test_update_document_success(self, mock_patch):
+    async def test_get_document_ids_success(self):
+        # given
+        mock_response = Mock()
+        mock_response.json.return_value = {'count': 3, 'all': [4, 5, 6], 'results': [{'id': 4}]}
+        self.mock_client.get.return_value = mock_response
+
+        # when
+        doc_ids = await self.doc_service.get_document_ids({'tags__id__all': '5'})
+
+        # then
+        self.assertEqual(doc_ids, [4, 5, 6])
+        self.mock_client.get.assert_called_once_with(
+            'http://api_url/documents/',
+            params={'tags__id__all': '5', 'page_size': 1},
+            headers={'Authorization': 'Token test_token'}
+        )
+
+    async def test_update_document_success(self):
         # given
         mock_response = Mock()
         mock_response.status_code = 200
-        mock_patch.return_value = mock_response
+        self.mock_client.patch.return_value = mock_response
 
         post_processed_doc = PostProcessedDocument(
             title='Updated Title',
@@ -69,22 +113,21 @@ class TestDocumentService(unittest.TestCase):
         )
 
         # when
-        status_code = self.doc_service.update_document(1, post_processed_doc)
+        status_code = await self.doc_service.update_document(1, post_processed_doc)
 
         # then
         self.assertEqual(status_code, 200)
-        mock_patch.assert_called_once_with(
+        self.mock_client.patch.assert_called_once_with(
             'http://api_url/documents/1/',
             json={'title': 'Updated Title', 'created': '2024-09-19', 'correspondent': 2, 'document_type': 3, 'tags': [1, 2, 3]},
             headers={'Authorization': 'Token test_token'}
         )
-        self.mock_logger.log.assert_called_once_with(
+        self.mock_logger.log_debug.assert_called_once_with(
             "Updating Paperless document with metadata: {'title': 'Updated Title', 'created': '2024-09-19', 'correspondent': 2, 'document_type': 3, 'tags': [1, 2, 3]}")
 
-    @patch('services.document_service.requests.patch')
-    def test_update_document_failure(self, mock_patch):
+    async def test_update_document_failure(self):
         # given
-        mock_patch.side_effect = Exception("Internal Server Error")
+        self.mock_client.patch.side_effect = Exception("Internal Server Error")
 
         post_processed_doc = PostProcessedDocument(
             title='Failed Update',
@@ -96,7 +139,7 @@ class TestDocumentService(unittest.TestCase):
 
         # when / then
         with self.assertRaises(Exception):
-            self.doc_service.update_document(1, post_processed_doc)
+            await self.doc_service.update_document(1, post_processed_doc)
         self.mock_logger.log_error.assert_called_once_with(
             "Error updating Paperless document ID 1: Internal Server Error")
 
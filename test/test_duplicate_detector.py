@@ -0,0 +1,74 @@
+import unittest
+from unittest.mock import MagicMock, AsyncMock, patch
+
+from models.document_prompt import DocumentPrompt
+from models.extracted_metadata import ExtractedMetadata
+from services.duplicate_detector import DuplicateDetector
+
+
+class TestDuplicateDetector(unittest.IsolatedAsyncioTestCase):
+
+    def setUp(self):
+        self.mock_logger = MagicMock()
+        self.mock_index = MagicMock()
+        self.mock_prompt_creator = MagicMock()
+        self.mock_prompt_creator.create_prompt = AsyncMock(return_value="Full prompt")
+        self.mock_short_prompt_creator = MagicMock()
+        self.mock_short_prompt_creator.create_prompt = AsyncMock(return_value="Short prompt")
+        self.mock_ollama = MagicMock()
+        self.mock_ollama.extract_metadata_from_prompt = AsyncMock()
+        self.detector = DuplicateDetector(self.mock_logger, self.mock_index, self.mock_prompt_creator,
+                                          self.mock_short_prompt_creator, self.mock_ollama)
+        self.previous = ExtractedMetadata(title="Invoice January", created_date="2024-01-31",
+                                          correspondent="Stadtwerke", document_type="Invoice", tags=["Strom"])
+
+    @patch('services.duplicate_detector.get_fingerprint', return_value=42)
+    async def test_new_document_uses_full_prompt_and_is_indexed(self, _):
+        # Given: no near-duplicate in the index
+        self.mock_index.find.return_value = None
+        metadata = ExtractedMetadata(title="Invoice", created_date=None, correspondent="ACME", document_type=None,
+                                     tags=[])
+        self.mock_ollama.extract_metadata_from_prompt.return_value = metadata
+
+        # When: metadata is extracted
+        result = await self.detector.extract_metadata("OCR text")
+
+        # Then: the full prompt is used and the document is added to the index
+        self.mock_ollama.extract_metadata_from_prompt.assert_awaited_once_with("Full prompt", None)
+        self.mock_index.add.assert_called_once_with(42, metadata)
+        self.assertIs(result, metadata)
+
+    @patch('services.duplicate_detector.get_fingerprint', return_value=42)
+    async def test_near_duplicate_only_generates_title_and_date(self, _):
+        # Given: a near-duplicate in the index
+        self.mock_index.find.return_value = self.previous
+        self.mock_ollama.extract_metadata_from_prompt.return_value = ExtractedMetadata(
+            title="Invoice February", created_date="2024-02-29", correspondent="Wrong", document_type=None, tags=[])
+
+        # When: metadata is extracted
+        result = await self.detector.extract_metadata("OCR text")
+
+        # Then: the short prompt is used and the rest is taken over from the near-duplicate
+        self.mock_ollama.extract_metadata_from_prompt.assert_awaited_once_with("Short prompt", None, ('title', 'date'))
+        self.mock_index.add.assert_not_called()
+        self.assertEqual(result, ExtractedMetadata(title="Invoice February", created_date="2024-02-29",
+                                                   correspondent="Stadtwerke", document_type="Invoice",
+                                                   tags=["Strom"]))
+
+    @patch('services.duplicate_detector.get_fingerprint', return_value=None)
+    async def test_short_text_is_neither_looked_up_nor_indexed(self, _):
+        # Given: a text too short for a fingerprint
+        self.mock_ollama.extract_metadata_from_prompt.return_value = self.previous
+
+        # When: the prompt is created and metadata is extracted
+        document_prompt = await self.detector.create_prompt("Short")
+        await self.detector.extract_metadata_from_prompt(document_prompt)
+
+        # Then: the index is not used
+        self.assertEqual(document_prompt, DocumentPrompt("Full prompt", None))
+        self.mock_index.find.assert_not_called()
+        self.mock_index.add.assert_not_called()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,74 @@
+import unittest
+from unittest.mock import MagicMock, AsyncMock
+
+from models.job import Job, QUEUED, RUNNING, DONE, FAILED
+from models.processing_options import ProcessingOptions
+from services.job_queue import JobQueue
+from services.job_store import JobStore
+
+
+class TestJobQueue(unittest.IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self):
+        self.mock_logger = MagicMock()
+        self.mock_processor = AsyncMock()
+        self.store = JobStore()
+        self.job_queue = JobQueue(self.mock_logger, self.mock_processor, self.store, workers=2)
+
+    async def asyncTearDown(self):
+        await self.job_queue.stop()
+
+    async def test_enqueue_returns_queued_job(self):
+        # When: a document is enqueued before the workers are started
+        job = await self.job_queue.enqueue(1)
+
+        # Then: the job is stored as queued
+        self.assertEqual(job.status, QUEUED)
+        self.assertEqual(await self.job_queue.get(job.id), job)
+        self.mock_processor.process_document.assert_not_awaited()
+
+    async def test_worker_processes_job(self):
+        # Given: started workers and a document enqueued with processing options
+        await self.job_queue.start()
+        options = ProcessingOptions(use_cache=False)
+        job = await self.job_queue.enqueue(1, options)
+
+        # When: the queue is drained
+        await self.job_queue.queue.join()
+
+        # Then: the document is processed with the options and the job is done
+        self.mock_processor.process_document.assert_awaited_once_with(1, options)
+        self.assertEqual(job.status, DONE)
+        self.assertIsNotNone(job.finished_at)
+
+    async def test_failed_job_records_error(self):
+        # Given: a processor that fails
+        self.mock_processor.process_document.side_effect = Exception("Extraction failed")
+        await self.job_queue.start()
+        job = await self.job_queue.enqueue(1)
+
+        # When: the queue is drained
+        await self.job_queue.queue.join()
+
+        # Then: the job is marked as failed with the error
+        self.assertEqual(job.status, FAILED)
+        self.assertEqual(job.error, "Extraction failed")
+
+    async def test_start_resumes_unfinished_jobs(self):
+        # Given: jobs left queued and running by a previous run
+        self.store.save(Job(id="a", doc_id=1, status=QUEUED, created_at=1.0))
+        self.store.save(Job(id="b", doc_id=2, status=RUNNING, created_at=2.0, started_at=2.5))
+        self.store.save(Job(id="c", doc_id=3, status=DONE, created_at=3.0))
+
+        # When: the queue is started and drained
+        await self.job_queue.start()
+        await self.job_queue.queue.join()
+
+        # Then: only the unfinished jobs are processed again
+        processed = sorted(call.args[0] for call in self.mock_processor.process_document.await_args_list)
+        self.assertEqual(processed, [1, 2])
+        self.mock_logger.log.assert_called_once_with("Resuming 2 unfinished jobs.")
+
+
+if __name__ == '__main__':
+    unittest.main()
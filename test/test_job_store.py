@@ -0,0 +1,115 @@
+import os
+import tempfile
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+
+from models.job import Job, QUEUED, RUNNING, DONE
+from services.job_store import JobStore, SqliteJobStore
+
+
+class TestJobStore(unittest.TestCase):
+
+    def setUp(self):
+        self.store = JobStore()
+
+    def test_save_and_get(self):
+        # Given: a saved job
+        job = Job(id="a", doc_id=1, status=QUEUED, created_at=1.0)
+        self.store.save(job)
+
+        # When / Then: it can be retrieved by id, unknown ids return None
+        self.assertEqual(self.store.get("a"), job)
+        self.assertIsNone(self.store.get("missing"))
+
+    def test_get_unfinished(self):
+        # Given: queued, running and finished jobs
+        self.store.save(Job(id="a", doc_id=1, status=QUEUED, created_at=1.0))
+        self.store.save(Job(id="b", doc_id=2, status=RUNNING, created_at=2.0))
+        self.store.save(Job(id="c", doc_id=3, status=DONE, created_at=3.0))
+
+        # When: unfinished jobs are requested
+        unfinished = self.store.get_unfinished()
+
+        # Then: only queued and running jobs are returned
+        self.assertEqual([job.id for job in unfinished], ["a", "b"])
+
+    def test_prunes_oldest_finished_jobs(self):
+        # Given: a store keeping two finished jobs and a queued job
+        store = JobStore(max_finished=2)
+        store.save(Job(id="queued", doc_id=1, status=QUEUED, created_at=1.0))
+
+        # When: three jobs finish
+        for index, job_id in enumerate(["a", "b", "c"]):
+            store.save(Job(id=job_id, doc_id=2, status=DONE, created_at=2.0, finished_at=3.0 + index))
+
+        # Then: the oldest finished job is removed, unfinished jobs are kept
+        self.assertIsNone(store.get("a"))
+        self.assertIsNotNone(store.get("c"))
+        self.assertIsNotNone(store.get("queued"))
+
+    def test_concurrent_saves_keep_the_limit(self):
+        # Given: a store keeping ten finished jobs
+        store = JobStore(max_finished=10)
+
+        # When: many jobs finish on several threads at once
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            list(executor.map(lambda index: store.save(Job(id=str(index), doc_id=index, status=DONE, created_at=1.0,
+                                                           finished_at=2.0)), range(2000)))
+
+        # Then: exactly the limit of finished jobs is kept
+        self.assertEqual(len(store.jobs), 10)
+        self.assertEqual(set(store.jobs), set(store.finished_ids))
+
+
+class TestSqliteJobStore(unittest.TestCase):
+
+    def setUp(self):
+        self.db_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.db_dir.cleanup)
+        self.db_file = os.path.join(self.db_dir.name, "jobs.db")
+        self.store = SqliteJobStore(self.db_file)
+        self.addCleanup(self.store.database.close)
+
+    def test_save_updates_existing_job(self):
+        # Given: a job that is saved twice with a new status
+        job = Job(id="a", doc_id=1, status=QUEUED, created_at=1.0)
+        self.store.save(job)
+        job.status = DONE
+        job.finished_at = 2.0
+        self.store.save(job)
+
+        # When / Then: the latest state is returned
+        self.assertEqual(self.store.get("a"), job)
+        self.assertIsNone(self.store.get("missing"))
+
+    def test_unfinished_jobs_survive_reopen(self):
+        # Given: jobs saved by one store instance
+        self.store.save(Job(id="b", doc_id=2, status=RUNNING, created_at=2.0))
+        self.store.save(Job(id="a", doc_id=1, status=QUEUED, created_at=1.0))
+        self.store.save(Job(id="c", doc_id=3, status=DONE, created_at=3.0))
+
+        # When: the database is opened again
+        reopened = SqliteJobStore(self.db_file)
+        self.addCleanup(reopened.database.close)
+
+        # Then: unfinished jobs are returned in creation order
+        self.assertEqual([job.id for job in reopened.get_unfinished()], ["a", "b"])
+
+    def test_prunes_oldest_finished_jobs(self):
+        # Given: a store keeping two finished jobs and a running job
+        store = SqliteJobStore(os.path.join(self.db_dir.name, "pruned.db"), max_finished=2)
+        self.addCleanup(store.database.close)
+        store.save(Job(id="running", doc_id=1, status=RUNNING, created_at=1.0))
+
+        # When: three jobs finish
+        for index, job_id in enumerate(["a", "b", "c"]):
+            store.save(Job(id=job_id, doc_id=2, status=DONE, created_at=2.0, finished_at=3.0 + index))
+
+        # Then: the oldest finished job is removed, unfinished jobs are kept
+        self.assertIsNone(store.get("a"))
+        self.assertIsNotNone(store.get("c"))
+        self.assertIsNotNone(store.get("running"))
+
+
+if __name__ == '__main__':
+    unittest.main()
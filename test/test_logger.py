@@ -0,0 +1,105 @@
+import io
+import logging
+import os
+import tempfile
+import unittest
+
+from logger import Logger, _BatchedRotatingFileHandler
+
+
+class _CountingWriter(io.BufferedWriter):
+    def __init__(self, raw):
+        super().__init__(raw)
+        self.flushes = 0
+
+    def flush(self):
+        self.flushes += 1
+        super().flush()
+
+
+class TestLogger(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.file = os.path.join(self.directory.name, 'log')
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def _read(self):
+        with open(self.file, encoding='utf-8') as file:
+            return file.read()
+
+    def test_log_writes_messages_at_or_above_level(self):
+        # Given: a logger at INFO level
+        logger = Logger(self.file, 'INFO')
+
+        # When: messages of several levels are logged and the logger is closed
+        logger.log("Processing document 1")
+        logger.log_debug("Full payload")
+        logger.close()
+
+        # Then: only the info message is written
+        content = self._read()
+        self.assertIn("INFO Processing document 1", content)
+        self.assertNotIn("Full payload", content)
+
+    def test_log_error_writes_arguments_and_traceback(self):
+        # Given: a logger
+        logger = Logger(self.file)
+
+        # When: an error is logged while handling an exception
+        try:
+            raise ValueError("Broken")
+        except ValueError:
+            logger.log_error("Processing failed", arguments=['main.py', '1'])
+        logger.close()
+
+        # Then: the message, arguments and traceback are written
+        content = self._read()
+        self.assertIn("ERROR Processing failed\nArguments: ['main.py', '1']", content)
+        self.assertIn("ValueError: Broken", content)
+
+    def test_log_rotates_file_by_size(self):
+        # Given: a logger rotating after 100 bytes
+        logger = Logger(self.file, max_bytes=100, backup_count=2)
+
+        # When: more than 100 bytes are logged
+        for index in range(10):
+            logger.log(f"Message number {index}")
+        logger.close()
+
+        # Then: the older messages are moved to a backup file
+        self.assertTrue(os.path.exists(self.file + '.1'))
+        self.assertIn("Message number 9", self._read())
+
+    def test_rotating_handler_flushes_once_per_batch(self):
+        # Given: a size-rotating handler writing to a stream that counts its flushes
+        handler = _BatchedRotatingFileHandler(self.file, maxBytes=1024 * 1024, backupCount=1, encoding='utf-8')
+        self.addCleanup(handler.close)
+        handler.stream.close()
+        writer = _CountingWriter(io.BytesIO())
+        handler.stream = io.TextIOWrapper(writer, encoding='utf-8')
+
+        # When: a batch of records is written
+        for index in range(50):
+            handler.handle(logging.makeLogRecord({'msg': f"Message number {index}", 'levelno': logging.INFO}))
+        flushes_while_writing = writer.flushes
+        handler.flush_batch()
+
+        # Then: the stream is only flushed at the end of the batch
+        self.assertEqual(flushes_while_writing, 0)
+        self.assertEqual(writer.flushes, 1)
+        self.assertIn(b"Message number 49", writer.raw.getvalue())
+
+    def test_close_is_idempotent(self):
+        # Given: a closed logger
+        logger = Logger(self.file)
+        logger.close()
+
+        # When / Then: closing it again does not fail
+        logger.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
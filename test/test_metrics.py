@@ -0,0 +1,53 @@
+import unittest
+
+from prometheus_client import REGISTRY
+
+import metrics
+
+
+def get_value(name, labels=None):
+    return REGISTRY.get_sample_value(name, labels or {}) or 0
+
+
+class TestMetrics(unittest.TestCase):
+
+    def test_measure_records_duration(self):
+        # Given: the number of recorded patch stages so far
+        count = get_value('paperless_ollama_stage_duration_seconds_count', {'stage': metrics.PATCH})
+
+        # When: a stage is measured
+        with metrics.measure(metrics.PATCH):
+            in_progress = get_value('paperless_ollama_stage_in_progress', {'stage': metrics.PATCH})
+
+        # Then: it was in progress while running and its duration is recorded
+        self.assertEqual(in_progress, 1)
+        self.assertEqual(get_value('paperless_ollama_stage_in_progress', {'stage': metrics.PATCH}), 0)
+        self.assertEqual(get_value('paperless_ollama_stage_duration_seconds_count', {'stage': metrics.PATCH}),
+                         count + 1)
+
+    def test_measure_counts_errors(self):
+        # Given: the number of resolution errors so far
+        errors = get_value('paperless_ollama_stage_errors_total', {'stage': metrics.RESOLUTION})
+
+        # When: the measured stage raises
+        with self.assertRaises(ValueError):
+            with metrics.measure(metrics.RESOLUTION):
+                raise ValueError("failed")
+
+        # Then: the error is counted and the exception is passed on
+        self.assertEqual(get_value('paperless_ollama_stage_errors_total', {'stage': metrics.RESOLUTION}), errors + 1)
+
+    def test_record_cache_lookup(self):
+        # Given: the number of result cache hits so far
+        hits = get_value('paperless_ollama_cache_requests_total', {'cache': 'result', 'result': 'hit'})
+
+        # When: a hit is recorded
+        metrics.record_cache_lookup('result', True)
+
+        # Then: the hit counter is incremented
+        self.assertEqual(get_value('paperless_ollama_cache_requests_total', {'cache': 'result', 'result': 'hit'}),
+                         hits + 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
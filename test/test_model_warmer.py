@@ -0,0 +1,65 @@
+import asyncio
+import unittest
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from services.model_warmer import ModelWarmer
+
+
+class TestModelWarmer(unittest.IsolatedAsyncioTestCase):
+
+    def setUp(self):
+        # Given: a warmer for a mocked Ollama service
+        self.mock_logger = MagicMock()
+        self.mock_ollama = MagicMock()
+        self.mock_ollama.model_name = 'gemma2:2b'
+        self.mock_ollama.warm_up = AsyncMock(return_value=True)
+        self.warmer = ModelWarmer(self.mock_logger, self.mock_ollama)
+
+    async def test_warm_up_marks_ready(self):
+        # Given / When: the model is loaded
+        ready = await self.warmer.warm_up()
+
+        # Then: the warmer reports ready and logs it once
+        self.assertTrue(ready)
+        self.assertTrue(self.warmer.ready)
+        self.mock_logger.log.assert_called_once()
+
+    async def test_warm_up_failure_is_not_ready(self):
+        # Given: Ollama cannot load the model
+        self.mock_ollama.warm_up.return_value = False
+
+        # When: the model is loaded
+        await self.warmer.warm_up()
+
+        # Then: the warmer is not ready
+        self.assertFalse(self.warmer.ready)
+
+    async def test_start_retries_until_loaded(self):
+        # Given: Ollama only loads the model on the second attempt
+        self.mock_ollama.warm_up.side_effect = [False, True]
+
+        # When: the warmer runs without waiting between attempts
+        with patch('services.model_warmer.RETRY_DELAY', 0):
+            await self.warmer.start()
+            await self.warmer.task
+
+        # Then: it stops once the model is loaded
+        self.assertEqual(self.mock_ollama.warm_up.await_count, 2)
+        self.assertTrue(self.warmer.ready)
+
+    async def test_stop_cancels_periodic_warm_up(self):
+        # Given: a warmer loading the model every hour
+        self.warmer.interval = 3600
+        await self.warmer.start()
+        await asyncio.sleep(0)
+
+        # When: it is stopped
+        await self.warmer.stop()
+
+        # Then: the task has ended
+        self.assertIsNone(self.warmer.task)
+        self.mock_ollama.warm_up.assert_awaited_once()
+
+
+if __name__ == '__main__':
+    unittest.main()
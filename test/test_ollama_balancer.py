@@ -0,0 +1,150 @@
+import asyncio
+import unittest
+from unittest.mock import AsyncMock, MagicMock
+
+import httpx
+
+from models.ollama_endpoint import OllamaEndpoint
+from services.ollama_balancer import OllamaBalancer, parse_endpoints, WEIGHTED
+
+
+class TestOllamaBalancer(unittest.IsolatedAsyncioTestCase):
+
+    def setUp(self):
+        # Given: a balancer over two endpoints with a mocked client
+        self.mock_logger = MagicMock()
+        self.mock_client = AsyncMock()
+        self.first = OllamaEndpoint(url='http://first:11434/api/generate')
+        self.second = OllamaEndpoint(url='http://second:11434/api/generate')
+        self.balancer = OllamaBalancer(self.mock_logger, self.mock_client, [self.first, self.second], 'gemma2:2b')
+
+    def test_parse_endpoints(self):
+        # Given / When: a list with per-endpoint settings is parsed
+        endpoints = parse_endpoints('http://gpu:11434/api/generate;weight=3;max_concurrency=2, '
+                                    'http://cpu:11434/api/generate', 1)
+
+        # Then: the settings apply to their endpoint and the default concurrency to the others
+        self.assertEqual([(endpoint.url, endpoint.weight, endpoint.max_concurrency) for endpoint in endpoints],
+                         [('http://gpu:11434/api/generate', 3, 2), ('http://cpu:11434/api/generate', 1, 1)])
+
+    def test_parse_endpoints_rejects_invalid_setting(self):
+        # Given / When / Then: an unknown setting raises ValueError
+        with self.assertRaises(ValueError):
+            parse_endpoints('http://gpu:11434/api/generate;priority=1', 1)
+
+    async def test_run_spreads_concurrent_requests(self):
+        # Given: two requests running at the same time
+        release = asyncio.Event()
+        urls = []
+
+        async def request(url):
+            urls.append(url)
+            await release.wait()
+            return url
+
+        # When: both are started
+        tasks = [asyncio.create_task(self.balancer.run(request)) for _ in range(2)]
+        await asyncio.sleep(0)
+        release.set()
+        await asyncio.gather(*tasks)
+
+        # Then: each endpoint received one of them
+        self.assertCountEqual(urls, [self.first.url, self.second.url])
+
+    async def test_run_waits_for_free_endpoint(self):
+        # Given: a single endpoint busy with a request
+        balancer = OllamaBalancer(self.mock_logger, self.mock_client, [self.first], 'gemma2:2b')
+        release = asyncio.Event()
+        running = []
+
+        async def request(url):
+            running.append(url)
+            await release.wait()
+            return url
+
+        first_task = asyncio.create_task(balancer.run(request))
+        second_task = asyncio.create_task(balancer.run(request))
+        await asyncio.sleep(0)
+
+        # When: the first request finishes
+        self.assertEqual(len(running), 1)
+        release.set()
+        await asyncio.gather(first_task, second_task)
+
+        # Then: the second one runs afterwards
+        self.assertEqual(len(running), 2)
+        self.assertEqual(self.first.in_flight, 0)
+
+    async def test_run_fails_over_to_next_endpoint(self):
+        # Given: a first endpoint that refuses connections
+        async def request(url):
+            if url == self.first.url:
+                raise httpx.ConnectError("Connection refused")
+            return "answer"
+
+        # When: a request is run
+        result = await self.balancer.run(request)
+
+        # Then: it is retried on the second endpoint and the first is marked as down
+        self.assertEqual(result, "answer")
+        self.assertFalse(self.first.healthy)
+        self.assertTrue(self.second.warm)
+
+    async def test_run_raises_when_every_endpoint_failed(self):
+        # Given: endpoints that all refuse connections
+        request = AsyncMock(side_effect=httpx.ConnectError("Connection refused"))
+
+        # When / Then: the last error is raised after trying each endpoint once
+        with self.assertRaises(httpx.ConnectError):
+            await self.balancer.run(request)
+        self.assertEqual(request.await_count, 2)
+
+    async def test_run_prefers_warm_endpoint(self):
+        # Given: the model is only loaded on the second endpoint
+        self.second.warm = True
+        request = AsyncMock(return_value="answer")
+
+        # When: a request is run
+        await self.balancer.run(request)
+
+        # Then: it goes to the warm endpoint
+        request.assert_awaited_once_with(self.second.url)
+
+    async def test_weighted_strategy_follows_weights(self):
+        # Given: a weighted balancer with a three times heavier first endpoint, the model is loaded on both
+        self.first.weight = 3
+        self.first.warm = self.second.warm = True
+        balancer = OllamaBalancer(self.mock_logger, self.mock_client, [self.first, self.second], 'gemma2:2b',
+                                  WEIGHTED)
+        request = AsyncMock(side_effect=lambda url: url)
+
+        # When: eight requests are run one after another
+        urls = [await balancer.run(request) for _ in range(8)]
+
+        # Then: they are distributed 3:1
+        self.assertEqual(urls.count(self.first.url), 6)
+        self.assertEqual(urls.count(self.second.url), 2)
+
+    async def test_check_health_updates_endpoints(self):
+        # Given: the first endpoint has the model loaded and the second one is down
+        self.second.healthy = False
+        self.second.failed_at = 0
+
+        async def get(url, timeout):
+            if url == 'http://second:11434/api/ps':
+                raise httpx.ConnectError("Connection refused")
+            return MagicMock(json=MagicMock(return_value={"models": [{"name": "gemma2:2b"}]}))
+
+        self.mock_client.get.side_effect = get
+
+        # When: the health is checked
+        await self.balancer.check_health()
+
+        # Then: the first endpoint is warm and the second one stays down
+        self.assertTrue(self.first.healthy)
+        self.assertTrue(self.first.warm)
+        self.assertFalse(self.second.healthy)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,74 @@
+import asyncio
+import unittest
+
+from models.processing_options import HIGH_PRIORITY, LOW_PRIORITY
+from services.ollama_scheduler import OllamaScheduler
+
+
+class TestOllamaScheduler(unittest.IsolatedAsyncioTestCase):
+
+    def setUp(self):
+        self.scheduler = OllamaScheduler(max_concurrency=1)
+        self.release = asyncio.Event()
+        self.order = []
+
+    async def _generate(self, name, priority):
+        async with self.scheduler.slot(priority):
+            self.order.append(name)
+            await self.release.wait()
+
+    async def _settle(self):
+        for _ in range(5):
+            await asyncio.sleep(0)
+
+    async def test_caps_in_flight_requests(self):
+        # Given: more requests than slots
+        tasks = [asyncio.create_task(self._generate(f"doc{i}", HIGH_PRIORITY)) for i in range(3)]
+        await self._settle()
+
+        # When / Then: only one request runs, the others wait in the queue
+        self.assertEqual(self.scheduler.in_flight, 1)
+        self.assertEqual(self.scheduler.get_queue_depth(), 2)
+
+        self.release.set()
+        await asyncio.gather(*tasks)
+        self.assertEqual(self.scheduler.in_flight, 0)
+        self.assertEqual(self.scheduler.get_stats()["granted"], 3)
+
+    async def test_high_priority_requests_go_first(self):
+        # Given: a running request and waiting backfill requests
+        running = asyncio.create_task(self._generate("running", HIGH_PRIORITY))
+        await self._settle()
+        backfill = [asyncio.create_task(self._generate(f"backfill{i}", LOW_PRIORITY)) for i in range(2)]
+        await self._settle()
+
+        # When: a freshly consumed document arrives and the slot is freed
+        fresh = asyncio.create_task(self._generate("fresh", HIGH_PRIORITY))
+        await self._settle()
+        self.release.set()
+        await asyncio.gather(running, fresh, *backfill)
+
+        # Then: the fresh document overtakes the backfill, which keeps its arrival order
+        self.assertEqual(self.order, ["running", "fresh", "backfill0", "backfill1"])
+
+    async def test_cancelled_waiter_does_not_leak_slot(self):
+        # Given: a running request and a waiting one
+        running = asyncio.create_task(self._generate("running", HIGH_PRIORITY))
+        await self._settle()
+        waiting = asyncio.create_task(self._generate("waiting", HIGH_PRIORITY))
+        await self._settle()
+
+        # When: the waiting request is cancelled and the running one finishes
+        waiting.cancel()
+        await self._settle()
+        self.release.set()
+        await running
+
+        # Then: the queue is empty and the slot is free again
+        self.assertEqual(self.scheduler.get_queue_depth(), 0)
+        self.assertEqual(self.scheduler.in_flight, 0)
+        self.assertEqual(self.order, ["running"])
+
+
+if __name__ == '__main__':
+    unittest.main()
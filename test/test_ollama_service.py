@@ -1,43 +1,50 @@
 import unittest
-from unittest.mock import patch, Mock, MagicMock
-import requests
+from unittest.mock import MagicMock, AsyncMock
+import httpx
 import json
+from models.ollama_endpoint import OllamaEndpoint
+from services.ollama_balancer import OllamaBalancer
+from services.ollama_scheduler import OllamaScheduler
 from services.ollama_service import OllamaService
 from models.extracted_metadata import ExtractedMetadata
+from models.processing_options import ProcessingOptions
 
 
-class TestOllamaService(unittest.TestCase):
+class TestOllamaService(unittest.IsolatedAsyncioTestCase):
 
     def setUp(self):
         self.mock_logger = MagicMock()
         self.mock_prompt_creator = MagicMock()
+        self.mock_prompt_creator.create_prompt = AsyncMock()
         self.mock_response_processor = MagicMock()
+        self.mock_response_processor.process = AsyncMock()
+        self.mock_client = MagicMock()
+        self.mock_client.stream.return_value.__aenter__.return_value = MagicMock()
 
         self.ollama_service = OllamaService(
             logger=self.mock_logger,
+            client=self.mock_client,
             api_url="http://api_url",
             model_name="test_model",
             prompt_creator=self.mock_prompt_creator,
-            response_processor=self.mock_response_processor
+            response_processor=self.mock_response_processor,
+            scheduler=OllamaScheduler(max_concurrency=1)
         )
 
-    @patch('services.ollama_service.requests.post')
-    def test_extract_metadata_success(self, mock_post):
+    async def test_extract_metadata_success(self):
         # Given: A successful response from the Ollama API
         ocr_text = "Sample OCR text"
         self.mock_prompt_creator.create_prompt.return_value = "Generated Prompt"
 
         # Mock response processor methods
         self.mock_response_processor.process.return_value = '{"title": "Sample Title", "date": "2023-09-18", "correspondent": "John Doe", "document_type": "Invoice", "tags": ["tag1", "tag2"]}'
-        mock_response = Mock()
-        mock_post.return_value = mock_response
 
         # Simulate JSON response to be returned as a dictionary
         self.mock_response_processor.get_json = MagicMock(
             return_value=json.loads(self.mock_response_processor.process.return_value))
 
         # When: extract_metadata is called
-        metadata = self.ollama_service.extract_metadata(ocr_text)
+        metadata = await self.ollama_service.extract_metadata(ocr_text)
 
         # Then: The metadata should be correctly extracted and returned
         expected_metadata = ExtractedMetadata(
@@ -54,20 +61,170 @@ class TestOllamaService(unittest.TestCase):
         self.assertEqual(metadata.document_type, expected_metadata.document_type)
         self.assertEqual(metadata.tags, expected_metadata.tags)
 
-    @patch('services.ollama_service.requests.post')
-    def test_extract_metadata_http_error(self, mock_post):
+    async def test_extract_metadata_sends_keep_alive_and_context_size(self):
+        # Given: a service configured with keep_alive and a context size
+        self.ollama_service.keep_alive = "30m"
+        self.ollama_service.num_ctx = 8192
+        self.mock_prompt_creator.create_prompt.return_value = "Generated Prompt"
+        self.mock_response_processor.process.return_value = '{"title": "Sample Title"}'
+        self.mock_response_processor.get_json = MagicMock(return_value={"title": "Sample Title"})
+
+        # When: extract_metadata is called
+        await self.ollama_service.extract_metadata("Sample OCR text")
+
+        # Then: both are sent to Ollama
+        self.mock_client.stream.assert_called_once_with("POST", "http://api_url", json={
+            "model": "test_model",
+            "prompt": "Generated Prompt",
+            "keep_alive": "30m",
+            "options": {"num_ctx": 8192}
+        })
+
+    async def test_extract_metadata_sends_keep_alive_seconds(self):
+        # Given: a service keeping the model loaded forever, configured in seconds
+        self.ollama_service.keep_alive = -1
+        self.mock_prompt_creator.create_prompt.return_value = "Generated Prompt"
+        self.mock_response_processor.process.return_value = '{"title": "Sample Title"}'
+        self.mock_response_processor.get_json = MagicMock(return_value={"title": "Sample Title"})
+
+        # When: extract_metadata is called
+        await self.ollama_service.extract_metadata("Sample OCR text")
+
+        # Then: keep_alive is sent as a number, which Ollama reads as seconds
+        self.mock_client.stream.assert_called_once_with("POST", "http://api_url", json={
+            "model": "test_model",
+            "prompt": "Generated Prompt",
+            "keep_alive": -1
+        })
+
+    async def test_extract_metadata_sends_schema_and_token_limit(self):
+        # Given: a service configured for structured output with a bounded answer length
+        self.ollama_service.structured_output = True
+        self.ollama_service.num_predict = 256
+        self.mock_prompt_creator.create_prompt.return_value = "Generated Prompt"
+        self.mock_response_processor.process.return_value = '{"title": "Übersicht"}'
+        self.mock_response_processor.get_json = MagicMock(return_value={"title": "Übersicht"})
+
+        # When: extract_metadata is called
+        metadata = await self.ollama_service.extract_metadata("Sample OCR text")
+
+        # Then: the schema of the metadata and the token limit are sent to Ollama
+        self.mock_client.stream.assert_called_once_with("POST", "http://api_url", json={
+            "model": "test_model",
+            "prompt": "Generated Prompt",
+            "format": {
+                "type": "object",
+                "properties": {
+                    "title": {"type": ["string", "null"]},
+                    "date": {"type": ["string", "null"]},
+                    "correspondent": {"type": ["string", "null"]},
+                    "document_type": {"type": ["string", "null"]},
+                    "tags": {"type": "array", "items": {"type": "string"}},
+                },
+                "required": ["title", "date", "correspondent", "document_type", "tags"],
+            },
+            "options": {"num_predict": 256}
+        })
+        self.assertEqual("Übersicht", metadata.title)
+        self.assertEqual([], metadata.tags)
+
+    async def test_extract_metadata_uses_cached_result(self):
+        # Given: a result cache holding metadata for the prompt
+        cached = ExtractedMetadata(title="Cached", created_date=None, correspondent=None, document_type=None, tags=[])
+        self.ollama_service.result_cache = MagicMock()
+        self.ollama_service.result_cache.get.return_value = cached
+        self.mock_prompt_creator.create_prompt.return_value = "Generated Prompt"
+
+        # When: extract_metadata is called
+        metadata = await self.ollama_service.extract_metadata("Sample OCR text")
+
+        # Then: the cached metadata is returned without calling Ollama
+        self.assertIs(metadata, cached)
+        self.mock_client.stream.assert_not_called()
+
+    async def test_extract_metadata_bypasses_and_refreshes_cache(self):
+        # Given: a result cache and options asking to regenerate the metadata
+        self.ollama_service.result_cache = MagicMock()
+        self.ollama_service.result_cache.get_key.return_value = "key"
+        self.mock_prompt_creator.create_prompt.return_value = "Generated Prompt"
+        self.mock_response_processor.process.return_value = '{"title": "Fresh"}'
+        self.mock_response_processor.get_json = MagicMock(return_value={"title": "Fresh"})
+
+        # When: extract_metadata is called
+        metadata = await self.ollama_service.extract_metadata("Sample OCR text", ProcessingOptions(use_cache=False))
+
+        # Then: Ollama generates the metadata and the cache is updated
+        self.ollama_service.result_cache.get.assert_not_called()
+        self.mock_client.stream.assert_called_once()
+        self.ollama_service.result_cache.put.assert_called_once_with("key", metadata)
+        self.assertEqual("Fresh", metadata.title)
+
+    async def test_extract_metadata_http_error(self):
         # Given: A request to the API that results in a RequestException
         ocr_text = "Sample OCR text"
         self.mock_prompt_creator.create_prompt.return_value = "Generated Prompt"
-        mock_post.side_effect = requests.exceptions.RequestException("API failure")
+        self.mock_client.stream.return_value.__aenter__.side_effect = httpx.HTTPError("API failure")
 
-        # When / Then: extract_metadata should raise a RequestException and log the error
-        with self.assertRaises(requests.exceptions.RequestException):
-            self.ollama_service.extract_metadata(ocr_text)
+        # When / Then: extract_metadata should raise an HTTPError and log the error
+        with self.assertRaises(httpx.HTTPError):
+            await self.ollama_service.extract_metadata(ocr_text)
 
         self.mock_logger.log_error.assert_called_once_with(
             "HTTP error calling Ollama API: API failure"
         )
 
+    async def test_extract_metadata_malformed_stream_line(self):
+        # Given: A stream with a line that is not valid JSON
+        self.mock_prompt_creator.create_prompt.return_value = "Generated Prompt"
+        self.mock_response_processor.process.side_effect = json.JSONDecodeError("Expecting value", "Invalid", 0)
+
+        # When / Then: the JSONDecodeError is raised and logged without a complete response
+        with self.assertRaises(json.JSONDecodeError):
+            await self.ollama_service.extract_metadata("Sample OCR text")
+
+        self.mock_logger.log_error.assert_any_call(
+            "Failed data: {'model': 'test_model', 'prompt': 'Generated Prompt'}, Raw response: None"
+        )
+
+    async def test_warm_up_loads_model(self):
+        # Given: a service sending keep_alive and a context size
+        self.ollama_service.keep_alive = "30m"
+        self.ollama_service.num_ctx = 8192
+        self.mock_client.post = AsyncMock(return_value=MagicMock())
+
+        # When: the model is warmed up
+        loaded = await self.ollama_service.warm_up()
+
+        # Then: Ollama is asked to load the model without a prompt
+        self.assertTrue(loaded)
+        self.mock_client.post.assert_awaited_once_with("http://api_url", json={
+            "model": "test_model",
+            "keep_alive": "30m",
+            "options": {"num_ctx": 8192}
+        })
+
+    async def test_warm_up_marks_loaded_endpoints_warm(self):
+        # Given: a balancer over two hosts, the second one is down
+        first = OllamaEndpoint(url="http://first/api/generate")
+        second = OllamaEndpoint(url="http://second/api/generate")
+        self.ollama_service.balancer = OllamaBalancer(self.mock_logger, self.mock_client, [first, second],
+                                                      "test_model")
+
+        async def post(url, json):
+            if url == second.url:
+                raise httpx.ConnectError("Connection refused")
+            return MagicMock()
+
+        self.mock_client.post = AsyncMock(side_effect=post)
+
+        # When: the model is warmed up
+        loaded = await self.ollama_service.warm_up()
+
+        # Then: the model counts as loaded, on the first host only
+        self.assertTrue(loaded)
+        self.assertTrue(first.warm)
+        self.assertFalse(second.warm)
+
+
 if __name__ == '__main__':
     unittest.main()
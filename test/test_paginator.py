@@ -0,0 +1,82 @@
+import unittest
+from unittest.mock import AsyncMock, Mock
+
+import httpx
+
+from services.paginator import Paginator
+
+
+class TestPaginator(unittest.IsolatedAsyncioTestCase):
+
+    def setUp(self):
+        self.mock_client = AsyncMock()
+        self.paginator = Paginator(self.mock_client, page_size=2, concurrency=2)
+
+    @staticmethod
+    def _page(results, count=None, next_url=None):
+        response = Mock()
+        response.json.return_value = {"count": count, "next": next_url, "results": results}
+        return response
+
+    async def _collect(self, url="http://api_url/tags/", params=None):
+        return [item async for item in self.paginator.iterate(url, {"Authorization": "Token test_token"}, params)]
+
+    async def test_single_page(self):
+        # Given: a list that fits on one page
+        self.mock_client.get.return_value = self._page([{"id": 1}], count=1)
+
+        # When: the list is iterated
+        items = await self._collect()
+
+        # Then: only one request with the configured page size is made
+        self.assertEqual(items, [{"id": 1}])
+        self.mock_client.get.assert_awaited_once_with("http://api_url/tags/",
+                                                      headers={"Authorization": "Token test_token"},
+                                                      params={"page_size": 2})
+
+    async def test_remaining_pages_fetched_by_page_number(self):
+        # Given: a list of five entries spread over three pages
+        pages = {
+            None: self._page([{"id": 1}, {"id": 2}], count=5, next_url="http://api_url/tags/?page=2"),
+            2: self._page([{"id": 3}, {"id": 4}], count=5, next_url="http://api_url/tags/?page=3"),
+            3: self._page([{"id": 5}], count=5),
+        }
+        self.mock_client.get.side_effect = lambda url, headers, params: pages[params.get("page")]
+
+        # When: the list is iterated
+        items = await self._collect(params={"name__icontains": "x"})
+
+        # Then: every entry is yielded and the extra filters are kept on every page
+        self.assertEqual(sorted(item["id"] for item in items), [1, 2, 3, 4, 5])
+        self.assertEqual(self.mock_client.get.await_count, 3)
+        for call in self.mock_client.get.await_args_list:
+            self.assertEqual(call.kwargs["params"]["name__icontains"], "x")
+
+    async def test_follows_next_links_without_count(self):
+        # Given: pages that do not report a total count
+        self.mock_client.get.side_effect = [
+            self._page([{"id": 1}, {"id": 2}], next_url="http://api_url/tags/?page=2"),
+            self._page([{"id": 3}]),
+        ]
+
+        # When: the list is iterated
+        items = await self._collect()
+
+        # Then: the next link is followed
+        self.assertEqual(items, [{"id": 1}, {"id": 2}, {"id": 3}])
+        self.assertEqual(self.mock_client.get.await_args_list[1].args[0], "http://api_url/tags/?page=2")
+
+    async def test_page_error_is_raised(self):
+        # Given: a failing second page
+        self.mock_client.get.side_effect = [
+            self._page([{"id": 1}, {"id": 2}], count=3, next_url="http://api_url/tags/?page=2"),
+            httpx.HTTPError("API Failure"),
+        ]
+
+        # When / Then: the error is raised to the caller
+        with self.assertRaises(httpx.HTTPError):
+            await self._collect()
+
+
+if __name__ == '__main__':
+    unittest.main()
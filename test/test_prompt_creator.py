@@ -1,30 +1,36 @@
 import unittest
-from unittest.mock import MagicMock
+from unittest.mock import MagicMock, AsyncMock
 
-from services.prompt_creator import PromptCreator
+from services.prompt_creator import PromptCreator, STABLE_LAYOUT
+from services.taxonomy_ranker import TaxonomyRanker
+from services.text_truncator import TextTruncator
 
 
-class TestPromptCreator(unittest.TestCase):
+class TestPromptCreator(unittest.IsolatedAsyncioTestCase):
 
     def setUp(self):
         # Given: a PromptCreator with mocked services and logger
         self.mock_logger = MagicMock()
         self.mock_file_loader = MagicMock()
-        self.mock_tag_service = MagicMock()
-        self.mock_correspondent_service = MagicMock()
-        self.mock_document_type_service = MagicMock()
+        self.mock_file_loader.get_mtime.return_value = 1
+        self.mock_tag_service = AsyncMock()
+        self.mock_tag_service.get_version.return_value = 1
+        self.mock_correspondent_service = AsyncMock()
+        self.mock_correspondent_service.get_version.return_value = 1
+        self.mock_document_type_service = AsyncMock()
+        self.mock_document_type_service.get_version.return_value = 1
 
         self.prompt_creator = PromptCreator(
             logger=self.mock_logger,
             prompt_file_path='path/to/prompt_file.txt',
-            truncate_number=100,
+            text_truncator=TextTruncator(100),
             file_loader=self.mock_file_loader,
             tag_service=self.mock_tag_service,
             correspondent_service=self.mock_correspondent_service,
             document_type_service=self.mock_document_type_service
         )
 
-    def test_create_prompt_success(self):
+    async def test_create_prompt_success(self):
         # Given: mock data for tags, correspondents, document types, and prompt template
         self.mock_tag_service.get_all_names.return_value = ["Tag1", "Tag2"]
         self.mock_correspondent_service.get_all_names.return_value = ["Correspondent1", "Correspondent2"]
@@ -38,7 +44,7 @@ class TestPromptCreator(unittest.TestCase):
 
         # When: create_prompt is called with OCR text
         ocr_text = "This is a sample OCR text with more than enough words to truncate."
-        prompt = self.prompt_creator.create_prompt(ocr_text)
+        prompt = await self.prompt_creator.create_prompt(ocr_text)
 
         # Then: the prompt should be formatted correctly
         expected_prompt = (
@@ -49,9 +55,9 @@ class TestPromptCreator(unittest.TestCase):
         )
         self.assertEqual(prompt, expected_prompt)
 
-    def test_create_prompt_truncated_text(self):
+    async def test_create_prompt_truncated_text(self):
         # Given: mock services and template, truncate text to 5 words
-        self.prompt_creator.truncate_number = 5
+        self.prompt_creator.text_truncator = TextTruncator(5)
         self.mock_tag_service.get_all_names.return_value = ["Tag1", "Tag2"]
         self.mock_correspondent_service.get_all_names.return_value = ["Correspondent1", "Correspondent2"]
         self.mock_document_type_service.get_all_names.return_value = ["Type1", "Type2"]
@@ -64,7 +70,7 @@ class TestPromptCreator(unittest.TestCase):
 
         # When: create_prompt is called with long OCR text
         ocr_text = "This is a sample OCR text with many words."
-        prompt = self.prompt_creator.create_prompt(ocr_text)
+        prompt = await self.prompt_creator.create_prompt(ocr_text)
 
         # Then: the OCR text should be truncated to the first 5 words
         expected_prompt = (
@@ -75,6 +81,131 @@ class TestPromptCreator(unittest.TestCase):
         )
         self.assertEqual(prompt, expected_prompt)
 
+    async def test_create_prompt_reuses_template_and_taxonomy(self):
+        # Given: a template with escaped braces and an unchanged prompt file and taxonomy
+        self.mock_tag_service.get_all_names.return_value = ["Tag1", "Tag2"]
+        self.mock_correspondent_service.get_all_names.return_value = ["Correspondent1"]
+        self.mock_document_type_service.get_all_names.return_value = ["Type1"]
+        self.mock_file_loader.load.return_value = (
+            "{{ \"tags\": [] }} Tags: {existing_tags} Types: {existing_types}\n"
+            "Correspondents: {existing_correspondents}\n\"{truncated_text}\""
+        )
+
+        # When: prompts are created for two documents
+        first_prompt = await self.prompt_creator.create_prompt("First document")
+        second_prompt = await self.prompt_creator.create_prompt("Second document")
+
+        # Then: the file is read and the taxonomy rendered only once
+        self.assertEqual(first_prompt, '{ "tags": [] } Tags: Tag1, Tag2 Types: Type1\n'
+                                       'Correspondents: Correspondent1\n"First document"')
+        self.assertTrue(second_prompt.endswith('"Second document"'))
+        self.mock_file_loader.load.assert_called_once()
+        self.mock_tag_service.get_all_names.assert_awaited_once()
+
+    async def test_create_prompt_reloads_changed_template(self):
+        # Given: a prompt file that changes between two documents
+        self.mock_file_loader.load.side_effect = ["Old: {truncated_text}", "New: {truncated_text}"]
+        first_prompt = await self.prompt_creator.create_prompt("text")
+
+        # When: the file modification time changes
+        self.mock_file_loader.get_mtime.return_value = 2
+        second_prompt = await self.prompt_creator.create_prompt("text")
+
+        # Then: the new template is used
+        self.assertEqual(first_prompt, "Old: text")
+        self.assertEqual(second_prompt, "New: text")
+
+    async def test_reload_forces_template_load(self):
+        # Given: a prompt that has been created once
+        self.mock_file_loader.load.return_value = "{truncated_text}"
+        await self.prompt_creator.create_prompt("text")
+
+        # When: the template is reloaded explicitly
+        self.prompt_creator.reload()
+        await self.prompt_creator.create_prompt("text")
+
+        # Then: the file is read again
+        self.assertEqual(self.mock_file_loader.load.call_count, 2)
+
+    async def test_create_prompt_rerenders_changed_taxonomy(self):
+        # Given: a prompt created with the current tags
+        self.mock_file_loader.load.return_value = "Tags: {existing_tags} {truncated_text}"
+        self.mock_tag_service.get_all_names.return_value = ["Tag1"]
+        await self.prompt_creator.create_prompt("text")
+
+        # When: a tag is added
+        self.mock_tag_service.get_version.return_value = 2
+        self.mock_tag_service.get_all_names.return_value = ["Tag1", "Tag2"]
+        prompt = await self.prompt_creator.create_prompt("text")
+
+        # Then: the new tag list is rendered
+        self.assertEqual(prompt, "Tags: Tag1, Tag2 text")
+
+    async def test_stable_layout_sorts_taxonomy(self):
+        # Given: a prompt creator with the stable layout and unsorted taxonomy lists
+        self.prompt_creator.layout = STABLE_LAYOUT
+        self.mock_tag_service.get_all_names.return_value = ["invoice", "Bank", "Insurance"]
+        self.mock_correspondent_service.get_all_names.return_value = ["Telekom", "Allianz"]
+        self.mock_document_type_service.get_all_names.return_value = ["Receipt", "Contract"]
+        self.mock_file_loader.load.return_value = (
+            "Tags: {existing_tags}\nCorrespondents: {existing_correspondents}\nTypes: {existing_types}\n"
+            "{truncated_text}"
+        )
+
+        # When: create_prompt is called
+        prompt = await self.prompt_creator.create_prompt("Document text")
+
+        # Then: the lists are sorted case-insensitively and the document text comes last
+        self.assertEqual(prompt, "Tags: Bank, Insurance, invoice\nCorrespondents: Allianz, Telekom\n"
+                                 "Types: Contract, Receipt\nDocument text")
+        self.mock_logger.log.assert_not_called()
+
+    async def test_stable_layout_warns_about_taxonomy_after_text(self):
+        # Given: a stable layout template listing tags after the document text
+        self.prompt_creator.layout = STABLE_LAYOUT
+        self.mock_file_loader.load.return_value = "{truncated_text}\nTags: {existing_tags}"
+
+        # When: create_prompt is called
+        await self.prompt_creator.create_prompt("Document text")
+
+        # Then: a warning is logged
+        self.mock_logger.log.assert_called_once()
+
+    async def test_taxonomy_ranker_selects_relevant_entries(self):
+        # Given: a prompt creator limited to the two most relevant tags
+        self.prompt_creator.taxonomy_ranker = TaxonomyRanker(token_budget=100, top_k=2)
+        self.mock_tag_service.get_all_items.return_value = [
+            {'id': 1, 'name': 'Taxes', 'document_count': 50}, {'id': 2, 'name': 'Electricity', 'document_count': 5},
+            {'id': 3, 'name': 'Holiday', 'document_count': 1}]
+        self.mock_correspondent_service.get_all_items.return_value = [{'id': 1, 'name': 'Vattenfall'}]
+        self.mock_document_type_service.get_all_items.return_value = []
+        self.mock_file_loader.load.return_value = (
+            "Tags: {existing_tags}\nCorrespondents: {existing_correspondents}\nTypes: {existing_types}\n"
+            "{truncated_text}"
+        )
+
+        # When: create_prompt is called
+        prompt = await self.prompt_creator.create_prompt("Electricity bill from Vattenfall")
+
+        # Then: the matching tag comes first, followed by the most used one
+        self.assertEqual(prompt, "Tags: Electricity, Taxes\nCorrespondents: Vattenfall\nTypes: \n"
+                                 "Electricity bill from Vattenfall")
+        self.mock_tag_service.get_all_names.assert_not_awaited()
+
+    def test_unknown_layout(self):
+        # Given / When / Then: an unknown layout raises ValueError
+        with self.assertRaises(ValueError):
+            PromptCreator(
+                logger=self.mock_logger,
+                prompt_file_path='path/to/prompt_file.txt',
+                text_truncator=TextTruncator(100),
+                file_loader=self.mock_file_loader,
+                tag_service=self.mock_tag_service,
+                correspondent_service=self.mock_correspondent_service,
+                document_type_service=self.mock_document_type_service,
+                layout='random'
+            )
+
     def test_load_prompt_file_empty(self):
         # Given: an empty prompt file that will raise ValueError
         self.mock_file_loader.load.return_value = ""
@@ -90,7 +221,7 @@ class TestPromptCreator(unittest.TestCase):
             PromptCreator(
                 logger=self.mock_logger,
                 prompt_file_path='',
-                truncate_number=100,
+                text_truncator=TextTruncator(100),
                 file_loader=self.mock_file_loader,
                 tag_service=self.mock_tag_service,
                 correspondent_service=self.mock_correspondent_service,
@@ -1,16 +1,25 @@
 import unittest
 from unittest.mock import MagicMock
 import json
+import time
+
+from prometheus_client import REGISTRY
+
 from services.response_processor import ResponseProcessor
 
 
-class TestResponseProcessor(unittest.TestCase):
+class TestResponseProcessor(unittest.IsolatedAsyncioTestCase):
 
     def setUp(self):
         # Given: A ResponseProcessor instance with a mocked logger
         self.mock_logger = MagicMock()
         self.response_processor = ResponseProcessor(logger=self.mock_logger)
 
+    @staticmethod
+    async def _aiter(lines):
+        for line in lines:
+            yield line
+
     def test_get_json_valid(self):
         # Given: A valid JSON response
         response = '{"title": "Sample Title"}'
@@ -31,6 +40,16 @@ class TestResponseProcessor(unittest.TestCase):
         # Then: No exception should be raised and it should return valid JSON
         self.assertEqual({'title': 'Sample Title'}, result)
 
+    def test_get_json_keeps_non_ascii_characters(self):
+        # Given: A valid JSON response with German and Romanian characters
+        response = '{"title": "Übersicht Rechnung, factură"}'
+
+        # When: get_json is called
+        result = self.response_processor.get_json(response)
+
+        # Then: The title is returned unchanged
+        self.assertEqual({'title': 'Übersicht Rechnung, factură'}, result)
+
     def test_get_json_invalid(self):
         # Given: An invalid JSON response
         response = "Invalid JSON content"
@@ -41,34 +60,143 @@ class TestResponseProcessor(unittest.TestCase):
 
         self.mock_logger.log_error.assert_called_once_with(f"Could not find valid JSON structure in the response: {response}")
 
-    def test_process_success(self):
+    async def test_process_success(self):
         # Given: A response with valid JSON lines
         responses = MagicMock()
-        responses.iter_lines.return_value = [
+        responses.aiter_lines.return_value = self._aiter([
             '{"response": "Part1"}',
             '{"response": "Part2"}'
-        ]
+        ])
 
         # When: process is called
-        result = self.response_processor.process(responses)
+        result = await self.response_processor.process(responses)
 
         # Then: The full response should be concatenated correctly
         self.assertEqual(result, "Part1Part2")
 
-    def test_process_with_invalid_json(self):
+    async def test_process_with_invalid_json(self):
         # Given: A response with an invalid JSON line
         responses = MagicMock()
-        responses.iter_lines.return_value = [
+        responses.aiter_lines.return_value = self._aiter([
             '{"response": "Part1"}',
             'Invalid JSON Line'
-        ]
+        ])
 
         # When / Then: process should raise JSONDecodeError and log the error
         with self.assertRaises(json.JSONDecodeError):
-            self.response_processor.process(responses)
+            await self.response_processor.process(responses)
 
         self.mock_logger.log_error.assert_called_once_with("Error parsing response from Ollama API: Expecting value: line 1 column 1 (char 0). Chunk: Invalid JSON Line")
 
+    async def test_process_stops_after_json_object(self):
+        # Given: A response that keeps generating text after the JSON object is complete
+        responses = MagicMock()
+        lines = ['{"response": "Sure: {\\"title\\": "}', '{"response": "\\"A } \\\\\\"b\\\\\\" {\\"}"}',
+                 '{"response": " Hope this helps!"}', '{"response": " More"}']
+        consumed = []
+
+        async def aiter():
+            for line in lines:
+                consumed.append(line)
+                yield line
+
+        responses.aiter_lines.return_value = aiter()
+
+        # When: process is called
+        result = await self.response_processor.process(responses)
+
+        # Then: Only the object is returned, braces and quotes inside strings are ignored and the rest is not read
+        self.assertEqual('{"title": "A } \\"b\\" {"}', result)
+        self.assertEqual({'title': 'A } "b" {'}, self.response_processor.get_json(result))
+        self.assertEqual(2, len(consumed))
+
+    async def test_process_skips_braces_in_prose(self):
+        # Given: A response mentioning a placeholder before the JSON object
+        responses = MagicMock()
+        responses.aiter_lines.return_value = self._aiter([
+            '{"response": "Filled in {title}: "}',
+            '{"response": "{\\"title\\": \\"Invoice\\"}"}'
+        ])
+
+        # When: process is called
+        result = await self.response_processor.process(responses)
+
+        # Then: The placeholder is not mistaken for the object
+        self.assertEqual('{"title": "Invoice"}', result)
+
+    async def test_process_finds_object_after_prose_braces_in_same_chunk(self):
+        # Given: A chunk with a placeholder followed by the JSON object, and more text after it
+        responses = MagicMock()
+        lines = ['{"response": "Filled in {title}: {\\"title\\": \\"Invoice\\"} Hope this helps"}',
+                 '{"response": " More"}']
+        consumed = []
+
+        async def aiter():
+            for line in lines:
+                consumed.append(line)
+                yield line
+
+        responses.aiter_lines.return_value = aiter()
+
+        # When: process is called
+        result = await self.response_processor.process(responses)
+
+        # Then: The object in the rest of the chunk is found and the stream is not read further
+        self.assertEqual('{"title": "Invoice"}', result)
+        self.assertEqual(1, len(consumed))
+
+    async def test_process_records_token_counts(self):
+        # Given: A complete stream ending with Ollama's final chunk
+        responses = MagicMock()
+        responses.aiter_lines.return_value = self._aiter([
+            '{"response": "Not JSON"}',
+            '{"response": "", "done": true, "prompt_eval_count": 700, "eval_count": 3}'
+        ])
+        first_tokens = REGISTRY.get_sample_value('paperless_ollama_time_to_first_token_seconds_count') or 0
+        prompt_tokens = REGISTRY.get_sample_value('paperless_ollama_prompt_tokens_sum') or 0
+
+        # When: process is called with the time the request was sent
+        await self.response_processor.process(responses, time.perf_counter())
+
+        # Then: The time to first token and the prompt tokens are recorded
+        self.assertEqual(REGISTRY.get_sample_value('paperless_ollama_time_to_first_token_seconds_count'),
+                         first_tokens + 1)
+        self.assertEqual(REGISTRY.get_sample_value('paperless_ollama_prompt_tokens_sum'), prompt_tokens + 700)
+
+    async def test_process_reads_token_counts_after_structured_output(self):
+        # Given: A structured output stream whose final chunk follows the JSON object
+        responses = MagicMock()
+        responses.aiter_lines.return_value = self._aiter([
+            '{"response": "{\\"title\\":"}',
+            '{"response": " \\"x\\"}"}',
+            '{"response": "", "done": true, "prompt_eval_count": 1234, "eval_count": 2}'
+        ])
+        prompt_tokens = REGISTRY.get_sample_value('paperless_ollama_prompt_tokens_sum') or 0
+
+        # When: process is called reading until the final chunk
+        result = await self.response_processor.process(responses, read_until_done=True)
+
+        # Then: The object is returned and the prompt tokens of the final chunk are recorded
+        self.assertEqual('{"title": "x"}', result)
+        self.assertEqual(REGISTRY.get_sample_value('paperless_ollama_prompt_tokens_sum'), prompt_tokens + 1234)
+
+    async def test_process_estimates_prompt_tokens_when_stopping_early(self):
+        # Given: A stream that continues after the JSON object
+        responses = MagicMock()
+        responses.aiter_lines.return_value = self._aiter([
+            '{"response": "{\\"title\\": \\"x\\"}"}',
+            '{"response": " Done."}',
+            '{"response": "", "done": true, "prompt_eval_count": 1234, "eval_count": 3}'
+        ])
+        prompt_tokens = REGISTRY.get_sample_value('paperless_ollama_prompt_tokens_sum') or 0
+
+        # When: process is called with a prompt of 40 characters
+        result = await self.response_processor.process(responses, prompt='a' * 40)
+
+        # Then: The stream is closed after the object and the prompt tokens are estimated
+        self.assertEqual('{"title": "x"}', result)
+        self.assertEqual(REGISTRY.get_sample_value('paperless_ollama_prompt_tokens_sum'), prompt_tokens + 10)
+
     def test_get_response_part_valid(self):
         # Given: A valid JSON response part
         line = '{"response": "Part of the response"}'
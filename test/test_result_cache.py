@@ -0,0 +1,62 @@
+import os
+import tempfile
+import unittest
+
+from models.extracted_metadata import ExtractedMetadata
+from services.result_cache import SqliteResultCache
+
+
+class TestSqliteResultCache(unittest.TestCase):
+
+    def setUp(self):
+        self.db_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.db_dir.cleanup)
+        self.db_file = os.path.join(self.db_dir.name, "results.db")
+        self.cache = SqliteResultCache(self.db_file, max_entries=2)
+        self.metadata = ExtractedMetadata(title="Rechnung", created_date="2024-01-02", correspondent="ACME",
+                                          document_type="Invoice", tags=["tax"])
+
+    def test_put_and_get(self):
+        # Given: a cached result
+        self.cache.put("a", self.metadata)
+
+        # When / Then: it is returned for its key, unknown keys return None
+        self.assertEqual(self.cache.get("a"), self.metadata)
+        self.assertIsNone(self.cache.get("missing"))
+
+    def test_results_survive_restart(self):
+        # Given: a cached result
+        self.cache.put("a", self.metadata)
+
+        # When: the cache is opened again
+        reopened = SqliteResultCache(self.db_file, max_entries=2)
+
+        # Then: the result is still there
+        self.assertEqual(reopened.get("a"), self.metadata)
+
+    def test_evicts_least_recently_used(self):
+        # Given: a full cache whose oldest entry was just used
+        self.cache.put("a", self.metadata)
+        self.cache.put("b", self.metadata)
+        self.cache.get("a")
+
+        # When: another result is cached
+        self.cache.put("c", self.metadata)
+
+        # Then: the least recently used entry is evicted
+        self.assertIsNotNone(self.cache.get("a"))
+        self.assertIsNone(self.cache.get("b"))
+        self.assertIsNotNone(self.cache.get("c"))
+
+    def test_get_key_ignores_keep_alive(self):
+        # Given: two requests only differing in keep_alive
+        data = {"model": "gemma2:2b", "prompt": "Prompt", "options": {"num_ctx": 8192}}
+
+        # When / Then: they share a key, another prompt or model does not
+        self.assertEqual(SqliteResultCache.get_key(data), SqliteResultCache.get_key({**data, "keep_alive": "30m"}))
+        self.assertNotEqual(SqliteResultCache.get_key(data), SqliteResultCache.get_key({**data, "prompt": "Other"}))
+        self.assertNotEqual(SqliteResultCache.get_key(data), SqliteResultCache.get_key({**data, "model": "llama3"}))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,80 @@
+import os
+import tempfile
+import unittest
+
+from models.extracted_metadata import ExtractedMetadata
+from services.similarity_index import SimilarityIndex, get_fingerprint
+
+INVOICE = ("Stadtwerke Musterstadt GmbH Rechnung Nr. {number} vom {date} Kundennummer 4711 "
+           "Sehr geehrte Damen und Herren, für den Abrechnungszeitraum berechnen wir Ihnen folgende Leistungen: "
+           "Strom Grundpreis {amount} EUR, Arbeitspreis {amount} EUR, Netzentgelt {amount} EUR. "
+           "Der Gesamtbetrag von {amount} EUR wird am {date} von Ihrem Konto abgebucht. "
+           "Bei Fragen erreichen Sie unseren Kundenservice montags bis freitags. Mit freundlichen Grüßen")
+LETTER = ("Dear customer, thank you for your order of the new garden furniture set. Your parcel has been shipped "
+          "today with our logistics partner and should arrive within three to five working days at the address "
+          "you provided. You can follow the delivery with the tracking link in your account. Kind regards")
+
+
+class TestGetFingerprint(unittest.TestCase):
+
+    def test_ignores_numbers(self):
+        # Given: two invoices only differing in numbers, amounts and dates
+        first = INVOICE.format(number=1001, date="01.02.2024", amount="12,34")
+        second = INVOICE.format(number=1002, date="01.03.2024", amount="56,78")
+
+        # When / Then: they have the same fingerprint
+        self.assertEqual(get_fingerprint(first), get_fingerprint(second))
+
+    def test_different_documents_are_far_apart(self):
+        # Given: an invoice and an unrelated letter
+        invoice = get_fingerprint(INVOICE.format(number=1, date="1.1.2024", amount="1"))
+        letter = get_fingerprint(LETTER)
+
+        # When / Then: many bits differ
+        self.assertGreater((invoice ^ letter).bit_count(), 10)
+
+    def test_short_text_has_no_fingerprint(self):
+        # When / Then: too short texts are not fingerprinted
+        self.assertIsNone(get_fingerprint("Invoice 123"))
+
+
+class TestSimilarityIndex(unittest.TestCase):
+
+    def setUp(self):
+        self.metadata = ExtractedMetadata(title="Rechnung", created_date="2024-02-01", correspondent="Stadtwerke",
+                                          document_type="Invoice", tags=["Strom"])
+
+    def test_finds_fingerprints_within_max_distance(self):
+        # Given: an index with one fingerprint
+        index = SimilarityIndex(max_distance=3)
+        index.add(0b1011 << 40, self.metadata)
+
+        # When / Then: fingerprints differing in up to 3 bits match, in more bits they do not
+        self.assertEqual(index.find(0b1011 << 40 | 0b111), self.metadata)
+        self.assertIsNone(index.find(0b1011 << 40 | 0b1111))
+
+    def test_returns_closest_match(self):
+        # Given: two indexed fingerprints
+        index = SimilarityIndex(max_distance=3)
+        other = ExtractedMetadata(title="Other", created_date=None, correspondent=None, document_type=None, tags=[])
+        index.add(0b1111, other)
+        index.add(0b1, self.metadata)
+
+        # When / Then: the closest one is returned
+        self.assertEqual(index.find(0b11), self.metadata)
+
+    def test_fingerprints_survive_restart(self):
+        # Given: an index persisted to a database file
+        with tempfile.TemporaryDirectory() as db_dir:
+            db_file = os.path.join(db_dir, "duplicates.db")
+            SimilarityIndex(3, db_file).add(2 ** 63 + 5, self.metadata)
+
+            # When: the index is opened again
+            reopened = SimilarityIndex(3, db_file)
+
+            # Then: the fingerprint is still known
+            self.assertEqual(reopened.find(2 ** 63 + 4), self.metadata)
+
+
+if __name__ == '__main__':
+    unittest.main()
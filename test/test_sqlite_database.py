@@ -0,0 +1,40 @@
+import os
+import tempfile
+import unittest
+
+from services.sqlite_database import SqliteDatabase
+
+
+class TestSqliteDatabase(unittest.TestCase):
+
+    def setUp(self):
+        self.db_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.db_dir.cleanup)
+        self.database = SqliteDatabase(os.path.join(self.db_dir.name, "test.db"))
+        self.addCleanup(self.database.close)
+        with self.database.transaction() as connection:
+            connection.execute("CREATE TABLE items (name TEXT)")
+
+    def test_transaction_commits(self):
+        # When: a row is inserted in a transaction
+        with self.database.transaction() as connection:
+            connection.execute("INSERT INTO items VALUES ('a')")
+
+        # Then: it is visible to the next transaction
+        with self.database.transaction() as connection:
+            self.assertEqual(connection.execute("SELECT name FROM items").fetchall(), [('a',)])
+
+    def test_transaction_rolls_back_on_error(self):
+        # When: a transaction raises after inserting a row
+        with self.assertRaises(RuntimeError):
+            with self.database.transaction() as connection:
+                connection.execute("INSERT INTO items VALUES ('a')")
+                raise RuntimeError("failed")
+
+        # Then: the row is not stored and the lock is released
+        with self.database.transaction() as connection:
+            self.assertEqual(connection.execute("SELECT name FROM items").fetchall(), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,17 +1,20 @@
+import asyncio
 import unittest
-from unittest.mock import patch, Mock, MagicMock
-import requests
+from unittest.mock import Mock, MagicMock, AsyncMock
+import httpx
+from services.paginator import Paginator
 from services.tag_service import TagService
 
 
-class TestTagService(unittest.TestCase):
+class TestTagService(unittest.IsolatedAsyncioTestCase):
 
     def setUp(self):
         self.mock_logger = MagicMock()
-        self.tag_service = TagService(self.mock_logger, 'http://api_url', 'test_token')
+        self.mock_client = AsyncMock()
+        self.tag_service = TagService(self.mock_logger, self.mock_client, Paginator(self.mock_client),
+                                      'http://api_url', 'test_token')
 
-    @patch('services.tag_service.requests.get')  # Patch the correct module path
-    def test_get_all_tags_success(self, mock_get):
+    async def test_get_all_tags_success(self):
         # Given: a successful response from the API
         mock_response = Mock()
         mock_response.json.return_value = {
@@ -21,28 +24,26 @@ class TestTagService(unittest.TestCase):
             ]
         }
         mock_response.status_code = 200
-        mock_get.return_value = mock_response
+        self.mock_client.get.return_value = mock_response
 
         # When: the get_all method is called
-        tags = self.tag_service.get_all()
+        tags = await self.tag_service.get_all()
 
         # Then: the returned tags should match the mock response
         self.assertEqual(len(tags), 2)
         self.assertEqual(tags[0]['name'], "Tag One")
         self.assertEqual(tags[1]['name'], "Tag Two")
 
-    @patch('services.tag_service.requests.get')
-    def test_get_all_tags_failure(self, mock_get):
+    async def test_get_all_tags_failure(self):
         # Given: a failed request that raises a RequestException
-        mock_get.side_effect = requests.exceptions.RequestException("API Failure")
+        self.mock_client.get.side_effect = httpx.HTTPError("API Failure")
 
         # When / Then: an exception is raised and the error is logged
-        with self.assertRaises(requests.exceptions.RequestException):
-            self.tag_service.get_all()
+        with self.assertRaises(httpx.HTTPError):
+            await self.tag_service.get_all()
         self.mock_logger.log_error.assert_called_once_with("Error fetching tags: API Failure")
 
-    @patch('services.tag_service.requests.get')
-    def test_get_all_tag_names_success(self, mock_get):
+    async def test_get_all_tag_names_success(self):
         # Given: a successful API response with tag names
         mock_response = Mock()
         mock_response.json.return_value = {
@@ -52,16 +53,15 @@ class TestTagService(unittest.TestCase):
             ]
         }
         mock_response.status_code = 200
-        mock_get.return_value = mock_response
+        self.mock_client.get.return_value = mock_response
 
         # When: the get_all_names method is called
-        tag_names = self.tag_service.get_all_names()
+        tag_names = await self.tag_service.get_all_names()
 
         # Then: the tag names should be extracted from the response
         self.assertEqual(tag_names, ["Tag One", "Tag Two"])
 
-    @patch('services.tag_service.requests.get')
-    def test_get_tag_name_by_id_success(self, mock_get):
+    async def test_get_tag_name_by_id_success(self):
         # Given: a successful API response with multiple tags
         mock_response = Mock()
         mock_response.json.return_value = {
@@ -71,16 +71,15 @@ class TestTagService(unittest.TestCase):
             ]
         }
         mock_response.status_code = 200
-        mock_get.return_value = mock_response
+        self.mock_client.get.return_value = mock_response
 
         # When: the get_tag_name_by_id method is called with a valid ID
-        tag_name = self.tag_service.get_tag_names_by_ids([2])
+        tag_name = await self.tag_service.get_tag_names_by_ids([2])
 
         # Then: the correct tag name should be returned
         self.assertEqual(tag_name[0], "Tag Two")
 
-    @patch('services.tag_service.requests.get')
-    def test_get_tag_name_by_id_not_found(self, mock_get):
+    async def test_get_tag_name_by_id_not_found(self):
         # Given: a successful API response with multiple tags
         mock_response = Mock()
         mock_response.json.return_value = {
@@ -90,18 +89,17 @@ class TestTagService(unittest.TestCase):
             ]
         }
         mock_response.status_code = 200
-        mock_get.return_value = mock_response
+        self.mock_client.get.return_value = mock_response
 
         # When: the get_tag_name_by_id method is called with an invalid ID
-        tag_name = self.tag_service.get_tag_names_by_ids([999])
+        tag_name = await self.tag_service.get_tag_names_by_ids([999])
 
         # Then: None should be returned as the tag is not found
         self.assertEqual(tag_name, [])
 
     # New Tests for Uncovered Methods
 
-    @patch('services.tag_service.requests.get')
-    def test_get_tag_ids_by_names_success(self, mock_get):
+    async def test_get_tag_ids_by_names_success(self):
         # Given: a successful API response with multiple tags
         mock_response = Mock()
         mock_response.json.return_value = {
@@ -111,16 +109,15 @@ class TestTagService(unittest.TestCase):
             ]
         }
         mock_response.status_code = 200
-        mock_get.return_value = mock_response
+        self.mock_client.get.return_value = mock_response
 
         # When: the get_tag_ids_by_names method is called with valid names
-        tag_ids = self.tag_service.get_tag_ids_by_names(["Tag One", "Tag Two"])
+        tag_ids = await self.tag_service.get_tag_ids_by_names(["Tag One", "Tag Two"])
 
         # Then: the correct tag IDs should be returned
         self.assertEqual(tag_ids, [1, 2])
 
-    @patch('services.tag_service.requests.get')
-    def test_get_tag_ids_by_names_partial_success(self, mock_get):
+    async def test_get_tag_ids_by_names_partial_success(self):
         # Given: a successful API response with some matching tag names
         mock_response = Mock()
         mock_response.json.return_value = {
@@ -130,36 +127,89 @@ class TestTagService(unittest.TestCase):
             ]
         }
         mock_response.status_code = 200
-        mock_get.return_value = mock_response
+        self.mock_client.get.return_value = mock_response
 
         # When: the get_tag_ids_by_names method is called with one valid and one invalid name
-        tag_ids = self.tag_service.get_tag_ids_by_names(["Tag One", "Nonexistent Tag"])
+        tag_ids = await self.tag_service.get_tag_ids_by_names(["Tag One", "Nonexistent Tag"])
 
         # Then: only the valid tag ID should be returned
         self.assertEqual(tag_ids, [1])
 
-    @patch('services.tag_service.requests.post')
-    def test_create_tags_success(self, mock_post):
+    async def test_create_tags_success(self):
         # Given: a successful POST request for creating a new tag
         mock_response = Mock()
         mock_response.json.return_value = {"id": 3}
         mock_response.status_code = 201
-        mock_post.return_value = mock_response
+        self.mock_client.post.return_value = mock_response
 
         # When: the create_tags method is called
-        new_tag_ids = self.tag_service.create_tags(["New Tag"])
+        new_tag_ids = await self.tag_service.create_tags(["New Tag"])
 
         # Then: the ID of the newly created tag should be returned
         self.assertEqual(new_tag_ids, [3])
 
-    @patch('services.tag_service.requests.post')
-    def test_create_tags_failure(self, mock_post):
+    async def test_create_tags_updates_cache(self):
+        # Given: a loaded tag cache and a successful POST request for creating a new tag
+        mock_get_response = Mock()
+        mock_get_response.json.return_value = {"results": [{"id": 1, "name": "Tag One"}]}
+        self.mock_client.get.return_value = mock_get_response
+        await self.tag_service.get_all_names()
+
+        mock_post_response = Mock()
+        mock_post_response.json.return_value = {"id": 3}
+        self.mock_client.post.return_value = mock_post_response
+
+        # When: the tag is created and looked up afterwards
+        await self.tag_service.create_tags(["New Tag"])
+        tag_ids = await self.tag_service.get_tag_ids_by_names(["Tag One", "new tag"])
+
+        # Then: the new tag is found without fetching the tags again
+        self.assertEqual(tag_ids, [1, 3])
+        self.mock_client.get.assert_awaited_once()
+
+    async def test_create_tags_concurrently_and_once_per_name(self):
+        # Given: POST requests that take a while
+        created = []
+
+        async def post(url, json, headers):
+            created.append(json["name"])
+            await asyncio.sleep(0.01)
+            response = Mock(status_code=201)
+            response.json.return_value = {"id": len(created)}
+            return response
+
+        self.mock_client.post.side_effect = post
+
+        # When: two documents ask for the same new tags at the same time
+        first, second = await asyncio.gather(self.tag_service.create_tags(["a", "b"]),
+                                             self.tag_service.create_tags(["b", "a"]))
+
+        # Then: every tag is created once and both get the same IDs
+        self.assertEqual(sorted(created), ["a", "b"])
+        self.assertEqual(first, second[::-1])
+
+    async def test_create_tags_uses_tag_created_elsewhere(self):
+        # Given: Paperless rejects the tag because it has been created in the meantime
+        self.mock_client.post.return_value = Mock(status_code=400)
+        mock_get_response = Mock()
+        mock_get_response.json.return_value = {"results": [{"id": 7, "name": "New Tag"}]}
+        self.mock_client.get.return_value = mock_get_response
+
+        # When: the tag is created
+        new_tag_ids = await self.tag_service.create_tags(["new tag"])
+
+        # Then: the ID of the existing tag is returned
+        self.assertEqual(new_tag_ids, [7])
+        self.mock_client.get.assert_awaited_once_with('http://api_url/tags/', params={"name__iexact": "new tag"},
+                                                      headers={"Authorization": "Token test_token"})
+
+    async def test_create_tags_failure(self):
         # Given: a failed POST request
-        mock_post.side_effect = requests.exceptions.RequestException("API Failure")
+        self.mock_client.post.side_effect = httpx.HTTPError("API Failure")
 
         # When / Then: an exception is raised and the error is logged
-        with self.assertRaises(requests.exceptions.RequestException):
-            self.tag_service.create_tags(["New Tag"])
+        with self.assertRaises(httpx.HTTPError):
+            await self.tag_service.create_tags(["New Tag"])
         self.mock_logger.log_error.assert_called_once_with("Error creating tag 'New Tag': API Failure")
 
 
@@ -0,0 +1,111 @@
+import unittest
+from unittest.mock import MagicMock, patch
+
+from services.taxonomy_cache import TaxonomyCache
+
+
+class TestTaxonomyCache(unittest.IsolatedAsyncioTestCase):
+
+    def setUp(self):
+        self.mock_fetch = MagicMock(side_effect=self._iterate_tags)
+        self.cache = TaxonomyCache(self.mock_fetch, 300)
+
+    @staticmethod
+    async def _iterate_tags():
+        for tag in [{"id": 1, "name": "Tag One"}, {"id": 2, "name": "Tag Two"}]:
+            yield tag
+
+    async def test_lookups_fetch_once_within_ttl(self):
+        # Given: a cache that has not been loaded yet
+
+        # When: several lookups are made
+        names = await self.cache.get_names()
+        name = await self.cache.get_name_by_id(2)
+        tag_id = await self.cache.get_id_by_name("TAG ONE")
+
+        # Then: the list is fetched only once and the indexes answer all lookups
+        self.assertEqual(names, ["Tag One", "Tag Two"])
+        self.assertEqual(name, "Tag Two")
+        self.assertEqual(tag_id, 1)
+        self.mock_fetch.assert_called_once()
+
+    async def test_unknown_entries_return_none(self):
+        # When / Then: lookups for missing entries return None
+        self.assertIsNone(await self.cache.get_name_by_id(999))
+        self.assertIsNone(await self.cache.get_id_by_name("Nonexistent"))
+
+    async def test_add_updates_indexes_without_refetch(self):
+        # Given: a loaded cache
+        await self.cache.get_items()
+
+        # When: a newly created entry is added
+        self.cache.add({"id": 3, "name": "New Tag"})
+
+        # Then: it is found by id and name without another fetch
+        self.assertEqual(await self.cache.get_name_by_id(3), "New Tag")
+        self.assertEqual(await self.cache.get_id_by_name("new tag"), 3)
+        self.mock_fetch.assert_called_once()
+
+    async def test_match_id_finds_similar_names_after_refresh_and_add(self):
+        # Given: a cache with fuzzy matching
+        cache = TaxonomyCache(self.mock_fetch, 300, match_threshold=0.85, strip_legal_forms=True)
+
+        # When: similar names are matched before and after an entry is added
+        loaded_id = await cache.match_id("tag-one")
+        cache.add({"id": 3, "name": "Telekom GmbH"})
+        added_id = await cache.match_id("Telekom")
+
+        # Then: both are found, the exact lookup stays exact
+        self.assertEqual(loaded_id, 1)
+        self.assertEqual(added_id, 3)
+        self.assertIsNone(await cache.get_id_by_name("Telekom"))
+
+    async def test_version_changes_with_entries(self):
+        # Given: a loaded cache
+        version = await self.cache.get_version()
+
+        # When: an entry is added
+        self.cache.add({"id": 3, "name": "New Tag"})
+
+        # Then: the version changes, but not on plain reads
+        self.assertEqual(await self.cache.get_version(), version + 1)
+        self.assertEqual(await self.cache.get_version(), version + 1)
+
+    async def test_invalidate_forces_refetch(self):
+        # Given: a loaded cache
+        await self.cache.get_items()
+
+        # When: the cache is invalidated
+        self.cache.invalidate()
+        await self.cache.get_items()
+
+        # Then: the list is fetched again
+        self.assertEqual(self.mock_fetch.call_count, 2)
+
+    @patch('services.taxonomy_cache.time.monotonic')
+    async def test_expired_ttl_forces_refetch(self, mock_monotonic):
+        # Given: a cache loaded at t=0
+        mock_monotonic.return_value = 0
+        await self.cache.get_items()
+
+        # When: the TTL has passed
+        mock_monotonic.return_value = 301
+        await self.cache.get_items()
+
+        # Then: the list is fetched again
+        self.assertEqual(self.mock_fetch.call_count, 2)
+
+    async def test_zero_ttl_disables_caching(self):
+        # Given: a cache without a TTL
+        cache = TaxonomyCache(self.mock_fetch, 0)
+
+        # When: two lookups are made
+        await cache.get_names()
+        await cache.get_names()
+
+        # Then: every lookup fetches the list
+        self.assertEqual(self.mock_fetch.call_count, 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,89 @@
+import unittest
+
+from services.taxonomy_matcher import TaxonomyMatcher, normalize
+
+
+class TestNormalize(unittest.TestCase):
+
+    def test_folds_case_accents_and_punctuation(self):
+        # When / Then: names differing only in these details are normalized to the same value
+        self.assertEqual(normalize("Müller & Co. KG"), "muller co kg")
+        self.assertEqual(normalize("Straße"), "strasse")
+
+    def test_strips_legal_forms(self):
+        # When / Then: company names differing only in their legal form are normalized to the same value
+        self.assertEqual(normalize("Müller & Co. KG", strip_legal_forms=True), "muller")
+        self.assertEqual(normalize("Telekom GmbH", strip_legal_forms=True), normalize("TELEKOM"))
+        self.assertEqual(normalize("Enel Energie S.A.", strip_legal_forms=True), "enel energie")
+
+    def test_keeps_names_consisting_of_legal_forms(self):
+        # When / Then: the name is not normalized to an empty string
+        self.assertEqual(normalize("AG", strip_legal_forms=True), "ag")
+
+
+class TestTaxonomyMatcher(unittest.TestCase):
+
+    def setUp(self):
+        self.matcher = TaxonomyMatcher(threshold=0.85, strip_legal_forms=True)
+        for item in [{'id': 1, 'name': 'Telekom Deutschland GmbH'}, {'id': 2, 'name': 'Vodafone'},
+                     {'id': 3, 'name': 'Finanzamt München'}, {'id': 4, 'name': 'ING'}]:
+            self.matcher.add(item)
+
+    def test_finds_normalized_names(self):
+        # When / Then: legal forms, case and accents do not matter
+        self.assertEqual(self.matcher.find("TELEKOM DEUTSCHLAND"), 1)
+        self.assertEqual(self.matcher.find("Finanzamt Munchen"), 3)
+
+    def test_finds_similar_names(self):
+        # When / Then: small differences such as OCR or spelling errors are tolerated
+        self.assertEqual(self.matcher.find("Telekom Deutchland"), 1)
+        self.assertEqual(self.matcher.find("Vodafon"), 2)
+
+    def test_does_not_match_different_or_short_names(self):
+        # When / Then: unrelated names and short names with one different letter are not matched
+        self.assertIsNone(self.matcher.find("Telefonica"))
+        self.assertIsNone(self.matcher.find("INA"))
+        self.assertEqual(self.matcher.find("ing"), 4)
+
+    def test_does_not_match_names_with_different_years(self):
+        # Given: tags for consecutive years
+        self.matcher.add({'id': 5, 'name': 'Steuer 2023'})
+        self.matcher.add({'id': 6, 'name': 'Rechnung 2023'})
+
+        # When / Then: the next year is not matched to the existing tag, but a misspelling still is
+        self.assertIsNone(self.matcher.find("Steuer 2024"))
+        self.assertIsNone(self.matcher.find("Rechnung 2024"))
+        self.assertIsNone(self.matcher.find("Steuer"))
+        self.assertEqual(self.matcher.find("Steuern 2023"), 5)
+
+    def test_does_not_match_names_with_different_numbers(self):
+        # Given: a quarterly report
+        self.matcher.add({'id': 7, 'name': 'Q1 Report'})
+
+        # When / Then: another quarter is not matched
+        self.assertIsNone(self.matcher.find("Q2 Report"))
+        self.assertEqual(self.matcher.find("Q1 Reports"), 7)
+
+    def test_threshold_of_one_only_matches_normalized_names(self):
+        # Given: a matcher without fuzzy matching
+        matcher = TaxonomyMatcher(threshold=1, strip_legal_forms=True)
+        matcher.add({'id': 2, 'name': 'Vodafone GmbH'})
+
+        # When / Then: only equal normalized names match
+        self.assertEqual(matcher.find("vodafone"), 2)
+        self.assertIsNone(matcher.find("Vodafon"))
+
+    def test_keeps_legal_forms_in_tags(self):
+        # Given: a tag matcher, which does not strip legal forms
+        matcher = TaxonomyMatcher(threshold=1)
+        matcher.add({'id': 1, 'name': 'Versicherung'})
+        matcher.add({'id': 2, 'name': 'Tax'})
+
+        # When / Then: tags containing a legal form as a word are not resolved to the tag without it
+        self.assertIsNone(matcher.find("EV Versicherung"))
+        self.assertIsNone(matcher.find("Tax SE"))
+        self.assertEqual(matcher.find("tax"), 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,61 @@
+import unittest
+
+from services.taxonomy_ranker import TaxonomyIndex, TaxonomyRanker, get_terms
+
+TAGS = [
+    {'id': 1, 'name': 'Insurance', 'document_count': 3},
+    {'id': 2, 'name': 'Electricity', 'document_count': 40},
+    {'id': 3, 'name': 'Car insurance', 'document_count': 1},
+    {'id': 4, 'name': 'Taxes', 'document_count': 100},
+    {'id': 5, 'name': 'Holiday', 'document_count': 0},
+]
+
+
+class TestTaxonomyIndex(unittest.TestCase):
+
+    def setUp(self):
+        self.index = TaxonomyIndex(TAGS)
+
+    def test_ranks_matching_names_first(self):
+        # Given: a document about a car insurance
+        terms = get_terms("Your car insurance policy: the insurance premium is due")
+
+        # When: the two best entries are selected
+        names = self.index.select(terms, token_budget=100, top_k=2)
+
+        # Then: the entries matching the text are selected, the more specific one first
+        self.assertEqual(names, ['Car insurance', 'Insurance'])
+
+    def test_ranks_by_usage_without_matches(self):
+        # When: entries are selected for a document matching no name
+        names = self.index.select(get_terms("Lorem ipsum"), token_budget=100, top_k=3)
+
+        # Then: the most used entries are selected
+        self.assertEqual(names, ['Taxes', 'Electricity', 'Insurance'])
+
+    def test_respects_token_budget(self):
+        # When: entries are selected with a budget of 8 estimated tokens
+        names = self.index.select(get_terms("Taxes"), token_budget=8)
+
+        # Then: only the best entries fitting into the budget are selected (Taxes 2 and Electricity 4 tokens)
+        self.assertEqual(names, ['Taxes', 'Electricity'])
+
+
+class TestTaxonomyRanker(unittest.TestCase):
+
+    def test_rebuilds_index_when_version_changes(self):
+        # Given: a ranker that has selected tags of version 1
+        ranker = TaxonomyRanker(token_budget=100, top_k=1)
+        ranker.select('existing_tags', 1, TAGS, get_terms("Holiday"))
+
+        # When: the same version and a new version with another entry are selected from
+        same = ranker.select('existing_tags', 1, TAGS + [{'id': 6, 'name': 'Travel'}], get_terms("Travel"))
+        changed = ranker.select('existing_tags', 2, TAGS + [{'id': 6, 'name': 'Travel'}], get_terms("Travel"))
+
+        # Then: the index is only rebuilt for the new version
+        self.assertEqual(same, ['Taxes'])
+        self.assertEqual(changed, ['Travel'])
+
+
+if __name__ == '__main__':
+    unittest.main()
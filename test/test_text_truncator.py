@@ -0,0 +1,88 @@
+import unittest
+
+from services.text_truncator import TextTruncator, TOKEN_UNIT, HEAD_TAIL_STRATEGY, PAGES_STRATEGY
+
+
+class TestTextTruncator(unittest.TestCase):
+
+    def test_head_keeps_first_words(self):
+        # Given: a text with irregular whitespace and a budget of 3 words
+        truncator = TextTruncator(3)
+
+        # When: the text is truncated
+        result = truncator.truncate("  One two\n\tthree four five ")
+
+        # Then: the first words are joined by single spaces, as before
+        self.assertEqual("One two three", result)
+
+    def test_head_keeps_short_text(self):
+        # When / Then: texts within the budget are only normalized
+        self.assertEqual("One two", TextTruncator(5).truncate("One\ntwo"))
+        self.assertEqual("", TextTruncator(5).truncate(""))
+
+    def test_token_budget(self):
+        # Given: a budget of 4 estimated tokens
+        truncator = TextTruncator(4, unit=TOKEN_UNIT)
+
+        # When: a text with a long word is truncated
+        result = truncator.truncate("Die Rechnungsnummer lautet 42")
+
+        # Then: words are kept while their estimated tokens fit ("Die" 1, "Rechnungsnummer" 4)
+        self.assertEqual("Die", result)
+
+    def test_token_budget_cuts_long_first_word(self):
+        # Given: a budget of 4 estimated tokens
+        truncator = TextTruncator(4, unit=TOKEN_UNIT)
+
+        # When: the text starts with a word longer than the budget, e.g. a URL
+        result = truncator.truncate("https://example.com/invoices/2024/0042 Rechnung")
+
+        # Then: the word is cut to the budget instead of leaving the text empty
+        self.assertEqual("https://example.", result)
+
+    def test_head_tail_keeps_beginning_and_end(self):
+        # Given: a budget of 4 words split between head and tail
+        truncator = TextTruncator(4, strategy=HEAD_TAIL_STRATEGY)
+
+        # When: a longer text is truncated
+        result = truncator.truncate("a b c d e f g h")
+
+        # Then: the omitted middle is marked
+        self.assertEqual("a b ... g h", result)
+
+    def test_head_tail_without_omission(self):
+        # When / Then: texts within the budget are not marked as shortened
+        self.assertEqual("a b c d", TextTruncator(4, strategy=HEAD_TAIL_STRATEGY).truncate("a b c d"))
+        self.assertEqual("a b c", TextTruncator(5, strategy=HEAD_TAIL_STRATEGY).truncate("a b c"))
+
+    def test_head_tail_scans_tail_across_chunks(self):
+        # Given: a long text whose tail words span the chunks the tail is scanned in
+        text = " ".join(f"word{index}" for index in range(5000))
+        truncator = TextTruncator(2000, strategy=HEAD_TAIL_STRATEGY)
+
+        # When: the text is truncated
+        result = truncator.truncate(text).split(" ")
+
+        # Then: no word is cut at a chunk boundary
+        self.assertEqual(result[:1000], [f"word{index}" for index in range(1000)])
+        self.assertEqual(result[1000], "...")
+        self.assertEqual(result[1001:], [f"word{index}" for index in range(4000, 5000)])
+
+    def test_pages_keeps_first_pages(self):
+        # Given: a budget large enough for the whole text and the first two pages requested
+        truncator = TextTruncator(100, strategy=PAGES_STRATEGY, pages=2)
+
+        # When: a text of three pages is truncated
+        result = truncator.truncate("Page one\fPage two\fPage three")
+
+        # Then: only the first two pages are kept
+        self.assertEqual("Page one Page two", result)
+
+    def test_unknown_strategy(self):
+        # When / Then: an unknown strategy is rejected
+        with self.assertRaises(ValueError):
+            TextTruncator(10, strategy="middle")
+
+
+if __name__ == '__main__':
+    unittest.main()
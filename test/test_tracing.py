@@ -0,0 +1,139 @@
+import asyncio
+import json
+import os
+import tempfile
+import unittest
+from unittest.mock import MagicMock
+
+from tracing import JsonLinesSpanExporter, OtlpHttpSpanExporter, SpanExporter, Tracer
+
+
+class TestTracer(unittest.IsolatedAsyncioTestCase):
+
+    def setUp(self):
+        # Given: a tracer with a mocked exporter
+        self.exporter = MagicMock()
+        self.tracer = Tracer()
+        self.tracer.configure([self.exporter])
+
+    def _exported(self):
+        return {call.args[0].name: call.args[0] for call in self.exporter.submit.call_args_list}
+
+    async def test_trace_links_child_spans_of_concurrent_tasks(self):
+        # Given: two child spans running concurrently within a trace
+        async def child(name):
+            with self.tracer.span(name):
+                await asyncio.sleep(0)
+
+        # When: the trace is run
+        with self.tracer.trace('process_document', {'doc_id': 1}):
+            await asyncio.gather(child('first'), child('second'))
+
+        # Then: both children belong to the trace and have the root as parent
+        spans = self._exported()
+        root = spans['process_document']
+        self.assertIsNone(root.parent_id)
+        self.assertEqual(root.attributes, {'doc_id': 1})
+        for name in ('first', 'second'):
+            self.assertEqual(spans[name].trace_id, root.trace_id)
+            self.assertEqual(spans[name].parent_id, root.span_id)
+            self.assertLessEqual(root.start_time, spans[name].start_time)
+
+    def test_span_outside_trace_is_not_recorded(self):
+        # Given / When: a span is run without a trace
+        with self.tracer.span('orphan') as span:
+            pass
+
+        # Then: nothing is recorded
+        self.assertIsNone(span)
+        self.exporter.submit.assert_not_called()
+
+    def test_trace_records_error(self):
+        # Given / When: a trace raises
+        with self.assertRaises(ValueError):
+            with self.tracer.trace('process_document'):
+                raise ValueError("Paperless is down")
+
+        # Then: the error is recorded on the span
+        self.assertEqual(self._exported()['process_document'].error, "Paperless is down")
+
+    def test_activate_parents_spans_to_started_trace(self):
+        # Given: a trace started without being the current span
+        root = self.tracer.start_trace('process_document')
+
+        # When: a span is run with the trace activated and the trace is ended
+        with self.tracer.activate(root):
+            with self.tracer.span('generate_stage'):
+                pass
+        self.tracer.end(root)
+
+        # Then: the span is a child of the trace
+        self.assertEqual(self._exported()['generate_stage'].parent_id, root.span_id)
+        self.assertIsNotNone(root.end_time)
+
+    def test_disabled_tracer_records_nothing(self):
+        # Given: a tracer without exporters
+        tracer = Tracer()
+
+        # When / Then: traces are not started
+        with tracer.trace('process_document') as span:
+            self.assertIsNone(span)
+        self.assertIsNone(tracer.start_trace('process_document'))
+
+
+class TestSpanExporters(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.file = os.path.join(self.directory.name, 'traces.jsonl')
+        self.tracer = Tracer()
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_exporter_without_export_cannot_be_created(self):
+        # Given: an exporter that does not implement export
+        class IncompleteExporter(SpanExporter):
+            pass
+
+        # When / Then: creating it fails instead of its background thread
+        with self.assertRaises(TypeError):
+            IncompleteExporter(MagicMock())
+
+    def test_json_lines_exporter_writes_spans(self):
+        # Given: a tracer exporting to a JSON lines file
+        self.tracer.configure([JsonLinesSpanExporter(MagicMock(), self.file)])
+
+        # When: a trace with a child span is recorded and the tracer is closed
+        with self.tracer.trace('process_document', {'doc_id': 7}):
+            with self.tracer.span('create_prompt'):
+                pass
+        self.tracer.close()
+
+        # Then: both spans are written, the child first
+        with open(self.file, encoding='utf-8') as file:
+            spans = [json.loads(line) for line in file]
+        self.assertEqual([span['name'] for span in spans], ['create_prompt', 'process_document'])
+        self.assertEqual(spans[1]['attributes'], {'doc_id': 7})
+        self.assertGreaterEqual(spans[1]['duration_ms'], 0)
+
+    def test_otlp_encoding(self):
+        # Given: a finished span with an error
+        self.tracer.configure([MagicMock()])
+        span = self.tracer.start_trace('process_document', {'doc_id': 7, 'batch': True})
+        self.tracer.end(span, ValueError("failed"))
+
+        # When: the span is converted to OTLP JSON
+        otlp = OtlpHttpSpanExporter.to_otlp([span])
+
+        # Then: ids, attributes and status follow the OTLP encoding
+        otlp_span = otlp['resourceSpans'][0]['scopeSpans'][0]['spans'][0]
+        self.assertEqual(otlp_span['traceId'], span.trace_id)
+        self.assertEqual(otlp_span['parentSpanId'], "")
+        self.assertEqual(otlp_span['attributes'], [{"key": "doc_id", "value": {"intValue": "7"}},
+                                                   {"key": "batch", "value": {"boolValue": True}}])
+        self.assertEqual(otlp_span['status'], {"code": 2, "message": "failed"})
+
+
+if __name__ == '__main__':
+    unittest.main()
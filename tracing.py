@@ -0,0 +1,230 @@
+import json
+import queue
+import random
+import threading
+import time
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import asdict
+
+import httpx
+
+from logger import Logger
+from models.span import Span
+
+# Span of the current task, asyncio tasks inherit it from the task that created them
+_current_span = ContextVar('current_span', default=None)
+
+SERVICE_NAME = 'paperless-metadata-ollama-processor'
+# OTLP status codes
+_STATUS_OK = 1
+_STATUS_ERROR = 2
+
+
+class Tracer:
+    def __init__(self):
+        """
+        Records one trace per document with child spans for the work done for it. Without exporters every
+        method is a no-op, so instrumented code costs next to nothing when tracing is disabled.
+        """
+        self.exporters = []
+
+    def configure(self, exporters):
+        self.exporters = list(exporters)
+
+    def start_trace(self, name, attributes=None):
+        """
+        Starts the root span of a new trace, to be ended with `end`. It is not made the current span, see `activate`.
+        """
+        if not self.exporters:
+            return None
+        return self._start(name, None, attributes)
+
+    def end(self, span: Span, error=None):
+        if span is None:
+            return
+        span.end_time = time.time_ns()
+        if error is not None:
+            span.error = str(error) or type(error).__name__
+        for exporter in self.exporters:
+            exporter.submit(span)
+
+    @contextmanager
+    def activate(self, span: Span):
+        """
+        Makes `span` the parent of the spans started within the block.
+        """
+        if span is None:
+            yield
+            return
+        token = _current_span.set(span)
+        try:
+            yield
+        finally:
+            _current_span.reset(token)
+
+    @contextmanager
+    def trace(self, name, attributes=None):
+        """
+        Runs the block as the root span of a new trace.
+        """
+        span = self.start_trace(name, attributes)
+        with self._run(span):
+            yield span
+
+    @contextmanager
+    def span(self, name, attributes=None):
+        """
+        Runs the block as a child span of the current span. Outside of a trace nothing is recorded.
+        """
+        parent = _current_span.get()
+        span = self._start(name, parent, attributes) if parent is not None and self.exporters else None
+        with self._run(span):
+            yield span
+
+    def close(self):
+        for exporter in self.exporters:
+            exporter.close()
+        self.exporters = []
+
+    @contextmanager
+    def _run(self, span):
+        if span is None:
+            yield
+            return
+        token = _current_span.set(span)
+        try:
+            yield
+        except BaseException as e:
+            self.end(span, e)
+            raise
+        else:
+            self.end(span)
+        finally:
+            _current_span.reset(token)
+
+    def _start(self, name, parent, attributes):
+        trace_id = parent.trace_id if parent else f'{random.getrandbits(128):032x}'
+        return Span(trace_id=trace_id,
+                    span_id=f'{random.getrandbits(64):016x}',
+                    parent_id=parent.span_id if parent else None,
+                    name=name,
+                    start_time=time.time_ns(),
+                    attributes=dict(attributes or {}))
+
+
+class SpanExporter(ABC):
+    def __init__(self, logger: Logger, max_batch_size=100):
+        """
+        Exports finished spans from a background thread, in batches of the spans that have queued up meanwhile.
+        """
+        self.logger = logger
+        self.max_batch_size = max_batch_size
+        self.queue = queue.SimpleQueue()
+        self.thread = threading.Thread(target=self._run, name=type(self).__name__, daemon=True)
+        self.thread.start()
+
+    def submit(self, span: Span):
+        self.queue.put(span)
+
+    def close(self):
+        """
+        Export the queued spans and stop the background thread.
+        """
+        self.queue.put(None)
+        self.thread.join()
+
+    @abstractmethod
+    def export(self, spans):
+        """
+        Send a batch of finished spans, called from the background thread.
+        """
+
+    def _run(self):
+        closing = False
+        while not closing:
+            spans = []
+            span = self.queue.get()
+            while span is not None:
+                spans.append(span)
+                if len(spans) == self.max_batch_size or self.queue.empty():
+                    break
+                span = self.queue.get()
+            closing = span is None
+
+            if spans:
+                try:
+                    self.export(spans)
+                except Exception as e:
+                    self.logger.log_error(f"Error exporting {len(spans)} spans: {e}")
+
+
+class JsonLinesSpanExporter(SpanExporter):
+    def __init__(self, logger: Logger, file, max_batch_size=100):
+        """
+        Appends every span as one JSON object per line to `file`.
+        """
+        self.file = file
+        super().__init__(logger, max_batch_size)
+
+    def export(self, spans):
+        lines = [json.dumps({**asdict(span), 'duration_ms': (span.end_time - span.start_time) / 1e6}) + '\n'
+                 for span in spans]
+        with open(self.file, 'a', encoding='utf-8') as file:
+            file.writelines(lines)
+
+
+class OtlpHttpSpanExporter(SpanExporter):
+    def __init__(self, logger: Logger, url, timeout=10, max_batch_size=100):
+        """
+        Sends the spans to an OpenTelemetry collector's OTLP/HTTP endpoint in the JSON encoding,
+        e.g. http://otel-collector:4318/v1/traces.
+        """
+        self.url = url
+        self.client = httpx.Client(timeout=timeout)
+        super().__init__(logger, max_batch_size)
+
+    def export(self, spans):
+        response = self.client.post(self.url, json=self.to_otlp(spans))
+        response.raise_for_status()
+
+    def close(self):
+        super().close()
+        self.client.close()
+
+    @staticmethod
+    def to_otlp(spans):
+        return {
+            "resourceSpans": [{
+                "resource": {"attributes": [_to_otlp_attribute("service.name", SERVICE_NAME)]},
+                "scopeSpans": [{
+                    "scope": {"name": __name__},
+                    "spans": [{
+                        "traceId": span.trace_id,
+                        "spanId": span.span_id,
+                        "parentSpanId": span.parent_id or "",
+                        "name": span.name,
+                        "startTimeUnixNano": str(span.start_time),
+                        "endTimeUnixNano": str(span.end_time),
+                        "attributes": [_to_otlp_attribute(key, value) for key, value in span.attributes.items()],
+                        "status": {"code": _STATUS_ERROR, "message": span.error} if span.error
+                        else {"code": _STATUS_OK},
+                    } for span in spans],
+                }],
+            }]
+        }
+
+
+def _to_otlp_attribute(key, value):
+    if isinstance(value, bool):
+        return {"key": key, "value": {"boolValue": value}}
+    if isinstance(value, int):
+        return {"key": key, "value": {"intValue": str(value)}}
+    if isinstance(value, float):
+        return {"key": key, "value": {"doubleValue": value}}
+    return {"key": key, "value": {"stringValue": str(value)}}
+
+
+# Shared by all services, configured with the exporters at startup
+tracer = Tracer()